@@ -0,0 +1,222 @@
+"""Persistent on-disk cache for Gemini responses.
+
+Sits underneath the in-memory st.cache_data layer so estimates survive restarts and
+are shared by every worker process on the host (SQLite in WAL mode handles the
+cross-process locking).
+
+Reads stay reads where they can: a hit refreshes its row's last_access only when that is
+older than TOUCH_INTERVAL, hit/miss/eviction counts are kept in memory and written in one
+transaction at most every STATS_FLUSH_INTERVAL seconds (and at exit), and the row count
+behind LRU eviction is checked every EVICTION_CHECK_EVERY inserts rather than on each one.
+"""
+import atexit
+import functools
+import hashlib
+import inspect
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from multiprocessing import util
+
+# --- CONFIG ---
+CACHE_PATH = os.environ.get("AQI_AI_CACHE_PATH", "ai_cache.sqlite3")
+MAX_ENTRIES = int(os.environ.get("AQI_AI_CACHE_MAX_ENTRIES", 5000))
+PRICE_BUCKET = 25000  # Prices within the same $25k band share an estimate
+TOUCH_INTERVAL = 10 * 60     # Seconds; eviction order is only this precise
+STATS_FLUSH_INTERVAL = 30    # Seconds between writes of the in-memory hit/miss counts
+EVICTION_CHECK_EVERY = 50    # Inserts between row counts; the table may run this far over max_entries
+
+DAY = 24 * 3600
+DEFAULT_TTLS = {
+    "market_yield": 7 * DAY,
+    "median_price": 7 * DAY,
+    "estimates": 3 * DAY,
+    "tax_strategy": 1 * DAY,
+}
+
+_MISS = object()
+
+
+def normalize_address(address):
+    """Lowercases and strips punctuation so '2 Example St, Melbourne' == '2 example st melbourne'."""
+    return re.sub(r"[^a-z0-9]+", " ", str(address).lower()).strip()
+
+
+class ResponseCache:
+    """SQLite-backed TTL cache with least-recently-used eviction and hit/miss counters."""
+
+    def __init__(self, path=CACHE_PATH, ttls=None, max_entries=MAX_ENTRIES):
+        self.path = path
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._counts = Counter()
+        self._counts_lock = threading.Lock()
+        self._flushed = time.monotonic()
+        self._inserts_until_check = 0
+        atexit.register(self._flush_at_exit)
+        util.register_after_fork(self, ResponseCache._after_fork)
+
+    def _after_fork(self):
+        # A forked pool worker gets its own connection and counts, and flushes them as it exits
+        # (pool workers leave through os._exit, which skips atexit)
+        self._local = threading.local()
+        self._counts = Counter()
+        self._counts_lock = threading.Lock()
+        util.Finalize(self, self._flush_at_exit, exitpriority=10)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, kind TEXT NOT NULL, value TEXT NOT NULL, "
+                "created REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access)")
+            conn.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            self._local.conn = conn
+        return conn
+
+    def make_key(self, kind, arguments):
+        """Cache key from (kind, normalized address, beds, baths, cars, price bucket, other args)."""
+        args = dict(arguments)
+        price = args.pop("price", None)
+        parts = [
+            kind,
+            normalize_address(args.pop("address", "")),
+            int(args.pop("beds", 0) or 0),
+            int(args.pop("baths", 0) or 0),
+            int(args.pop("cars", 0) or 0),
+            int(float(price) // PRICE_BUCKET) if price is not None else None,
+            sorted(args.items()),
+        ]
+        return hashlib.sha256(json.dumps(parts, default=str).encode()).hexdigest()
+
+    def _bump(self, name):
+        with self._counts_lock:
+            self._counts[name] += 1
+            due = time.monotonic() - self._flushed >= STATS_FLUSH_INTERVAL
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Adds the counts gathered in memory since the last flush to the shared stats table."""
+        with self._counts_lock:
+            counts, self._counts = self._counts, Counter()
+            self._flushed = time.monotonic()
+        if not counts:
+            return
+        conn = self._conn()
+        try:
+            conn.execute("BEGIN")
+            conn.executemany(
+                "INSERT INTO stats(name, value) VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                counts.items(),
+            )
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            with self._counts_lock:
+                self._counts.update(counts)  # Kept for the next flush
+            raise
+
+    def _flush_at_exit(self):
+        try:
+            self.flush()
+        except sqlite3.Error as e:
+            print(f"⚠️ AI Cache Error (stats): {e}")
+
+    def get(self, kind, key, default=None):
+        """Returns the cached value if present and younger than the kind's TTL."""
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute("SELECT value, created, last_access FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None or now - row[1] > self.ttls.get(kind, DAY):
+            self._bump(f"{kind}:miss")
+            return default
+        if now - row[2] > TOUCH_INTERVAL:
+            conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+        self._bump(f"{kind}:hit")
+        return json.loads(row[0])
+
+    def lookup(self, kind, arguments, default=None):
+        """Cache-only read of what a cached fetch_* call with these arguments stored; never calls the API."""
+        return self.get(kind, self.make_key(kind, arguments), default)
+
+    def set(self, kind, key, value):
+        """Stores a value; every EVICTION_CHECK_EVERY inserts, evicts the least recently used rows beyond max_entries."""
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO responses(key, kind, value, created, last_access) VALUES (?, ?, ?, ?, ?)",
+            (key, kind, json.dumps(value), now, now),
+        )
+        self._inserts_until_check -= 1
+        if self._inserts_until_check > 0:
+            return
+        self._inserts_until_check = EVICTION_CHECK_EVERY
+        excess = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_access LIMIT ?)", (excess,)
+            )
+            self._bump("evictions")
+
+    def prime(self, kind, arguments, value):
+        """Seeds the entry a cached fetch_* call with these arguments would look up."""
+        self.set(kind, self.make_key(kind, arguments), value)
+
+    def stats(self):
+        """Hit/miss/eviction counters shared by all processes using this cache file.
+
+        This process's counts are flushed first; other processes' show up once they flush.
+        """
+        self.flush()
+        return dict(self._conn().execute("SELECT name, value FROM stats ORDER BY name").fetchall())
+
+    def clear(self, kind=None):
+        if kind is None:
+            self._conn().execute("DELETE FROM responses")
+        else:
+            self._conn().execute("DELETE FROM responses WHERE kind = ?", (kind,))
+
+
+response_cache = ResponseCache()
+
+
+def cached(kind, cache=None):
+    """Decorator: serve a fetch_* function from the disk cache, storing only successful (non-None) results."""
+    def decorator(fn):
+        sig = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            store = cache or response_cache
+            bound = sig.bind(*args, **kwargs)
+            bound.apply_defaults()
+            try:
+                key = store.make_key(kind, bound.arguments)
+                hit = store.get(kind, key, _MISS)
+            except sqlite3.Error as e:
+                print(f"⚠️ AI Cache Error ({kind}): {e}")
+                return fn(*args, **kwargs)
+            if hit is not _MISS:
+                return hit
+            value = fn(*args, **kwargs)
+            if value is not None:
+                try:
+                    store.set(kind, key, value)
+                except sqlite3.Error as e:
+                    print(f"⚠️ AI Cache Error ({kind}): {e}")
+            return value
+        return wrapper
+    return decorator
@@ -0,0 +1,226 @@
+"""Shared plumbing for the Gemini lookups used by app.py.
+
+One process-wide AIClient owns the model object, a token-bucket rate limiter, a cap on
+in-flight requests and exponential backoff when the quota is exhausted. The backend is
+pluggable: set AQI_AI_BACKEND=stub to run against canned local responses offline.
+"""
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+
+# --- CONFIG ---
+MODEL_NAME = "gemini-2.0-flash"
+AI_TIMEOUT_SECONDS = 20      # Per-request budget; a slower call degrades to "Data Unavailable"
+MAX_PARALLEL_REQUESTS = 8
+AI_BACKEND = os.environ.get("AQI_AI_BACKEND", "gemini")
+REQUESTS_PER_SECOND = float(os.environ.get("AQI_AI_RPS", 4))
+BURST = int(os.environ.get("AQI_AI_BURST", 8))
+MAX_IN_FLIGHT = int(os.environ.get("AQI_AI_MAX_IN_FLIGHT", 4))
+MAX_RETRIES = 4
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_CAP_SECONDS = 16.0
+
+# Error class names the Google client raises when the quota or service is saturated
+RETRYABLE_ERRORS = {"ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "DeadlineExceeded"}
+
+# One structured response carries the suburb comparisons and every holding-cost estimate
+ESTIMATE_FIELDS = (
+    "market_yield", "median_price",
+    "stamp_duty", "legal_fees", "building_pest", "monthly_rent", "vacancy_pct",
+    "mgt_fee_m", "strata_m", "insurance_m", "rates_m", "maint_m", "water_m", "other_m",
+    "div_43", "div_40", "expected_annual_growth",
+)
+ESTIMATES_SCHEMA = {
+    "type": "object",
+    "properties": {name: {"type": "number"} for name in ESTIMATE_FIELDS},
+    "required": list(ESTIMATE_FIELDS),
+}
+
+_executor = ThreadPoolExecutor(max_workers=MAX_PARALLEL_REQUESTS, thread_name_prefix="ai-fetch")
+
+
+def fetch_concurrently(calls, timeout=AI_TIMEOUT_SECONDS):
+    """Runs independent AI lookups in parallel and returns {name: result}.
+
+    calls maps a name to (fn, args) or (fn, args, timeout). Each call gets its own
+    deadline measured from submission, so the total wait is bounded by the slowest
+    single timeout rather than the sum. A call that errors or misses its deadline is
+    cancelled (or abandoned if already running) and reported as None.
+    """
+    started = time.monotonic()
+    futures = {}
+    for name, spec in calls.items():
+        fn, args = spec[0], spec[1]
+        limit = spec[2] if len(spec) > 2 else timeout
+        futures[name] = (_executor.submit(fn, *args), limit)
+
+    results = {}
+    for name, (future, limit) in futures.items():
+        remaining = max(0.0, started + limit - time.monotonic())
+        try:
+            results[name] = future.result(timeout=remaining)
+        except FuturesTimeout:
+            future.cancel()
+            print(f"⚠️ AI API Timeout ({name}): no response within {limit}s")
+            results[name] = None
+        except Exception as e:
+            print(f"⚠️ AI API Error ({name}): {e}")
+            results[name] = None
+    return results
+
+
+# --- RATE LIMITING ---
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, holding at most `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, deadline=None):
+        """Blocks until a token is available; returns False if the deadline passes first."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if deadline is not None and now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+# --- BACKENDS ---
+class GeminiBackend:
+    """Talks to Gemini; configures the SDK and builds the model once per process."""
+
+    def __init__(self, api_key, model_name=MODEL_NAME):
+        import google.generativeai as genai
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(model_name)
+
+    def generate(self, prompt, response_schema=None, timeout=AI_TIMEOUT_SECONDS):
+        generation_config = None
+        if response_schema is not None:
+            generation_config = {"response_mime_type": "application/json", "response_schema": response_schema}
+        response = self.model.generate_content(
+            prompt,
+            generation_config=generation_config,
+            request_options={"timeout": timeout}
+        )
+        return response.text
+
+
+class StubBackend:
+    """Offline stand-in that returns canned answers after a fixed latency, for throughput testing."""
+
+    DEFAULTS = {
+        "market_yield": 4.5, "median_price": 650000.0,
+        "stamp_duty": 34100.0, "legal_fees": 1500.0, "building_pest": 600.0,
+        "monthly_rent": 3683.33, "vacancy_pct": 3.0, "mgt_fee_m": 276.25, "strata_m": 500.0,
+        "insurance_m": 45.0, "rates_m": 165.0, "maint_m": 185.0, "water_m": 80.0, "other_m": 50.0,
+        "div_43": 9000.0, "div_40": 8500.0, "expected_annual_growth": 5.0,
+    }
+
+    def __init__(self, latency=0.05, responder=None):
+        self.latency = latency
+        self.responder = responder
+        self.calls = 0
+
+    def generate(self, prompt, response_schema=None, timeout=AI_TIMEOUT_SECONDS):
+        self.calls += 1
+        time.sleep(min(self.latency, timeout))
+        if self.responder is not None:
+            return self.responder(prompt, response_schema)
+        if response_schema is not None:
+            return json.dumps({k: self.DEFAULTS.get(k, 0.0) for k in response_schema.get("properties", {})})
+        if "rental yield" in prompt:
+            return "4.5"
+        if "median purchase price" in prompt:
+            return "650000"
+        return "Stub response generated offline."
+
+
+# --- CLIENT ---
+def _is_retryable(error):
+    return type(error).__name__ in RETRYABLE_ERRORS or "429" in str(error)
+
+
+class AIClient:
+    """Rate-limited, concurrency-bounded wrapper around a backend with quota-aware backoff."""
+
+    def __init__(self, backend, rate=REQUESTS_PER_SECOND, burst=BURST, max_in_flight=MAX_IN_FLIGHT,
+                 max_retries=MAX_RETRIES):
+        self.backend = backend
+        self.bucket = TokenBucket(rate, burst)
+        self.slots = threading.BoundedSemaphore(max_in_flight)
+        self.max_retries = max_retries
+        self.stats = {"requests": 0, "retries": 0, "throttled": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, name):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def generate(self, prompt, response_schema=None, timeout=AI_TIMEOUT_SECONDS):
+        """Returns the response text, retrying quota errors with jittered exponential backoff.
+
+        Everything (queueing for a token, waiting for a slot, backoff sleeps) shares one
+        deadline, so a call never outlives its timeout. Raises TimeoutError on expiry.
+        """
+        deadline = time.monotonic() + timeout
+        for attempt in range(self.max_retries + 1):
+            if not self.bucket.acquire(deadline):
+                self._count("throttled")
+                raise TimeoutError("rate limit wait exceeded the request timeout")
+            if not self.slots.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                raise TimeoutError("no free request slot before the timeout")
+            try:
+                self._count("requests")
+                return self.backend.generate(prompt, response_schema, timeout=max(0.1, deadline - time.monotonic()))
+            except Exception as e:
+                if not _is_retryable(e) or attempt == self.max_retries:
+                    raise
+                delay = min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt) * random.uniform(0.5, 1.0)
+                if time.monotonic() + delay > deadline:
+                    raise
+                self._count("retries")
+            finally:
+                self.slots.release()
+            time.sleep(delay)
+
+
+_client = None
+_client_key = None
+_client_lock = threading.Lock()
+
+
+def get_client(api_key=None):
+    """Returns the process-wide AIClient, building it on first use (or when the key changes)."""
+    global _client, _client_key
+    with _client_lock:
+        if _client is None or (AI_BACKEND != "stub" and api_key != _client_key):
+            backend = StubBackend() if AI_BACKEND == "stub" else GeminiBackend(api_key)
+            _client, _client_key = AIClient(backend), api_key
+        return _client
+
+
+if __name__ == "__main__":
+    # Offline throughput check: python ai_client.py [requests]
+    import sys
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    client = AIClient(StubBackend(latency=0.05))
+    started = time.monotonic()
+    results = fetch_concurrently({i: (client.generate, ("Estimate the rental yield",), 120) for i in range(n)})
+    elapsed = time.monotonic() - started
+    ok = sum(r is not None for r in results.values())
+    print(f"{ok}/{n} requests in {elapsed:.2f}s ({ok / elapsed:.1f} req/s, limit {REQUESTS_PER_SECOND}/s burst {BURST}) stats={client.stats}")
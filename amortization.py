@@ -0,0 +1,165 @@
+"""Month-by-month loan amortization, with an optional interest-only period.
+
+Balances come from the closed-form annuity formula rather than a month loop, so a
+whole schedule (or a batch of loans) is a handful of NumPy array operations.
+Rates are annual fractions; terms and IO periods are in years. During the IO period
+the balance is flat; afterwards the loan reverts to P&I over the remaining term, as
+with the "IO (5yr)" loans in homeloan.py's Loan Manager sheet.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+
+def _pmt(rate, nper, pv):
+    # Same closed form as engine.pmt_array, kept local so engine can import this module
+    with np.errstate(divide="ignore", invalid="ignore"):
+        factor = (1 + rate) ** nper
+        return np.where(rate == 0, np.where(nper > 0, pv / np.maximum(nper, 1), 0.0), pv * rate * factor / (factor - 1))
+
+
+def balance_after(principal, annual_rate, term_years, io_years, months):
+    """Closing balance after `months` repayments (all arguments broadcast)."""
+    p = np.asarray(principal, dtype=float)
+    r = np.asarray(annual_rate, dtype=float) / 12
+    term_months = np.asarray(term_years, dtype=float) * 12
+    io_months = np.minimum(np.asarray(io_years, dtype=float) * 12, term_months)
+    pi_months = term_months - io_months
+    months = np.asarray(months, dtype=float)
+    k = np.clip(months - io_months, 0, pi_months)
+    payment = _pmt(r, np.maximum(pi_months, 1), p)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth = (1 + r) ** k
+        amortized = np.where(r == 0, p - payment * k, p * growth - payment * (growth - 1) / np.where(r == 0, 1, r))
+    # An IO loan that runs to the end of its term is repaid as a balloon in the final month
+    return np.where(months >= term_months, 0.0, np.maximum(amortized, 0.0))
+
+
+def _year_totals_scalar(p, annual_rate, term_years, io_years, year):
+    # Pure-Python twin of the array path below: single loans skip NumPy dispatch entirely
+    r = annual_rate / 12
+    term_months = term_years * 12
+    io_months = min(io_years * 12, term_months)
+    pi_months = term_months - io_months
+    if r == 0:
+        payment = p / max(pi_months, 1)
+    else:
+        factor = (1 + r) ** max(pi_months, 1)
+        payment = p * r * factor / (factor - 1)
+
+    def balance(months):
+        if months >= term_months:
+            return 0.0
+        k = min(max(months - io_months, 0), pi_months)
+        if r == 0:
+            return max(p - payment * k, 0.0)
+        growth = (1 + r) ** k
+        return max(p * growth - payment * (growth - 1) / r, 0.0)
+
+    start = (year - 1) * 12
+    opening, closing = balance(start), balance(start + 12)
+    io_in_year = min(max(io_months - start, 0), 12)
+    pi_in_year = min(max(min(term_months, start + 12) - max(io_months, start), 0), 12)
+    interest = opening * r * io_in_year + (payment * pi_in_year - (opening - closing) if pi_in_year > 0 else 0.0)
+    return interest, interest + (opening - closing), closing
+
+
+def year_totals(principal, annual_rate, term_years, io_years, year):
+    """(interest, repayments, closing balance) for loan year `year` (1-based), vectorized."""
+    if all(isinstance(a, (int, float)) for a in (principal, annual_rate, term_years, io_years, year)):
+        return _year_totals_scalar(principal, annual_rate, term_years, io_years, year)
+    r = np.asarray(annual_rate, dtype=float) / 12
+    term_months = np.asarray(term_years, dtype=float) * 12
+    io_months = np.minimum(np.asarray(io_years, dtype=float) * 12, term_months)
+    start = (np.asarray(year, dtype=float) - 1) * 12
+    opening = balance_after(principal, annual_rate, term_years, io_years, start)
+    closing = balance_after(principal, annual_rate, term_years, io_years, start + 12)
+    io_in_year = np.clip(io_months - start, 0, 12)
+    pi_in_year = np.clip(np.minimum(term_months, start + 12) - np.maximum(io_months, start), 0, 12)
+    payment = _pmt(r, np.maximum(term_months - io_months, 1), np.asarray(principal, dtype=float))
+    # The balance is flat through the IO months; P&I interest is whatever the payments did not repay
+    interest = opening * r * io_in_year + np.where(pi_in_year > 0, payment * pi_in_year - (opening - closing), 0.0)
+    repayments = interest + (opening - closing)
+    return interest, repayments, closing
+
+
+def repriced_years(principal, annual_rates, term_years, io_years):
+    """(interest, repayments, closing balance) per year for a variable-rate loan; arrays are (years, paths).
+
+    Each year reprices the loan as a fresh one on the opening balance over the months left at
+    annual_rates[y] (year_totals(..., year=1) of that loan). Every year's figures are a fixed
+    multiple of its opening balance, so the balances are one cumulative product over the years
+    rather than a loop. Rates must be positive.
+    """
+    r = np.asarray(annual_rates, dtype=float) / 12
+    y = np.arange(len(r))
+    term_months = np.maximum(term_years - y, 0) * 12
+    io_months = np.minimum(np.maximum(io_years - y, 0) * 12, term_months)
+    pi_months = term_months - io_months
+    io_in_year = np.minimum(io_months, 12)
+    pi_in_year = np.clip(np.minimum(term_months, 12) - io_months, 0, 12)
+    k = np.clip(12 - io_months, 0, pi_months)
+    column = (-1,) + (1,) * (r.ndim - 1)  # per-year values broadcast across the paths
+
+    # Per dollar of opening balance; (1 + r) ** n as exp(n * log1p(r)) shares one log per element,
+    # and the payment is r * q with q = factor / (factor - 1). Conditions that depend only on the
+    # year (final year, IO months, no P&I months) are applied to whole rows.
+    log_growth = np.log1p(r)
+    q = np.exp(np.maximum(pi_months, 1).reshape(column) * log_growth)
+    q /= q - 1
+    growth = np.exp(k.reshape(column) * log_growth)
+    closing = growth - 1
+    closing *= q
+    np.subtract(growth, closing, out=closing)
+    np.maximum(closing, 0.0, out=closing)
+    closing[term_months <= 12] = 0.0
+    interest = r * q
+    interest *= pi_in_year.reshape(column)
+    interest += closing
+    interest -= 1
+    interest[pi_in_year == 0] = 0.0
+    io = io_in_year > 0
+    interest[io] += r[io] * io_in_year[io].reshape(column)
+    repaid = interest + 1
+    repaid -= closing
+    repaid[term_months == 0] = 0.0
+
+    balance = np.asarray(principal, dtype=float) * np.cumprod(closing, axis=0)
+    opening = np.concatenate([np.broadcast_to(np.asarray(principal, dtype=float), balance.shape[1:])[None], balance[:-1]])
+    return opening * interest, opening * repaid, balance
+
+
+@dataclass
+class AmortizationSchedule:
+    """Monthly arrays (last axis = month 1..term) for one loan or a batch of loans."""
+    balance: np.ndarray     # Closing balance
+    interest: np.ndarray
+    principal: np.ndarray
+    payment: np.ndarray
+
+    def annual(self, name):
+        """Sums a monthly series into loan years (balance: year-end value)."""
+        series = getattr(self, name)
+        yearly = series.reshape(series.shape[:-1] + (-1, 12))
+        return yearly[..., -1] if name == "balance" else yearly.sum(axis=-1)
+
+
+def schedule(principal, annual_rate, term_years, io_years=0):
+    """Full month-by-month schedule; pass arrays to amortize many loans at once."""
+    p = np.asarray(principal, dtype=float)[..., None]
+    rate = np.asarray(annual_rate, dtype=float)[..., None]
+    term = np.asarray(term_years, dtype=float)[..., None]
+    io = np.asarray(io_years, dtype=float)[..., None]
+    n_months = int(np.max(term_years) * 12)
+    months = np.arange(n_months + 1, dtype=float)
+
+    balances = balance_after(p, rate, term, io, months)
+    opening, closing = balances[..., :-1], balances[..., 1:]
+    interest = opening * (rate / 12)
+    principal_paid = opening - closing
+    return AmortizationSchedule(
+        balance=closing,
+        interest=interest,
+        principal=principal_paid,
+        payment=interest + principal_paid,
+    )
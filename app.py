@@ -1,40 +1,19 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import numpy_financial as npf
-from fpdf import FPDF
-import matplotlib.pyplot as plt
-import matplotlib.ticker as ticker
-import io
-import os
 import json
-from datetime import datetime
-import google.generativeai as genai
-
-# --- DEFAULT LIVING EXPENSES (Extracted from CSV) ---
-DEFAULT_LIVING_EXPENSES_DATA = [
-    {"Category": "Transport & Vehicle", "Item": "Vehicle registration", "Monthly Amount ($)": 125.0},
-    {"Category": "Transport & Vehicle", "Item": "Vehicle maintenance", "Monthly Amount ($)": 25.0},
-    {"Category": "Transport & Vehicle", "Item": "Vehicle insurance", "Monthly Amount ($)": 100.0},
-    {"Category": "Transport & Vehicle", "Item": "Petrol", "Monthly Amount ($)": 100.0},
-    {"Category": "Transport & Vehicle", "Item": "Public Transport", "Monthly Amount ($)": 21.67},
-    {"Category": "Property Expenses", "Item": "Council Rates", "Monthly Amount ($)": 169.67},
-    {"Category": "Property Expenses", "Item": "Home and contents insurances", "Monthly Amount ($)": 150.0},
-    {"Category": "Services and Utilities", "Item": "Electricity", "Monthly Amount ($)": 250.0},
-    {"Category": "Services and Utilities", "Item": "Gas", "Monthly Amount ($)": 83.33},
-    {"Category": "Services and Utilities", "Item": "Water", "Monthly Amount ($)": 183.33},
-    {"Category": "Services and Utilities", "Item": "Mobile telephone", "Monthly Amount ($)": 165.0},
-    {"Category": "Services and Utilities", "Item": "Internet", "Monthly Amount ($)": 120.0},
-    {"Category": "Food and Groceries", "Item": "Groceries", "Monthly Amount ($)": 866.67},
-    {"Category": "Food and Groceries", "Item": "Restaurants", "Monthly Amount ($)": 433.33},
-    {"Category": "Food and Groceries", "Item": "Takeaway food", "Monthly Amount ($)": 216.67},
-    {"Category": "Recreation and Entertainment", "Item": "Subscription services (Pay TV, Music)", "Monthly Amount ($)": 160.0},
-    {"Category": "Child Expenses", "Item": "Private school fees", "Monthly Amount ($)": 16.67},
-    {"Category": "Child Expenses", "Item": "Medical", "Monthly Amount ($)": 50.0},
-    {"Category": "Child Expenses", "Item": "Clothing and uniforms", "Monthly Amount ($)": 16.67},
-    {"Category": "Health and Wellbeing", "Item": "Sports and gym fees", "Monthly Amount ($)": 80.0},
-    {"Category": "Other Living Expenses", "Item": "Cigarettes and Alcohol", "Monthly Amount ($)": 50.0}
-]
+from dataclasses import asdict
+from functools import partial
+from ai_cache import cached, response_cache
+from ai_client import ESTIMATES_SCHEMA, fetch_concurrently, get_client
+from history_store import HistoryStore
+from engine import PropertyInputs, evaluate
+from graph import ScenarioGraph
+from portfolio import Portfolio, household_from_scenario
+from session_model import AI_ESTIMATED_FIELDS, LivingExpenses, ScenarioForm
+from simulation import PERCENTILES, SimulationSettings, simulate
+from sensitivity import SensitivityCache, tornado
+from tax import DEFAULT_TAX_YEAR, MEDICARE_LEVY, marginal_rate
 
 # --- PAGE SETUP ---
 st.set_page_config(page_title="Property Insights and Analysis", layout="wide")
@@ -42,148 +21,54 @@ st.title("🏙️ AQI Property Intelligence")
 st.markdown("---")
 
 # --- LOCAL DATABASE CONFIG ---
-HISTORY_FILE = "property_history.csv"
+@st.cache_resource
+def get_history_store():
+    """One SQLite history store per process; imports any legacy property_history.csv on first use."""
+    store = HistoryStore()
+    store.migrate_csv()
+    return store
 
 def save_to_history(name, url, params):
-    """Saves property search and ALL parameters to local CSV."""
-    if not url or url.strip() == "":
-        url = "No Link Provided"
-        
-    entry_data = {
-        "Date of PDF": [datetime.now().strftime("%Y-%m-%d %H:%M:%S")],
-        "Property Name": [name],
-        "Listing URL": [url],
-        "Favorite": [False]
-    }
-    
-    # Flatten params into the dictionary
-    for key, value in params.items():
-        entry_data[key] = [value]
-
-    new_entry = pd.DataFrame(entry_data)
-    
-    if os.path.exists(HISTORY_FILE):
-        try:
-            history_df = pd.read_csv(HISTORY_FILE)
-            # CRITICAL FIX: Explicitly drop the old version of this property so the new one saves
-            history_df = history_df[~((history_df["Property Name"] == name) & (history_df["Listing URL"] == url))]
-            history_df = pd.concat([history_df, new_entry], ignore_index=True)
-        except pd.errors.EmptyDataError:
-            history_df = new_entry
-    else:
-        history_df = new_entry
-        
-    history_df.to_csv(HISTORY_FILE, index=False)
+    """Saves property search and ALL parameters to the local history database (upsert on name + URL)."""
+    # Expenses are serialized only here, from the table as it is now (it can rerun on its own after params were built)
+    params = dict(params, living_expenses_json=st.session_state.form.expenses.to_json())
+    get_history_store().save(name, url, params)
 
 # --- 1. SESSION STATE (FIXED FOR RAW INPUTS & EQUITY LOAN) ---
-if "form_data" not in st.session_state:
-    st.session_state.form_data = {
-        "prop_name": "2 Example Street MELBOURNE",
-        "prop_url": "https://www.realestate.com.au/",
-        "price": 650000.0,
-        "beds": 2, "baths": 1, "cars": 1,
-        "s1_input": 3811.78, "s1_freq": "Fortnightly",  
-        "s2_input": 8429.83, "s2_freq": "Monthly",      
-        "split": 50,
-        "growth": 4.0, "hold": 10,
-        "living_expenses_json": json.dumps(DEFAULT_LIVING_EXPENSES_DATA),
-        "ext_mortgage": 2921.0, "ext_car_loan": 0.0, "ext_cc": 0.0, "ext_other": 0.0,
-        "use_eq": True, "eq_amount": 170000.0, "eq_rate": 6.20,
-        # NEW AI-DRIVEN DEFAULTS:
-        "stamp_duty": 34100.0, "legal_fees": 1500.0, "building_pest": 600.0,
-        "loan_setup": 500.0, "buyers_agent": 5000.0, "other_entry": 1000.0,
-        "monthly_rent": 3683.33, "vacancy_pct": 5.0, "mgt_fee_m": 276.25,
-        "strata_m": 500.0, "insurance_m": 45.0, "rates_m": 165.0,
-        "maint_m": 150.0, "water_m": 80.0, "other_m": 25.0,
-        "div_43": 9000.0, "div_40": 8500.0,
-        "is_ai_estimated": False  # <-- NEW FLAG TO TRACK AI USAGE
-    }
-    
+# Keyed widgets and the ScenarioForm field each one starts from
+WIDGET_KEYS = {
+    "sb_prop_name": "prop_name", "sb_prop_url": "prop_url", "sb_price": "price",
+    "sb_beds": "beds", "sb_baths": "baths", "sb_cars": "cars",
+    "salary_input_1": "s1_input", "s1_freq_selector": "s1_freq",
+    "salary_input_2": "s2_input", "s2_freq_selector": "s2_freq",
+    "sb_ext_mortgage": "ext_mortgage", "sb_ext_car_loan": "ext_car_loan", "sb_ext_cc": "ext_cc", "sb_ext_other": "ext_other",
+}
+
+def sync_widget_keys(form):
+    for key, name in WIDGET_KEYS.items():
+        st.session_state[key] = getattr(form, name)
+
+if "form" not in st.session_state:
+    st.session_state.form = ScenarioForm()
     # PRE-LOAD WIDGET KEYS TO PREVENT STREAMLIT WARNINGS
-    st.session_state.sb_prop_name = "2 Example Street MELBOURNE"
-    st.session_state.sb_prop_url = "https://www.realestate.com.au/"
-    st.session_state.sb_price = 650000.0
-    st.session_state.sb_beds = 2
-    st.session_state.sb_baths = 1
-    st.session_state.sb_cars = 1
-    st.session_state.salary_input_1 = 3811.78
-    st.session_state.s1_freq_selector = "Fortnightly"
-    st.session_state.salary_input_2 = 8429.83
-    st.session_state.s2_freq_selector = "Monthly"
-    st.session_state.sb_ext_mortgage = 2921.0
-    st.session_state.sb_ext_car_loan = 0.0
-    st.session_state.sb_ext_cc = 0.0
-    st.session_state.sb_ext_other = 0.0
+    sync_widget_keys(st.session_state.form)
 
 # --- 2. LOAD PROPERTY FUNCTION (CALLBACK VERSION) ---
 def load_property(row):
-    st.session_state.form_data = {
-        "prop_name": row["Property Name"],
-        "prop_url": row["Listing URL"],
-        "price": float(row["purchase_price"]),
-        "beds": int(row["beds"]), "baths": int(row["baths"]), "cars": int(row["cars"]),
-        "s1_input": float(row.get("s1_input", 3811.78)),
-        "s1_freq": row.get("s1_freq", "Fortnightly"),
-        "s2_input": float(row.get("s2_input", 8429.83)),
-        "s2_freq": row.get("s2_freq", "Monthly"),
-        "split": int(row.get("ownership_split", 0.5) * 100),
-        "growth": float(row.get("growth_rate", 0.04) * 100),
-        "hold": int(row.get("holding_period", 10)),
-        "living_expenses_json": row.get("living_expenses_json", json.dumps(DEFAULT_LIVING_EXPENSES_DATA)),
-        "ext_mortgage": float(row.get("ext_mortgage", 2921.0)),
-        "ext_car_loan": float(row.get("ext_car_loan", 0.0)),
-        "ext_cc": float(row.get("ext_cc", 0.0)),
-        "ext_other": float(row.get("ext_other", 0.0)),
-        "use_eq": bool(row.get("use_eq", True)),
-        "eq_amount": float(row.get("eq_amount", 170000.0)),
-        "eq_rate": float(row.get("eq_rate", 6.20)),
-        
-        # NEW AI-DRIVEN FIELDS WITH FALLBACKS:
-        "stamp_duty": float(row.get("stamp_duty", 34100.0)),
-        "legal_fees": float(row.get("legal_fees", 1500.0)),
-        "building_pest": float(row.get("building_pest", 600.0)),
-        "loan_setup": float(row.get("loan_setup", 500.0)),
-        "buyers_agent": float(row.get("buyers_agent", 5000.0)),
-        "other_entry": float(row.get("other_entry", 1000.0)),
-        "monthly_rent": float(row.get("monthly_rent", 3683.33)),
-        "vacancy_pct": float(row.get("vacancy_pct", 5.0)),
-        "mgt_fee_m": float(row.get("mgt_fee_m", 276.25)),
-        "strata_m": float(row.get("strata_m", 500.0)),
-        "insurance_m": float(row.get("insurance_m", 45.0)),
-        "rates_m": float(row.get("rates_m", 165.0)),
-        "maint_m": float(row.get("maint_m", 150.0)),
-        "water_m": float(row.get("water_m", 80.0)),
-        "other_m": float(row.get("other_m", 25.0)),
-        "div_43": float(row.get("div_43", 9000.0)),
-        "div_40": float(row.get("div_40", 8500.0))
-    }
-
-    st.session_state.sb_prop_name = st.session_state.form_data["prop_name"]
-    st.session_state.sb_prop_url = st.session_state.form_data["prop_url"]
-    st.session_state.sb_price = st.session_state.form_data["price"]
-    st.session_state.sb_beds = st.session_state.form_data["beds"]
-    st.session_state.sb_baths = st.session_state.form_data["baths"]
-    st.session_state.sb_cars = st.session_state.form_data["cars"]
-    st.session_state.salary_input_1 = st.session_state.form_data["s1_input"]
-    st.session_state.s1_freq_selector = st.session_state.form_data["s1_freq"]
-    st.session_state.salary_input_2 = st.session_state.form_data["s2_input"]
-    st.session_state.s2_freq_selector = st.session_state.form_data["s2_freq"]
-    st.session_state.sb_ext_mortgage = st.session_state.form_data["ext_mortgage"]
-    st.session_state.sb_ext_car_loan = st.session_state.form_data["ext_car_loan"]
-    st.session_state.sb_ext_cc = st.session_state.form_data["ext_cc"]
-    st.session_state.sb_ext_other = st.session_state.form_data["ext_other"]
+    # Older history rows lack fields added later; ScenarioForm falls back to defaults for those
+    st.session_state.form = ScenarioForm.from_history(row)
+    sync_widget_keys(st.session_state.form)
+
+form = st.session_state.form
 
 # --- GEMINI AI YIELD ESTIMATOR ---
 @st.cache_data(ttl=3600, show_spinner=False)
+@cached("market_yield")
 def fetch_market_yield(address, beds, baths, cars):
     """Fetches estimated market yield from Gemini based on location and specs."""
     try:
-        # Load API key from Streamlit secrets
-        api_key = st.secrets["GEMINI_API_KEY"]
-        genai.configure(api_key=api_key)
-        
-        # Use flash for faster responses
-        model = genai.GenerativeModel('gemini-2.0-flash') 
+        # Shared, rate-limited client (API key from Streamlit secrets)
+        client = get_client(st.secrets["GEMINI_API_KEY"])
         
         prompt = (
             f"Estimate the average gross rental yield percentage for a {beds} bedroom, "
@@ -192,10 +77,10 @@ def fetch_market_yield(address, beds, baths, cars):
             "Do not include the % sign or any other text. If exact data is unavailable, provide your best realistic estimate."
         )
         
-        response = model.generate_content(prompt)
+        response_text = client.generate(prompt)
         
         # Clean the output to ensure it's a float
-        clean_val = response.text.strip().replace('%', '').replace(',', '.')
+        clean_val = response_text.strip().replace('%', '').replace(',', '.')
         return float(clean_val)
     except Exception as e:
         # Fails gracefully if API is down, key is missing, or parsing fails
@@ -203,14 +88,11 @@ def fetch_market_yield(address, beds, baths, cars):
 
 # --- NEW: AI MEDIAN PRICE ESTIMATOR ---
 @st.cache_data(ttl=3600, show_spinner=False)
+@cached("median_price")
 def fetch_median_price(address, beds, baths, cars):
     """Fetches estimated median purchase price from Gemini based on location and specs."""
     try:
-        api_key = st.secrets["GEMINI_API_KEY"]
-        genai.configure(api_key=api_key)
-        
-        # Using flash model as per preferred settings
-        model = genai.GenerativeModel('gemini-2.0-flash') 
+        client = get_client(st.secrets["GEMINI_API_KEY"])
         
         prompt = (
             f"Estimate the median purchase price in AUD for a {beds} bedroom, "
@@ -219,22 +101,25 @@ def fetch_median_price(address, beds, baths, cars):
             "Do not include the $ sign, commas, or any other text. If exact data is unavailable, provide your best realistic estimate."
         )
         
-        response = model.generate_content(prompt)
+        response_text = client.generate(prompt)
         
         # Clean the output to ensure it's a float
-        clean_val = response.text.strip().replace('$', '').replace(',', '')
+        clean_val = response_text.strip().replace('$', '').replace(',', '')
         return float(clean_val)
     except Exception as e:
         print(f"⚠️ AI API Error (Price Estimate): {e}")
         return None
 
 @st.cache_data(ttl=3600, show_spinner=False)
+@cached("estimates")
 def fetch_comprehensive_estimates(address, price, beds, baths, cars):
-    """Fetches comprehensive property estimates returned as a JSON object."""
+    """Fetches yield, median price and all holding-cost estimates in ONE schema-constrained call.
+
+    The suburb yield and median price are also written into the fetch_market_yield and
+    fetch_median_price caches, so those lookups are free once this has run.
+    """
     try:
-        api_key = st.secrets["GEMINI_API_KEY"]
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-2.0-flash') 
+        client = get_client(st.secrets["GEMINI_API_KEY"])
         
         # ### UPDATED PROMPT: Specific to Investment Property & VIC Compliance
         prompt = f"""
@@ -245,9 +130,12 @@ def fetch_comprehensive_estimates(address, price, beds, baths, cars):
         1. This is an INVESTMENT property. The owner pays for fixed water charges, land tax, and council rates.
         2. Include VIC Mandatory Safety Checks: Annualize the $600 biennial Gas/Elec safety check and $120 annual smoke alarm service (~$35/month total).
         3. If the property is in Melbourne, include a realistic Land Tax estimate for an investment (threshold $50k).
+        4. 'market_yield' is the average gross rental yield percentage (e.g. 4.5) and 'median_price' the median purchase price in AUD (e.g. 650000) for comparable {beds} bed, {baths} bath, {cars} car properties in or around '{address}'.
         
-        Return ONLY a valid JSON object with the following exact keys and numerical values:
+        Return ONLY a JSON object with these keys and numerical values, for example:
         {{
+            "market_yield": 4.5,
+            "median_price": 650000.0,
             "stamp_duty": 34100.0,
             "legal_fees": 1500.0,
             "building_pest": 600.0,
@@ -267,34 +155,36 @@ def fetch_comprehensive_estimates(address, price, beds, baths, cars):
         Note: Ensure 'maint_m' includes the VIC compliance safety check buffer (~$35/mo).
         """
         
-        response = model.generate_content(
-            prompt,
-            generation_config={"response_mime_type": "application/json"}
-        )
-        
-        return json.loads(response.text)
+        estimates = json.loads(client.generate(prompt, response_schema=ESTIMATES_SCHEMA))
     except Exception as e:
         print(f"⚠️ AI API Error: {e}")
         return None
 
+    # Fill the individual caches from this one response
+    specs = {"address": address, "beds": beds, "baths": baths, "cars": cars}
+    try:
+        if estimates.get("market_yield"):
+            response_cache.prime("market_yield", specs, float(estimates["market_yield"]))
+        if estimates.get("median_price"):
+            response_cache.prime("median_price", specs, float(estimates["median_price"]))
+    except Exception as e:
+        print(f"⚠️ AI Cache Error: {e}")
+    return estimates
+
 # --- NEW: AI TAX STRATEGY SUMMARY ---
 @st.cache_data(ttl=3600, show_spinner=False)
-def fetch_tax_strategy_summary(address, gross_1, gross_2, split, net_tax_loss, pre_tax_cashflow, total_tax_variance):
+@cached("tax_strategy")
+def fetch_tax_strategy_summary(address, gross_1, gross_2, split, net_tax_loss, pre_tax_cashflow, total_tax_variance, fy=DEFAULT_TAX_YEAR):
     """Fetches a strategic tax summary for the PDF report using Gemini."""
     try:
-        api_key = st.secrets["GEMINI_API_KEY"]
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-2.0-flash')
+        client = get_client(st.secrets["GEMINI_API_KEY"])
 
         high_earner = "Investor 1" if gross_1 > gross_2 else "Investor 2"
         high_gross = max(gross_1, gross_2)
         
-        # Calculate dynamic tax bracket based on current stage 3 cuts
-        if high_gross > 190000: marginal_rate = 45
-        elif high_gross > 135000: marginal_rate = 37
-        elif high_gross > 45000: marginal_rate = 30
-        elif high_gross > 18200: marginal_rate = 16
-        else: marginal_rate = 0
+        # Marginal bracket and Medicare levy from the same schedule the engine uses
+        top_marginal_rate = round(marginal_rate(high_gross, fy) * 100)
+        medicare_pct = MEDICARE_LEVY[fy][0] * 100
         
         # Calculate Tax Savings Efficiency
         out_of_pocket = abs(pre_tax_cashflow) if pre_tax_cashflow < 0 else 0
@@ -317,42 +207,89 @@ def fetch_tax_strategy_summary(address, gross_1, gross_2, split, net_tax_loss, p
 
         Instructions:
         1. Performance Expansion: Analyze the Pre-Tax vs. Post-Tax Cash Flow using ONLY the exact Pre-Tax Cash Flow and Total Tax Refund numbers provided above. Explain how the 'paper loss' converts a negative position into a stronger net position. Mention the calculated Tax Savings Efficiency.
-        2. High-Income Earner Strategy: Focus on {high_earner} earning ${high_gross:,.0f}. Detail how the property loss offsets their income at their specific {marginal_rate}% marginal tax rate. Mention the additional 2% Medicare Levy saving. Explain why the split maximizes 'Tax Arbitrage'.
+        2. High-Income Earner Strategy: Focus on {high_earner} earning ${high_gross:,.0f}. Detail how the property loss offsets their income at their specific {top_marginal_rate}% marginal tax rate. Mention the additional {medicare_pct:g}% Medicare Levy saving. Explain why the split maximizes 'Tax Arbitrage'.
         3. Tone & Format: Professional financial language. Return ONLY plain text separated by double line breaks for new paragraphs. Do NOT use markdown bolding (**), hash symbols (#), or bullet points, as this will crash the PDF compiler.
         """
         
-        response = model.generate_content(prompt)
-        return response.text.strip()
+        response_text = client.generate(prompt)
+        return response_text.strip()
     except Exception as e:
         print(f"⚠️ AI API Error (Tax Strategy): {e}")
         return None
 
 
-# --- GLOBAL TAX CALCULATORS ---
-def calculate_tax(gross_income):
-    """Calculates standard Australian income tax (excluding Medicare levy)."""
-    if gross_income <= 18200: return 0
-    elif gross_income <= 45000: return (gross_income - 18200) * 0.16
-    elif gross_income <= 135000: return 4288 + (gross_income - 45000) * 0.30
-    elif gross_income <= 190000: return 31288 + (gross_income - 135000) * 0.37
-    else: return 51638 + (gross_income - 190000) * 0.45
-
-def calculate_gross_from_net(net_income):
-    """Mathematically reverse-engineers the tax brackets to find Gross Pay from Take-Home Pay."""
-    if net_income <= 18200: 
-        return net_income
-    elif net_income <= 40712: # Max net for $45k bracket
-        return (net_income - 2912) / 0.84
-    elif net_income <= 103712: # Max net for $135k bracket
-        return (net_income - 9212) / 0.70
-    elif net_income <= 138362: # Max net for $190k bracket
-        return (net_income - 18662) / 0.63
-    else: # Highest bracket
-        return (net_income - 33862) / 0.55
+# --- MONTE CARLO SIMULATION ---
+@st.cache_data(ttl=3600, max_entries=16, show_spinner="Simulating market paths...")
+def run_simulation(sim_key, _scenario, _settings):
+    """Cached simulation bands keyed on sim_key; the underscored args are covered by the key."""
+    return simulate(_scenario, _settings)
+
+
+def percentile_frame(years, bands):
+    """Percentile bands as a chart-ready DataFrame indexed by year."""
+    labels = {5: "5th Percentile", 25: "25th Percentile", 50: "Median", 75: "75th Percentile", 95: "95th Percentile"}
+    return pd.DataFrame({labels[p]: bands[p] for p in PERCENTILES}, index=pd.Index(years, name="Year"))
+
+
+# --- SENSITIVITY ANALYSIS ---
+SENSITIVITY_LABELS = {
+    "interest_rate": "Interest Rate (%)",
+    "growth_rate": "Capital Growth (%)",
+    "lvr": "LVR (%)",
+    "vacancy_pct": "Vacancy Rate (%)",
+}
+SENSITIVITY_METRICS = {
+    "post_tax_cashflow": "Annual Post-Tax Cash Flow",
+    "monthly_surplus": "Monthly Household Surplus",
+    "net_profit_on_sale": "Net Profit on Sale",
+}
+
+@st.cache_resource
+def get_sensitivity_cache():
+    """Grid cells evaluated so far, shared across reruns and sessions."""
+    return SensitivityCache()
+
+
+def sensitivity_heatmap(grid, x_values, y_values, x_label, y_label, title):
+    """Heatmap of a 2D metric grid (rows follow y_values); red is negative, green positive."""
+    # matplotlib is only loaded once a sensitivity chart is drawn, not on every cold start
+    from matplotlib import colors as mcolors, ticker
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=(6, 4.5))
+    ax = fig.add_subplot()
+    lo, hi = float(np.min(grid)), float(np.max(grid))
+    norm = mcolors.TwoSlopeNorm(vmin=lo, vcenter=0, vmax=hi) if lo < 0 < hi else None
+    mesh = ax.pcolormesh(x_values, y_values, grid, cmap="RdYlGn", norm=norm, shading="nearest")
+    cbar = fig.colorbar(mesh, ax=ax)
+    cbar.ax.yaxis.set_major_formatter(ticker.FuncFormatter(lambda v, pos: f'${v:,.0f}'))
+    ax.set_xlabel(x_label); ax.set_ylabel(y_label)
+    ax.set_title(title, fontsize=11, fontweight='bold')
+    fig.tight_layout()
+    return fig
+
+
+def tornado_chart(rows, labels, title):
+    """Horizontal bars showing the swing from each input's low to high value around the base."""
+    from matplotlib import ticker
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=(7, 0.6 * len(rows) + 1.5))
+    ax = fig.add_subplot()
+    base = rows[0][3] if rows else 0.0
+    for pos, (name, low, high, _) in enumerate(reversed(rows)):
+        ax.barh(pos, low - base, left=base, color="#ff4b4b", alpha=0.8, label="Low" if pos == 0 else None)
+        ax.barh(pos, high - base, left=base, color="#00cc96", alpha=0.8, label="High" if pos == 0 else None)
+    ax.set_yticks(range(len(rows)), [labels[r[0]] for r in reversed(rows)])
+    ax.axvline(base, color="#003366", linewidth=1)
+    ax.xaxis.set_major_formatter(ticker.FuncFormatter(lambda v, pos: f'${v:,.0f}'))
+    ax.set_title(title, fontsize=11, fontweight='bold')
+    ax.legend(frameon=False, loc="lower right")
+    fig.tight_layout()
+    return fig
+
 
 # --- 2. CREATE TABS ---
 # Reordered to put Summary first
-tab0, tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8, tab9, tab10 = st.tabs([
+tab0, tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8, tab9, tab10, tab11, tab12 = st.tabs([
     "📊 Summary Dashboard",
     "Property & Acquisition", 
     "Income & Expenses", 
@@ -363,7 +300,9 @@ tab0, tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8, tab9, tab10 = st.tabs([
     "10-Year Projections",
     "CGT Projection",
     "Search History",
-    "Living Expenses"  # NEW TAB
+    "Living Expenses",  # NEW TAB
+    "Sensitivity Analysis",
+    "Portfolio"
 ])
 
 def update_estimated_price_callback():
@@ -416,24 +355,13 @@ col_s2_val, col_s2_freq = st.sidebar.columns([2, 1])
 s2_input = col_s2_val.number_input("Inv 2 Take-Home ($)", step=100.0, key="salary_input_2")
 s2_freq = col_s2_freq.selectbox("Freq", ["Monthly", "Fortnightly", "Annually"], key="s2_freq_selector")
 
-# --- Mapping for annualization ---
-freq_map = {"Monthly": 12, "Fortnightly": 26, "Annually": 1}
-salary_1_annual = float(s1_input * freq_map[s1_freq]) # This is NET
-salary_2_annual = float(s2_input * freq_map[s2_freq]) # This is NET
-annual_net_1 = salary_1_annual 
-annual_net_2 = salary_2_annual
-
-# NEW: Automatically reverse-calculate Gross Income from the Net Inputs
-gross_income_1 = calculate_gross_from_net(annual_net_1)
-gross_income_2 = calculate_gross_from_net(annual_net_2)
-
-ownership_split_val = st.sidebar.slider("Ownership Split (Inv 1 %)", 0, 100, st.session_state.form_data["split"])
+ownership_split_val = st.sidebar.slider("Ownership Split (Inv 1 %)", 0, 100, form.split)
 ownership_split = ownership_split_val / 100
 
 st.sidebar.subheader("Projections")
-growth_rate_val = st.sidebar.slider("Expected Annual Growth (%)", 0.0, 12.0, st.session_state.form_data["growth"], step=0.5)
+growth_rate_val = st.sidebar.slider("Expected Annual Growth (%)", 0.0, 12.0, form.growth, step=0.5)
 growth_rate = growth_rate_val / 100
-holding_period = st.sidebar.slider("Holding Period (Years)", 1, 30, st.session_state.form_data["hold"])
+holding_period = st.sidebar.slider("Holding Period (Years)", 1, 30, form.hold)
 
 # --- AI AUTO-FILL TRIGGER ---
 st.sidebar.markdown("---")
@@ -446,45 +374,21 @@ if st.sidebar.button("Auto-Estimate Fields", use_container_width=True):
         
         # CRITICAL FIX: Explicitly check that estimates is a valid dictionary
         if estimates and isinstance(estimates, dict):
-            st.session_state.form_data.update({
-                "stamp_duty": float(estimates.get("stamp_duty", 34100.0)),
-                "legal_fees": float(estimates.get("legal_fees", 1500.0)),
-                "building_pest": float(estimates.get("building_pest", 600.0)),
-                "monthly_rent": float(estimates.get("monthly_rent", 3683.33)),
-                "vacancy_pct": float(estimates.get("vacancy_pct", 5.0)),
-                "mgt_fee_m": float(estimates.get("mgt_fee_m", 276.25)),
-                "strata_m": float(estimates.get("strata_m", 500.0)),
-                "insurance_m": float(estimates.get("insurance_m", 45.0)),
-                "rates_m": float(estimates.get("rates_m", 165.0)),
-                "maint_m": float(estimates.get("maint_m", 150.0)),
-                "water_m": float(estimates.get("water_m", 80.0)),
-                "div_43": float(estimates.get("div_43", 9000.0)),
-                "div_40": float(estimates.get("div_40", 8500.0)),
-                "growth": float(estimates.get("expected_annual_growth", st.session_state.form_data["growth"])),
-                "is_ai_estimated": True
-            })
+            form.update(
+                **{name: estimates.get(name, getattr(form, name)) for name in AI_ESTIMATED_FIELDS},
+                growth=estimates.get("expected_annual_growth", form.growth),
+                is_ai_estimated=True,
+            )
+            # The same response carries the suburb median, so show it without a second call
+            if estimates.get("median_price"):
+                st.session_state.est_median_price = float(estimates["median_price"])
             st.sidebar.success("Fields updated!")
             st.rerun() 
         else:
             # Graceful failure message
             st.sidebar.error("AI failed to return valid data. Check your terminal logs for the error.")
 
-# --- PRE-CALCULATE HOUSEHOLD OBLIGATIONS FOR ALL TABS ---
-# 1. Living Expenses Calculation
-current_expenses_raw = st.session_state.form_data.get("living_expenses_json", json.dumps(DEFAULT_LIVING_EXPENSES_DATA))
-expenses_df = pd.DataFrame(json.loads(current_expenses_raw))
-total_monthly_living = expenses_df["Monthly Amount ($)"].sum()
-
-# 2. Existing Debt Calculation
-# We pull these directly from session state so they are available globally
-total_existing_debt_m = (
-    float(st.session_state.form_data.get("ext_mortgage", 2921.0)) +
-    float(st.session_state.form_data.get("ext_car_loan", 0.0)) +
-    float(st.session_state.form_data.get("ext_cc", 0.0)) +
-    float(st.session_state.form_data.get("ext_other", 0.0))
-)
-
-# --- TAB 1: ACQUISITION ---
+# --- TAB 1: ACQUISITION (INPUTS) ---
 with tab1:
     st.subheader("Initial Outlay")
     
@@ -492,113 +396,209 @@ with tab1:
         st.markdown(f"🔗 **[View Real Estate Listing]({property_url})**")
         
     col1, col2 = st.columns(2)
-    stamp_duty = col1.number_input("Stamp Duty ($)", value=float(st.session_state.form_data.get("stamp_duty", 34100.0)), step=1000.0)
-    legal_fees = col2.number_input("Legal & Conveyancing ($)", value=float(st.session_state.form_data.get("legal_fees", 1500.0)), step=100.0)
-    building_pest = col1.number_input("Building & Pest ($)", value=float(st.session_state.form_data.get("building_pest", 600.0)), step=50.0)
-    loan_setup = col2.number_input("Loan Setup Fees ($)", value=float(st.session_state.form_data.get("loan_setup", 500.0)), step=50.0)
-    buyers_agent = col1.number_input("Buyers Agent ($)", value=float(st.session_state.form_data.get("buyers_agent", 5000.0)), step=500.0)
-    other_entry = col2.number_input("Other Entry Costs ($)", value=float(st.session_state.form_data.get("other_entry", 1000.0)), step=100.0)
-    
-    total_acquisition_costs = stamp_duty + legal_fees + building_pest + loan_setup + buyers_agent + other_entry
-    total_cost_base = purchase_price + total_acquisition_costs
-    
-    st.metric("Total Acquisition Costs", f"${total_acquisition_costs:,.2f}")
-    st.metric("Total Required (Property + Costs)", f"${total_cost_base:,.2f}")
-
-# --- TAB 2: INCOME & EXPENSES ---
+    stamp_duty = col1.number_input("Stamp Duty ($)", value=form.stamp_duty, step=1000.0)
+    legal_fees = col2.number_input("Legal & Conveyancing ($)", value=form.legal_fees, step=100.0)
+    building_pest = col1.number_input("Building & Pest ($)", value=form.building_pest, step=50.0)
+    loan_setup = col2.number_input("Loan Setup Fees ($)", value=form.loan_setup, step=50.0)
+    buyers_agent = col1.number_input("Buyers Agent ($)", value=form.buyers_agent, step=500.0)
+    other_entry = col2.number_input("Other Entry Costs ($)", value=form.other_entry, step=100.0)
+
+# --- TAB 2: INCOME & EXPENSES (INPUTS) ---
 with tab2:
     st.subheader("Investment Income & Holding Expenses")
     st.info("💡 **Note:** Per Victorian law, usage (electricity/gas/water usage) is paid by the renter if separately metered. As the owner, you are responsible for the items below.")
     
     c1, c2 = st.columns(2)
     
-    monthly_rent = c1.number_input("Monthly Rent Received ($)", value=float(st.session_state.form_data.get("monthly_rent", 3683.33)), step=100.0)
-    vacancy_pct = c1.number_input("Vacancy Rate (%)", value=float(st.session_state.form_data.get("vacancy_pct", 5.0)), step=1.0)
-    
-    annual_gross_income = (monthly_rent * 12) * (1 - (vacancy_pct / 100))
+    monthly_rent = c1.number_input("Monthly Rent Received ($)", value=form.monthly_rent, step=100.0)
+    vacancy_pct = c1.number_input("Vacancy Rate (%)", value=form.vacancy_pct, step=1.0)
     
     # ### UPDATED: Descriptions reflect Investment vs Living Expenses
-    mgt_fee_m = c2.number_input("Property Management (Monthly $)", value=float(st.session_state.form_data.get("mgt_fee_m", 276.25)), step=10.0, help="Usually 5-7% + GST")
-    strata_m = c2.number_input("Strata/Body Corporate (Monthly $)", value=float(st.session_state.form_data.get("strata_m", 500.0)), step=10.0)
-    insurance_m = c2.number_input("Landlord Insurance (Monthly $)", value=float(st.session_state.form_data.get("insurance_m", 45.0)), step=5.0)
-    rates_m = c2.number_input("Investment Council Rates (Monthly $)", value=float(st.session_state.form_data.get("rates_m", 165.0)), step=10.0)
+    mgt_fee_m = c2.number_input("Property Management (Monthly $)", value=form.mgt_fee_m, step=10.0, help="Usually 5-7% + GST")
+    strata_m = c2.number_input("Strata/Body Corporate (Monthly $)", value=form.strata_m, step=10.0)
+    insurance_m = c2.number_input("Landlord Insurance (Monthly $)", value=form.insurance_m, step=5.0)
+    rates_m = c2.number_input("Investment Council Rates (Monthly $)", value=form.rates_m, step=10.0)
     
     # AI auto-estimation will prioritize putting compliance checks here
-    maint_m = c2.number_input("Maint & Compliance Buffer (Monthly $)", value=float(st.session_state.form_data.get("maint_m", 150.0)), step=10.0, help="Includes VIC Safety Checks: ~$35/mo")
+    maint_m = c2.number_input("Maint & Compliance Buffer (Monthly $)", value=form.maint_m, step=10.0, help="Includes VIC Safety Checks: ~$35/mo")
     
-    water_m = c2.number_input("Fixed Water Service (Monthly $)", value=float(st.session_state.form_data.get("water_m", 80.0)), step=5.0, help="Tenant pays usage; Owner pays service/parks.")
+    water_m = c2.number_input("Fixed Water Service (Monthly $)", value=form.water_m, step=5.0, help="Tenant pays usage; Owner pays service/parks.")
     
     # AI will use this for Land Tax estimates
-    other_m = c2.number_input("Land Tax / Other (Monthly $)", value=float(st.session_state.form_data.get("other_m", 25.0)), step=5.0)
-    
-    total_monthly_expenses = mgt_fee_m + strata_m + insurance_m + rates_m + maint_m + water_m + other_m
-    total_operating_expenses = total_monthly_expenses * 12
-    
-    st.divider()
-    metric_col1, metric_col2 = st.columns(2)
-    metric_col1.metric("Gross Annual Rental Income", f"${annual_gross_income:,.2f}")
-    metric_col2.metric("Total Annual Holding Costs", f"${total_operating_expenses:,.2f}")
-    
-    st.divider()
-    metric_col1, metric_col2 = st.columns(2)
-    metric_col1.metric("Gross Annual Income", f"${annual_gross_income:,.2f}")
-    metric_col2.metric("Total Annual Expenses", f"${total_operating_expenses:,.2f}")
+    other_m = c2.number_input("Land Tax / Other (Monthly $)", value=form.other_m, step=5.0)
 
 # --- TAB 3: LOAN DETAILS (UPDATED FOR EQUITY FUNDING) ---
 with tab3:
     st.subheader("1. Core Investment Loan (Secured by Investment)")
     
     c1, c2 = st.columns(2)
-    lvr_pct = c1.slider("LVR (%)", 0, 100, 80) / 100
-    interest_rate = c2.number_input("Interest Rate (%)", value=5.49, step=0.01) / 100
-    loan_term = c1.number_input("Loan Term (Years)", value=30, step=1)
-    loan_type = c2.selectbox("Active Repayment Type (For Cash Flow)", ["Interest Only", "Principal & Interest"])
-    
-    loan_amount = purchase_price * lvr_pct
-    monthly_io = (loan_amount * interest_rate) / 12
-    monthly_pi = abs(npf.pmt(interest_rate/12, loan_term*12, loan_amount))
-    
-    if loan_type == "Interest Only":
-        core_annual_repayment = monthly_io * 12
-    else:
-        core_annual_repayment = monthly_pi * 12
-    core_annual_interest = loan_amount * interest_rate 
+    lvr_val = c1.slider("LVR (%)", 0, 100, form.lvr)
+    interest_rate_val = c2.number_input("Interest Rate (%)", value=form.interest_rate, step=0.01)
+    loan_term = c1.number_input("Loan Term (Years)", value=form.loan_term, step=1)
+    loan_type_options = ["Interest Only", "Principal & Interest"]
+    loan_type = c2.selectbox("Active Repayment Type (For Cash Flow)", loan_type_options, index=loan_type_options.index(form.loan_type))
+    io_years = c1.number_input("Interest-Only Period (Years)", min_value=0, max_value=int(loan_term), value=min(form.io_years, int(loan_term)), step=1, disabled=loan_type != "Interest Only")
         
     st.divider()
     st.subheader("2. Deposit Funding (Equity Release Loan)")
     st.info("💡 Interest on equity loans used to fund deposits/stamp duty is tax-deductible.")
     
     # Safety check to prevent KeyErrors
-    use_equity = st.checkbox("Fund Deposit via Equity Release?", value=st.session_state.form_data.get("use_eq", True))
+    use_equity = st.checkbox("Fund Deposit via Equity Release?", value=form.use_eq)
     
     eq1, eq2 = st.columns(2)
     if use_equity:
-        eq_amount = eq1.number_input("Equity Loan Amount ($)", value=float(st.session_state.form_data.get("eq_amount", 170000.0)), step=5000.0)
-        eq_rate = eq2.number_input("Equity Loan Rate (%)", value=float(st.session_state.form_data.get("eq_rate", 6.20)), step=0.01) / 100
-        
-        # Equity loans are assumed 30-year P&I as per user notes
-        eq_monthly_pi = abs(npf.pmt(eq_rate/12, 30*12, eq_amount))
-        eq_annual_repayment = eq_monthly_pi * 12
-        eq_annual_interest = eq_amount * eq_rate
+        eq_amount = eq1.number_input("Equity Loan Amount ($)", value=form.eq_amount, step=5000.0)
+        eq_rate_val = eq2.number_input("Equity Loan Rate (%)", value=form.eq_rate, step=0.01)
     else:
-        eq_amount = 0.0; eq_rate = 0.0; eq_monthly_pi = 0.0; eq_annual_repayment = 0.0; eq_annual_interest = 0.0
+        eq_amount = 0.0; eq_rate_val = 0.0
+
+# --- TAB 5: DEPRECIATION (INPUTS) ---
+with tab5:
+    st.subheader("Tax Depreciation (Non-Cash Deductions)")
+    div_43 = st.number_input("Capital Works (Div 43) ($)", value=form.div_43, step=500.0)
+    div_40 = st.number_input("Plant & Equipment (Div 40) ($)", value=form.div_40, step=500.0)
 
-    # AGGREGATE TOTALS FOR DOWNSTREAM TABS
-    total_annual_debt_repayment = core_annual_repayment + eq_annual_repayment
-    total_tax_deductible_interest = core_annual_interest + eq_annual_interest
-    actual_cash_outlay = total_cost_base - loan_amount - eq_amount
+# --- TAB 7: PROJECTION ASSUMPTIONS (INPUTS) ---
+with tab7:
+    st.subheader("Projection Assumptions")
+    pa1, pa2, pa3 = st.columns(3)
+    rent_growth_val = pa1.number_input("Annual Rent Growth (%)", value=form.rent_growth, step=0.5)
+    expense_inflation_val = pa2.number_input("Annual Expense Inflation (%)", value=form.expense_inflation, step=0.5)
+    discount_rate_val = pa3.number_input("Discount Rate for NPV (%)", value=form.discount_rate, step=0.5)
+
+# --- TAB 8: CGT PROJECTION (INPUTS) ---
+with tab8:
+    st.subheader("Capital Gains Tax (Year 10 Sale)")
+    est_marginal_rate_val = st.number_input("Marginal Tax Rate for Sale Year (%)", value=form.cgt_marginal_rate)
 
-    # CRITICAL FIX: Re-declare legacy variables so Tab 0, Tab 6, and PDF don't crash
-    annual_interest = total_tax_deductible_interest
-    annual_repayment = total_annual_debt_repayment
+# --- TAB 10: LIVING EXPENSES & EXISTING DEBTS (INPUTS) ---
+def flag_living_expenses_edit():
+    st.session_state.living_expenses_edited = True
+
+@st.fragment
+def living_expenses_panel():
+    """Expenses table that reruns on its own; the whole app reruns only when the monthly total changes."""
+    form = st.session_state.form
+    edited_expenses = st.data_editor(
+        form.expenses.frame(),
+        num_rows="dynamic",
+        width="stretch",
+        column_config={
+            "Monthly Amount ($)": st.column_config.NumberColumn(
+                "Monthly Amount ($)",
+                min_value=0.0,
+                step=10.0,
+                format="$%.2f",
+            )
+        },
+        key="living_expenses_editor",
+        on_change=flag_living_expenses_edit,
+    )
+
+    # The table is read back only after an edit; other reruns keep the form's arrays as they are
+    if st.session_state.pop("living_expenses_edited", False):
+        previous_total = form.expenses.total()
+        form.expenses = LivingExpenses.from_frame(edited_expenses)
+        # Renamed or zero-amount rows stay inside this panel; a new total updates every figure that uses it
+        if form.expenses.total() != previous_total:
+            st.rerun()
+
+with tab10:
+    st.subheader("Household Living Expenses (Monthly)")
+    st.markdown("Modify the default values or add new rows below. Your custom expenses will be saved with this property search.")
+    living_expenses_panel()
+    total_monthly_living = form.expenses.total()
+
+    st.divider()
+    
+    # --- NEW: EXISTING DEBT COMMITMENTS ---
+    st.subheader("💳 Existing Debt Commitments (Monthly)")
+    d1, d2, d3, d4 = st.columns(4)
+
+    # Restored 'value=' parameters to keep your defaults, removed 'key=' to prevent warnings
+    ext_mortgage = d1.number_input("Existing Mortgage(s) ($)", value=form.ext_mortgage, step=100.0)
+    ext_car_loan = d2.number_input("Car Loan(s) ($)", value=form.ext_car_loan, step=50.0)
+    ext_cc = d3.number_input("Credit Card Payments ($)", value=form.ext_cc, step=50.0, help="Typically assessed at 3-4% of total limit")
+    ext_other = d4.number_input("Other Loans ($)", value=form.ext_other, step=50.0)
+    st.divider()
+
+# ==========================================================
+# --- CALCULATION ENGINE (ALL DERIVED FIGURES) ---
+# ==========================================================
+scenario = PropertyInputs(
+    purchase_price=purchase_price,
+    beds=beds, baths=baths, cars=cars,
+    s1_input=s1_input, s1_freq=s1_freq,
+    s2_input=s2_input, s2_freq=s2_freq,
+    ownership_split=ownership_split,
+    growth_rate=growth_rate,
+    holding_period=holding_period,
+    rent_growth=rent_growth_val / 100, expense_inflation=expense_inflation_val / 100, discount_rate=discount_rate_val / 100,
+    monthly_living=float(total_monthly_living),
+    ext_mortgage=ext_mortgage, ext_car_loan=ext_car_loan, ext_cc=ext_cc, ext_other=ext_other,
+    use_eq=use_equity, eq_amount=eq_amount, eq_rate=eq_rate_val,
+    stamp_duty=stamp_duty, legal_fees=legal_fees, building_pest=building_pest,
+    loan_setup=loan_setup, buyers_agent=buyers_agent, other_entry=other_entry,
+    monthly_rent=monthly_rent, vacancy_pct=vacancy_pct,
+    mgt_fee_m=mgt_fee_m, strata_m=strata_m, insurance_m=insurance_m, rates_m=rates_m,
+    maint_m=maint_m, water_m=water_m, other_m=other_m,
+    div_43=div_43, div_40=div_40,
+    lvr=lvr_val, interest_rate=interest_rate_val, loan_term=loan_term, loan_type=loan_type, io_years=io_years,
+    cgt_marginal_rate=est_marginal_rate_val,
+)
+# Per-session dependency graph: a rerun recomputes only the figures downstream of changed inputs
+if "scenario_graph" not in st.session_state:
+    st.session_state.scenario_graph = ScenarioGraph()
+scenario_graph = st.session_state.scenario_graph
+derived = scenario_graph.run(scenario)
+res = scenario_graph.results(derived)
+st.sidebar.caption(
+    f"🧮 Recalculated {len(scenario_graph.last_run['recomputed'])} of {len(scenario_graph.nodes)} figure groups "
+    f"this run ({len(scenario_graph.last_run['reused'])} reused; {scenario_graph.stats['recomputed']} recomputed, "
+    f"{scenario_graph.stats['reused']} reused this session)"
+)
+
+years = np.arange(1, holding_period + 1)
+future_values = derived["future_values"]
+core_balances, eq_balances = derived["core_balances"], derived["eq_balances"]
+df_chart = pd.DataFrame({
+    "Year": years,
+    "Property Value": future_values,
+    "Equity": np.array(future_values) - core_balances
+}).set_index("Year")
+
+# --- TAB 1: ACQUISITION ---
+with tab1:
+    st.metric("Total Acquisition Costs", f"${res.total_acquisition_costs:,.2f}")
+    st.metric("Total Required (Property + Costs)", f"${res.total_cost_base:,.2f}")
+
+# --- TAB 2: INCOME & EXPENSES ---
+with tab2:
+    st.divider()
+    metric_col1, metric_col2 = st.columns(2)
+    metric_col1.metric("Gross Annual Rental Income", f"${res.annual_gross_income:,.2f}")
+    metric_col2.metric("Total Annual Holding Costs", f"${res.total_operating_expenses:,.2f}")
+    
+    st.divider()
+    metric_col1, metric_col2 = st.columns(2)
+    metric_col1.metric("Gross Annual Income", f"${res.annual_gross_income:,.2f}")
+    metric_col2.metric("Total Annual Expenses", f"${res.total_operating_expenses:,.2f}")
+
+# --- TAB 3: LOAN DETAILS ---
+with tab3:
+    st.divider()
+    st.subheader("3. Repayment Schedule")
+    l_col1, l_col2, l_col3 = st.columns(3)
+    l_col1.metric("Core Repayment (Year 1, Monthly)", f"${res.new_mortgage_m:,.2f}")
+    l_col2.metric("Core Repayment After IO Expiry", f"${res.post_io_pi:,.2f}")
+    l_col3.metric("Year 1 Deductible Interest", f"${res.total_tax_deductible_interest:,.2f}")
+    st.line_chart(pd.DataFrame({"Core Loan": core_balances, "Equity Loan": eq_balances}, index=pd.Index(years, name="Year")))
 
 # --- TAB 4: CASH FLOW ---
 with tab4:
     st.subheader("Pre-Tax Cash Flow")
     
-    net_operating_income = annual_gross_income - total_operating_expenses
-    pre_tax_cashflow = net_operating_income - total_annual_debt_repayment
-    
     st.divider()
     cf_col1, cf_col2 = st.columns([1, 1])
     with cf_col1:
@@ -608,22 +608,18 @@ with tab4:
         st.write(f"**Total Debt Service (Core + Equity Loan)**")
         st.markdown("### **Annual Cash Flow**")
     with cf_col2:
-        st.write(f"${annual_gross_income:,.2f}")
-        st.write(f"-${total_operating_expenses:,.2f}")
-        st.write(f"**${net_operating_income:,.2f}**")
-        st.write(f"-${total_annual_debt_repayment:,.2f}")
-        if pre_tax_cashflow < 0:
-            st.markdown(f"<h3 style='color: #ff4b4b;'>-${abs(pre_tax_cashflow):,.2f}</h3>", unsafe_allow_html=True)
+        st.write(f"${res.annual_gross_income:,.2f}")
+        st.write(f"-${res.total_operating_expenses:,.2f}")
+        st.write(f"**${res.net_operating_income:,.2f}**")
+        st.write(f"-${res.total_annual_debt_repayment:,.2f}")
+        if res.pre_tax_cashflow < 0:
+            st.markdown(f"<h3 style='color: #ff4b4b;'>-${abs(res.pre_tax_cashflow):,.2f}</h3>", unsafe_allow_html=True)
         else:
-            st.markdown(f"<h3 style='color: #00cc96;'>${pre_tax_cashflow:,.2f}</h3>", unsafe_allow_html=True)
+            st.markdown(f"<h3 style='color: #00cc96;'>${res.pre_tax_cashflow:,.2f}</h3>", unsafe_allow_html=True)
 
 # --- TAB 5: DEPRECIATION ---
 with tab5:
-    st.subheader("Tax Depreciation (Non-Cash Deductions)")
-    div_43 = st.number_input("Capital Works (Div 43) ($)", value=float(st.session_state.form_data.get("div_43", 9000.0)), step=500.0)
-    div_40 = st.number_input("Plant & Equipment (Div 40) ($)", value=float(st.session_state.form_data.get("div_40", 8500.0)), step=500.0)
-    total_depreciation = div_43 + div_40
-    st.metric("Total Annual Depreciation", f"${total_depreciation:,.2f}")
+    st.metric("Total Annual Depreciation", f"${res.total_depreciation:,.2f}")
 
 # --- TAB 6: TAX, GEARING & SERVICEABILITY ---
 with tab6:
@@ -632,39 +628,20 @@ with tab6:
     
     # --- Auto-Calculated Gross Income Display ---
     g1, g2 = st.columns(2)
-    g1.metric("Inv 1 Auto-Calculated Gross", f"${gross_income_1:,.2f}", help="Calculated from sidebar take-home pay")
-    g2.metric("Inv 2 Auto-Calculated Gross", f"${gross_income_2:,.2f}", help="Calculated from sidebar take-home pay")
-
-    # 1. Tax & Gearing Calculations
-    total_tax_deductions = total_operating_expenses + annual_interest + total_depreciation
-    net_property_taxable_income = annual_gross_income - total_tax_deductions
-    
-    property_income_1 = net_property_taxable_income * ownership_split
-    property_income_2 = net_property_taxable_income * (1 - ownership_split)
-    
-    # Tax Variance now uses the mathematically precise Gross Income
-    base_tax_1 = calculate_tax(gross_income_1)
-    new_tax_1 = calculate_tax(max(0, gross_income_1 + property_income_1))
-    tax_variance_1 = base_tax_1 - new_tax_1
-    
-    base_tax_2 = calculate_tax(gross_income_2)
-    new_tax_2 = calculate_tax(max(0, gross_income_2 + property_income_2))
-    tax_variance_2 = base_tax_2 - new_tax_2
-    
-    total_tax_variance = tax_variance_1 + tax_variance_2
-    post_tax_cashflow = pre_tax_cashflow + total_tax_variance
+    g1.metric("Inv 1 Auto-Calculated Gross", f"${res.gross_income_1:,.2f}", help="Calculated from sidebar take-home pay")
+    g2.metric("Inv 2 Auto-Calculated Gross", f"${res.gross_income_2:,.2f}", help="Calculated from sidebar take-home pay")
 
     # Display Tax Metrics
     st.divider()
     t_col1, t_col2 = st.columns(2)
-    t_col1.metric("Pre-Tax Cash Flow (Annual)", f"${pre_tax_cashflow:,.2f}")
+    t_col1.metric("Pre-Tax Cash Flow (Annual)", f"${res.pre_tax_cashflow:,.2f}")
     
-    if total_tax_variance > 0:
-        t_col2.metric("Combined Estimated Tax Refund", f"${total_tax_variance:,.2f}")
+    if res.total_tax_variance > 0:
+        t_col2.metric("Combined Estimated Tax Refund", f"${res.total_tax_variance:,.2f}")
     else:
-        t_col2.metric("Combined Estimated Tax Payable", f"${abs(total_tax_variance):,.2f}")
+        t_col2.metric("Combined Estimated Tax Payable", f"${abs(res.total_tax_variance):,.2f}")
         
-    st.metric("Household Net Post-Tax Cash Flow (Annual)", f"${post_tax_cashflow:,.2f}")
+    st.metric("Household Net Post-Tax Cash Flow (Annual)", f"${res.post_tax_cashflow:,.2f}")
 
     st.divider()
 
@@ -672,73 +649,76 @@ with tab6:
     st.subheader("🏦 Household Serviceability Check")
     st.markdown("This section evaluates if the household can support this loan after factoring in all living expenses and existing debts.")
 
-    # Calculate Monthly Figures
-    shaded_rent_m = (annual_gross_income / 12) * 0.80
-    total_net_salary_m = (salary_1_annual + salary_2_annual) / 12
-    
     # We use the PI amount for bank assessment standard
-    assessment_mortgage_m = monthly_pi 
-    
-    total_monthly_inflow = total_net_salary_m + shaded_rent_m
-    total_monthly_outflow = total_monthly_living + total_existing_debt_m + assessment_mortgage_m
-    
-    monthly_surplus = total_monthly_inflow - total_monthly_outflow
+    total_monthly_inflow = res.total_net_salary_m + res.assessment_shaded_rent_m
+    total_monthly_outflow = total_monthly_living + res.total_existing_debt_m + res.monthly_pi
         
     # Display Serviceability Dashboard
     srv_col1, srv_col2 = st.columns(2)
     with srv_col1:
         st.write("**Monthly Inflows (Take-Home)**")
-        st.write(f"Total Net Salaries: `${total_net_salary_m:,.2f}`")
-        st.write(f"Shaded Rental Income (80%): `${shaded_rent_m:,.2f}`")
+        st.write(f"Total Net Salaries: `${res.total_net_salary_m:,.2f}`")
+        st.write(f"Shaded Rental Income (80%): `${res.assessment_shaded_rent_m:,.2f}`")
         st.markdown(f"**Total Inflow: ${total_monthly_inflow:,.2f}**")
     with srv_col2:
         st.write("**Monthly Outflows**")
         st.write(f"Living Expenses: `${total_monthly_living:,.2f}`")
-        st.write(f"Existing Debts: `${total_existing_debt_m:,.2f}`")
-        st.write(f"New Loan (P&I Assessment): `${assessment_mortgage_m:,.2f}`")
+        st.write(f"Existing Debts: `${res.total_existing_debt_m:,.2f}`")
+        st.write(f"New Loan (P&I Assessment): `${res.monthly_pi:,.2f}`")
         st.markdown(f"**Total Outflow: ${total_monthly_outflow:,.2f}**")
 
-    if monthly_surplus > 0:
-        st.success(f"### ✅ Serviceable\nMonthly household surplus: **${monthly_surplus:,.2f}**")
+    if res.assessment_surplus_m > 0:
+        st.success(f"### ✅ Serviceable\nMonthly household surplus: **${res.assessment_surplus_m:,.2f}**")
     else:
-        st.error(f"### ⚠️ Warning: Deficit\nMonthly household deficit: **${abs(monthly_surplus):,.2f}**")
+        st.error(f"### ⚠️ Warning: Deficit\nMonthly household deficit: **${abs(res.assessment_surplus_m):,.2f}**")
 
 # --- TAB 7: 10-YEAR PROJECTIONS ---
 with tab7:
     st.subheader("Equity & Growth Forecast")
-    
-    years = np.arange(1, holding_period + 1)
-    future_values = [purchase_price * (1 + growth_rate)**y for y in years]
-    equity = [val - loan_amount for val in future_values]
-    
-    df_chart = pd.DataFrame({
-        "Year": years,
-        "Property Value": future_values,
-        "Equity": equity
-    }).set_index("Year")
-    
     st.line_chart(df_chart)
 
+    st.subheader("Year-by-Year Cash Flow")
+    proj = derived["projection"]
+    ir1, ir2, ir3 = st.columns(3)
+    ir1.metric("IRR (After Tax & Sale)", f"{proj.irr * 100:.2f}%" if np.isfinite(proj.irr) else "N/A")
+    ir2.metric(f"NPV @ {discount_rate_val:.1f}%", f"${proj.npv:,.0f}")
+    ir3.metric("Total Cash Returned", f"${proj.ledger['Cumulative Cash Flow'].iloc[-1]:,.0f}")
+    st.dataframe(proj.ledger.style.format("${:,.0f}"), use_container_width=True)
+
+    st.divider()
+    st.subheader("🎲 Simulation Mode")
+    if st.checkbox("Run Monte Carlo simulation (growth, interest rate & vacancy)", key="sim_mode"):
+        sim_c1, sim_c2, sim_c3 = st.columns(3)
+        sim_paths = sim_c1.number_input("Simulated Paths", min_value=1000, max_value=200000, value=20000, step=1000)
+        sim_growth_vol = sim_c2.number_input("Growth Volatility (% p.a.)", min_value=0.0, max_value=30.0, value=8.0, step=0.5)
+        sim_rate_vol = sim_c3.number_input("Interest Rate Volatility (% p.a.)", min_value=0.0, max_value=5.0, value=0.75, step=0.25)
+
+        sim_settings = SimulationSettings(
+            n_paths=int(sim_paths), years=int(holding_period),
+            growth_vol=sim_growth_vol / 100, rate_vol=sim_rate_vol / 100,
+        )
+        sim = run_simulation(scenario.digest(asdict(sim_settings)), scenario, sim_settings)
+
+        st.markdown(f"**Equity Range** ({sim.n_paths:,} paths)")
+        st.line_chart(percentile_frame(sim.years, sim.equity))
+        st.markdown("**Cumulative Post-Tax Cash Flow**")
+        st.line_chart(percentile_frame(sim.years, sim.cumulative_post_tax))
+
+        p_col1, p_col2, p_col3, p_col4 = st.columns(4)
+        p_col1.metric("Net Profit on Sale (5th %ile)", f"${sim.net_profit_on_sale[5]:,.0f}")
+        p_col2.metric("Net Profit on Sale (Median)", f"${sim.net_profit_on_sale[50]:,.0f}")
+        p_col3.metric("Net Profit on Sale (95th %ile)", f"${sim.net_profit_on_sale[95]:,.0f}")
+        p_col4.metric("Chance of a Loss on Sale", f"{sim.prob_loss_on_sale * 100:.1f}%")
+
 # --- TAB 8: CGT PROJECTION ---
 with tab8:
-    st.subheader("Capital Gains Tax (Year 10 Sale)")
-    
-    sale_price = future_values[-1] 
-    capital_gain = sale_price - purchase_price
-    cgt_discount = capital_gain * 0.50  
-    
-    est_marginal_rate = st.number_input("Marginal Tax Rate for Sale Year (%)", value=35.0) / 100
-    
-    cgt_payable = cgt_discount * est_marginal_rate
-    net_profit_on_sale = capital_gain - cgt_payable
-
     st.divider()
     c_col1, c_col2 = st.columns(2)
-    c_col1.metric("Estimated Sale Price (Year 10)", f"${sale_price:,.2f}")
-    c_col1.metric("Gross Capital Gain", f"${capital_gain:,.2f}")
+    c_col1.metric("Estimated Sale Price (Year 10)", f"${res.sale_price:,.2f}")
+    c_col1.metric("Gross Capital Gain", f"${res.capital_gain:,.2f}")
     
-    c_col2.metric("Estimated CGT Payable", f"${cgt_payable:,.2f}")
-    c_col2.metric("Net Profit After Tax", f"${net_profit_on_sale:,.2f}")
+    c_col2.metric("Estimated CGT Payable", f"${res.cgt_payable:,.2f}")
+    c_col2.metric("Net Profit After Tax", f"${res.net_profit_on_sale:,.2f}")
 
 # --- TAB 0: SUMMARY DASHBOARD (NEW) ---
 with tab0:
@@ -748,17 +728,17 @@ with tab0:
     # KPIs
     kpi1, kpi2, kpi3, kpi4 = st.columns(4)
     kpi1.metric("Purchase Price", f"${purchase_price:,.0f}")
-    kpi2.metric("Gross Yield", f"{(annual_gross_income / purchase_price)*100:.2f}%")
-    kpi3.metric("Total Outlay", f"${(total_cost_base - loan_amount):,.0f}")
-    kpi4.metric("Net Operating Income", f"${net_operating_income:,.0f}")
+    kpi2.metric("Gross Yield", f"{res.gross_yield:.2f}%")
+    kpi3.metric("Total Outlay", f"${(res.total_cost_base - res.loan_amount):,.0f}")
+    kpi4.metric("Net Operating Income", f"${res.net_operating_income:,.0f}")
     
     st.divider()
     
     # Cash Flow Breakdown
     cf1, cf2, cf3 = st.columns(3)
-    cf1.metric("Annual Pre-Tax", f"${pre_tax_cashflow:,.0f}", f"${pre_tax_cashflow/52:,.2f} pw")
-    cf2.metric("Estimated Tax Impact", f"${total_tax_variance:,.0f}", delta_color="normal")
-    cf3.metric("Annual Post-Tax", f"${post_tax_cashflow:,.0f}", f"${post_tax_cashflow/52:,.2f} pw")
+    cf1.metric("Annual Pre-Tax", f"${res.pre_tax_cashflow:,.0f}", f"${res.pre_tax_cashflow/52:,.2f} pw")
+    cf2.metric("Estimated Tax Impact", f"${res.total_tax_variance:,.0f}", delta_color="normal")
+    cf3.metric("Annual Post-Tax", f"${res.post_tax_cashflow:,.0f}", f"${res.post_tax_cashflow/52:,.2f} pw")
     
     st.divider()
     
@@ -771,129 +751,259 @@ with tab0:
         st.write("### Expense Ratio")
         expense_data = pd.DataFrame({
             "Type": ["Operating Expenses", "Interest Costs"],
-            "Amount": [total_operating_expenses, annual_interest]
+            "Amount": [res.total_operating_expenses, res.total_tax_deductible_interest]
         })
         st.bar_chart(expense_data.set_index("Type"))
 
 # --- TAB 9: SEARCH HISTORY LOG ---
-with tab9:
-    st.subheader("📚 Property Search History")
-    if os.path.exists(HISTORY_FILE):
-        history_df = pd.read_csv(HISTORY_FILE)
-        
-        # --- FIX: Handle old CSVs missing the 'Favorite' column ---
-        if "Favorite" not in history_df.columns:
-            history_df["Favorite"] = False
-        # ----------------------------------------------------------
-        
-        # Sorting Logic: Favorites (True) first, then Date (Descending)
-        history_df = history_df.sort_values(by=["Favorite", "Date of PDF"], ascending=[False, False]).reset_index(drop=True)
-        
-        for index, row in history_df.iterrows():
+def reset_history_page():
+    st.session_state.history_page = 1
+
+def revisit_history_entry(entry_id):
+    """Loads the full saved scenario only when Revisit is clicked."""
+    entry = get_history_store().get(entry_id)
+    if entry:
+        load_property(entry)
+        st.session_state.history_revisited = True
+
+@st.fragment
+def history_panel():
+    """History list that reruns on its own for searching, paging and favourites; Revisit reruns the whole app."""
+    if st.session_state.pop("history_revisited", False):
+        st.rerun()
+    history_store = get_history_store()
+
+    # Filters are pushed down to SQL; only the visible page is fetched and rendered
+    h1, h2, h3 = st.columns([0.6, 0.2, 0.2])
+    history_search = h1.text_input("Search", placeholder="Filter by name or listing URL", key="history_search", on_change=reset_history_page)
+    favorites_only = h2.checkbox("⭐ Favourites only", key="history_favs_only", on_change=reset_history_page)
+    page_size = h3.selectbox("Per page", [10, 25, 50], key="history_page_size", on_change=reset_history_page)
+
+    total_matches = history_store.count(history_search, favorites_only)
+    if total_matches:
+        total_pages = (total_matches - 1) // page_size + 1
+        if st.session_state.get("history_page", 1) > total_pages:
+            st.session_state.history_page = total_pages
+        page_no = st.number_input("Page", min_value=1, max_value=total_pages, step=1, key="history_page")
+        first = (page_no - 1) * page_size
+        st.caption(f"Showing {first + 1}–{min(first + page_size, total_matches)} of {total_matches} saved properties")
+
+        # Sorting Logic: Favorites first, then Date (Descending) -- served by the history index
+        for row in history_store.page(first, page_size, history_search, favorites_only):
             with st.container():
                 c1, c2, c3, c4 = st.columns([0.1, 0.4, 0.3, 0.2])
 
-                # Favorite Toggle
-                is_fav = "⭐" if row.get("Favorite", False) else "☆"
-                if c1.button(is_fav, key=f"fav_{index}"):
-                    history_df.at[index, "Favorite"] = not row.get("Favorite", False)
-                    history_df.to_csv(HISTORY_FILE, index=False)
-                    st.rerun()
+                # Favorite Toggle (single-row update)
+                is_fav = "⭐" if row["Favorite"] else "☆"
+                c1.button(is_fav, key=f"fav_{row['id']}", on_click=history_store.toggle_favorite, args=(row["id"],))
                 
                 c2.write(f"**{row['Property Name']}**")
                 c3.write(f"📅 {row['Date of PDF']}")
                 
                 # CRITICAL FIX: The Revisit button now uses a Callback (on_click)
-                c4.button("🔄 Revisit", key=f"rev_{index}", on_click=load_property, args=(row,))
+                c4.button("🔄 Revisit", key=f"rev_{row['id']}", on_click=revisit_history_entry, args=(row["id"],))
                 
                 st.divider()
 
         if st.button("🗑️ Clear History"):
-            os.remove(HISTORY_FILE)
+            history_store.clear()
             st.rerun()
+    elif history_search or favorites_only:
+        st.info("No saved properties match this filter.")
     else:
         st.info("Download a PDF to save to history.")
 
-# --- TAB 10: LIVING EXPENSES & SERVICING ---
-with tab10:
-    st.subheader("Household Living Expenses (Monthly)")
-    st.markdown("Modify the default values or add new rows below. Your custom expenses will be saved with this property search.")
-    
-    # Safer way to load expenses: use .get() to provide a fallback if the key is missing
-    expenses_raw = st.session_state.form_data.get("living_expenses_json", json.dumps(DEFAULT_LIVING_EXPENSES_DATA))
-    current_expenses = pd.DataFrame(json.loads(expenses_raw))
-    
-    edited_expenses = st.data_editor(
-        current_expenses,
-        num_rows="dynamic",
-        width="stretch",
-        column_config={
-            "Monthly Amount ($)": st.column_config.NumberColumn(
-                "Monthly Amount ($)",
-                min_value=0.0,
-                step=10.0,
-                format="$%.2f",
-            )
-        },
-        key="living_expenses_editor"
-    )
-    
-    total_monthly_living = edited_expenses["Monthly Amount ($)"].sum()
-    st.session_state.form_data["living_expenses_json"] = edited_expenses.to_json(orient="records")
-
-    st.divider()
-    
-    # --- NEW: EXISTING DEBT COMMITMENTS ---
-    st.subheader("💳 Existing Debt Commitments (Monthly)")
-    d1, d2, d3, d4 = st.columns(4)
+with tab9:
+    st.subheader("📚 Property Search History")
+    history_panel()
 
-    # Restored 'value=' parameters to keep your defaults, removed 'key=' to prevent warnings
-    ext_mortgage = d1.number_input("Existing Mortgage(s) ($)", value=float(st.session_state.form_data.get("ext_mortgage", 2921.0)), step=100.0)
-    ext_car_loan = d2.number_input("Car Loan(s) ($)", value=float(st.session_state.form_data.get("ext_car_loan", 0.0)), step=50.0)
-    ext_cc = d3.number_input("Credit Card Payments ($)", value=float(st.session_state.form_data.get("ext_cc", 0.0)), step=50.0, help="Typically assessed at 3-4% of total limit")
-    ext_other = d4.number_input("Other Loans ($)", value=float(st.session_state.form_data.get("ext_other", 0.0)), step=50.0)
-    
-    total_existing_debt_m = ext_mortgage + ext_car_loan + ext_cc + ext_other
-    st.divider()
-    
+# --- TAB 10: SERVICING OVERVIEW ---
+with tab10:
     # --- NEW: SERVICING OVERVIEW ---
     st.subheader("⚖️ Monthly Serviceability Overview")
     
-    # Inflows: Net inputs combined and divided into months
-    total_net_income_m = (annual_net_1 + annual_net_2) / 12
-    
-    # 2. Bank Rental Shading (80%)
-    shaded_rent_m = monthly_rent * 0.80
-    
-    # 3. New Mortgage Commitment
-    new_mortgage_m = monthly_io if loan_type == "Interest Only" else monthly_pi
-    
-    # 4. Final Totals
-    total_income_m = total_net_income_m + shaded_rent_m
-    total_commitments_m = total_monthly_living + total_existing_debt_m + new_mortgage_m
-    monthly_surplus = total_income_m - total_commitments_m
+    # Inflows: Net inputs combined with 80% bank-shaded rent; outflows use the active repayment type
+    total_income_m = res.total_net_salary_m + res.shaded_rent_m
+    total_commitments_m = total_monthly_living + res.total_existing_debt_m + res.new_mortgage_m
     
     srv1, srv2 = st.columns([1, 1])
     with srv1:
         st.write("**INFLOWS (Actual Take-Home)**")
         st.write(f"Inv 1 Net ({s1_freq}): **${s1_input:,.2f}**")
         st.write(f"Inv 2 Net ({s2_freq}): **${s2_input:,.2f}**")
-        st.write(f"Proposed Rent (80% Bank Shade): **${shaded_rent_m:,.2f}**")
+        st.write(f"Proposed Rent (80% Bank Shade): **${res.shaded_rent_m:,.2f}**")
         st.markdown(f"### Total Monthly Inflow: <span style='color:#00cc96'>${total_income_m:,.2f}</span>", unsafe_allow_html=True)
         
     with srv2:
         st.write("**OUTFLOWS**")
         st.write(f"Living Expenses: **${total_monthly_living:,.2f}**")
-        st.write(f"Existing Debts/Mortgages: **${total_existing_debt_m:,.2f}**")
-        st.write(f"NEW Property Mortgage: **${new_mortgage_m:,.2f}**")
+        st.write(f"Existing Debts/Mortgages: **${res.total_existing_debt_m:,.2f}**")
+        st.write(f"NEW Property Mortgage: **${res.new_mortgage_m:,.2f}**")
         st.markdown(f"### Total Commitments: <span style='color:#ff4b4b'>${total_commitments_m:,.2f}</span>", unsafe_allow_html=True)
         
     st.divider()
     
-    if monthly_surplus >= 0:
-        st.success(f"You have an estimated household surplus of **${monthly_surplus:,.2f} per month**.")
+    if res.monthly_surplus >= 0:
+        st.success(f"You have an estimated household surplus of **${res.monthly_surplus:,.2f} per month**.")
     else:
-        st.error(f"Warning: Estimated household deficit of **${abs(monthly_surplus):,.2f} per month**.")
+        st.error(f"Warning: Estimated household deficit of **${abs(res.monthly_surplus):,.2f} per month**.")
+
+# --- TAB 11: SENSITIVITY ANALYSIS ---
+with tab11:
+    st.subheader("🎯 Sensitivity Analysis")
+    if st.checkbox("Evaluate a sensitivity grid around this scenario", key="sens_mode"):
+        # Display units are percents; growth_rate is stored as a fraction
+        display_scale = {"interest_rate": 1, "growth_rate": 100, "lvr": 1, "vacancy_pct": 1}
+        range_inputs = {
+            "interest_rate": (1.0, 15.0, interest_rate_val, 3.0, 50, 0.25),
+            "growth_rate": (-5.0, 15.0, growth_rate_val, 3.0, 5, 0.5),
+            "lvr": (0.0, 100.0, float(lvr_val), 15.0, 50, 1.0),
+            "vacancy_pct": (0.0, 20.0, vacancy_pct, 5.0, 10, 0.5),
+        }
+        axes, ranges = {}, {}
+        for name, (lo, hi, base, spread, steps, step) in range_inputs.items():
+            r_col, n_col = st.columns([3, 1])
+            low, high = r_col.slider(
+                SENSITIVITY_LABELS[name], lo, hi,
+                (max(lo, float(base) - spread), min(hi, float(base) + spread)), step=step, key=f"sens_{name}"
+            )
+            n_steps = n_col.number_input("Steps", min_value=2, max_value=100, value=steps, key=f"sens_{name}_steps")
+            axes[name] = np.linspace(low, high, int(n_steps)) / display_scale[name]
+            ranges[name] = (low / display_scale[name], high / display_scale[name])
+
+        grid = get_sensitivity_cache().grid(scenario, axes)
+        n_cells = int(np.prod([len(v) for v in axes.values()]))
+        st.caption(f"{n_cells:,} scenarios evaluated in one pass.")
+
+        h_col1, h_col2 = st.columns(2)
+        names = list(axes)
+        x_name = h_col1.selectbox("Heatmap X Axis", names, index=0, format_func=SENSITIVITY_LABELS.get, key="sens_x")
+        y_name = h_col2.selectbox("Heatmap Y Axis", [n for n in names if n != x_name], index=1, format_func=SENSITIVITY_LABELS.get, key="sens_y")
+
+        # Remaining axes are held at the grid value closest to the current scenario
+        index = []
+        for name in names:
+            if name in (x_name, y_name):
+                index.append(slice(None))
+            else:
+                index.append(int(np.abs(axes[name] - getattr(scenario, name)).argmin()))
+        x_values, y_values = axes[x_name] * display_scale[x_name], axes[y_name] * display_scale[y_name]
+
+        hm_col1, hm_col2 = st.columns(2)
+        for col, metric in ((hm_col1, "post_tax_cashflow"), (hm_col2, "monthly_surplus")):
+            sliced = grid[metric][tuple(index)]
+            if names.index(x_name) < names.index(y_name):
+                sliced = sliced.T
+            fig = sensitivity_heatmap(sliced, x_values, y_values, SENSITIVITY_LABELS[x_name], SENSITIVITY_LABELS[y_name], SENSITIVITY_METRICS[metric])
+            col.pyplot(fig)
+
+        st.divider()
+        tornado_metric = st.selectbox("Tornado Metric", list(SENSITIVITY_METRICS), format_func=SENSITIVITY_METRICS.get, key="sens_tornado_metric")
+        fig = tornado_chart(tornado(scenario, ranges, tornado_metric), SENSITIVITY_LABELS, f"{SENSITIVITY_METRICS[tornado_metric]}: Low vs High")
+        st.pyplot(fig)
+
+# --- TAB 12: PORTFOLIO ---
+PORTFOLIO_PICKER_LIMIT = 50  # Saved properties offered per search in "Add Saved Properties"
+
+def portfolio_workbook(portfolio, household):
+    """Tracker workbook bytes for the portfolio on screen; built only when Export is pressed."""
+    import io
+    from homeloan import export_workbook  # openpyxl loads on the first export, not at startup
+    buffer = io.BytesIO()
+    export_workbook(portfolio, buffer, household)
+    return buffer.getvalue()
+
+@st.cache_data(max_entries=8, show_spinner="Reading workbook...")
+def read_tracker_workbook(data):
+    """Imported holdings and resolved dashboard totals for an uploaded tracker workbook (cached on its bytes)."""
+    import io
+    from homeloan import read_workbook
+    return read_workbook(io.BytesIO(data))
+
+def load_tracker_property(portfolio, index):
+    """Loads one imported property and its loans into the sidebar inputs."""
+    from homeloan import scenario_form
+    st.session_state.form = scenario_form(portfolio, index, st.session_state.form)
+    sync_widget_keys(st.session_state.form)
+
+with tab12:
+    st.subheader("🏘️ Portfolio Overview")
+    tracker = Portfolio.load()
+    uploaded_tracker = st.file_uploader(
+        "Import Portfolio Tracker (Excel)", type="xlsx", key="pf_import",
+        help="A workbook exported here or by homeloan.py; its holdings replace portfolio.json below"
+    )
+    if uploaded_tracker is not None:
+        imported = read_tracker_workbook(uploaded_tracker.getvalue())
+        tracker = imported.portfolio
+        st.caption(f"Imported {len(tracker.properties)} properties and {len(tracker.loans)} loans from {uploaded_tracker.name}")
+        if not tracker.properties.empty:
+            im1, im2 = st.columns([0.7, 0.3])
+            import_index = im1.selectbox(
+                "Imported property", range(len(tracker.properties)),
+                format_func=lambda n: tracker.properties["name"].iloc[n], key="pf_import_property"
+            )
+            im2.button("📥 Load into Sidebar", on_click=load_tracker_property, args=(tracker, import_index), use_container_width=True)
+        with st.expander("Workbook dashboard (formulas resolved)"):
+            st.dataframe(pd.DataFrame({"Value": imported.totals}), use_container_width=True)
+    pf_col1, pf_col2 = st.columns(2)
+    include_tracker = pf_col1.checkbox(
+        f"Include tracker holdings ({len(tracker.properties)} properties, {len(tracker.loans)} loans)",
+        value=not tracker.properties.empty, key="pf_tracker"
+    )
+    include_current = pf_col2.checkbox("Include this property", value=True, key="pf_current")
+
+    # Saved properties are searched in SQL and offered one bounded page at a time; picks stay selected across searches
+    history_store = get_history_store()
+    pf_search = st.text_input("Find Saved Properties", placeholder="Filter by name or listing URL", key="pf_saved_search")
+    picked = {entry_id: history_store.get(entry_id) for entry_id in st.session_state.get("pf_saved", [])}
+    picked = {entry_id: entry for entry_id, entry in picked.items() if entry is not None}
+    st.session_state.pf_saved = list(picked)
+    saved_entries = {row["id"]: row["Property Name"] for row in history_store.page(0, PORTFOLIO_PICKER_LIMIT, pf_search)}
+    saved_entries.update({entry_id: entry["Property Name"] for entry_id, entry in picked.items()})
+    picked_ids = st.multiselect("Add Saved Properties", list(saved_entries), format_func=saved_entries.get, key="pf_saved")
+    match_count = history_store.count(pf_search)
+    if match_count > PORTFOLIO_PICKER_LIMIT:
+        st.caption(f"Showing the first {PORTFOLIO_PICKER_LIMIT} of {match_count} saved properties; search to narrow the list.")
+
+    pf_scenarios, pf_names = [], []
+    if include_current:
+        pf_scenarios.append(scenario); pf_names.append(property_name)
+    for entry_id in picked_ids:
+        entry = picked.get(entry_id) or history_store.get(entry_id)
+        if entry is not None:
+            pf_scenarios.append(PropertyInputs.from_save_data(entry)); pf_names.append(entry["Property Name"])
+
+    pf = Portfolio.from_scenarios(pf_scenarios, pf_names, base=tracker if include_tracker else None)
+    # The tracker already lists the home loan, so the existing mortgage input is not counted twice
+    pf_household = household_from_scenario(scenario, include_mortgage=not include_tracker)
+    pf_summary = pf.summarize(pf_household)
+
+    pk1, pk2, pk3, pk4 = st.columns(4)
+    pk1.metric("Total Property Value", f"${pf_summary.total_value:,.0f}")
+    pk2.metric("Total Debt", f"${pf_summary.total_debt:,.0f}")
+    pk3.metric("Net Equity", f"${pf_summary.net_equity:,.0f}")
+    pk4.metric("Overall LVR", f"{pf_summary.lvr * 100:.1f}%")
+    pk5, pk6, pk7, pk8 = st.columns(4)
+    pk5.metric("Net Monthly Cash Flow", f"${pf_summary.net_monthly_cashflow:,.0f}")
+    pk6.metric("Combined Tax Refund (Annual)", f"${pf_summary.tax_refund:,.0f}")
+    pk7.metric("Post-Tax Monthly Cash Flow", f"${pf_summary.post_tax_monthly_cashflow:,.0f}")
+    pk8.metric("Stressed Household Surplus", f"${pf_summary.assessment_surplus_m:,.0f}")
+
+    st.dataframe(
+        pf_summary.per_property.style.format({
+            "Value": "${:,.0f}", "Debt": "${:,.0f}", "LVR": "{:.1%}", "Monthly Rent": "${:,.0f}",
+            "Monthly Repayments": "${:,.0f}", "Monthly OpEx": "${:,.0f}", "Net Monthly Cash Flow": "${:,.0f}",
+            "Taxable Income": "${:,.0f}",
+        }),
+        use_container_width=True, hide_index=True
+    )
+    st.download_button(
+        label="⬇️ Export Portfolio Tracker (Excel)",
+        data=partial(portfolio_workbook, pf, pf_household),
+        file_name="Investment_Portfolio_Tracker.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    )
 
 # ==========================================================
 # --- EXPORT & SAVE SECTION (BOTTOM OF SCRIPT) ---
@@ -901,267 +1011,25 @@ with tab10:
 st.markdown("---")
 st.subheader("📄 Export Analysis Report")
 
-def generate_pdf(salary_1_annual, salary_2_annual, total_monthly_living, total_existing_debt_m, gross_1, gross_2, net_taxable_income, pre_tax_cf, tax_variance):
-    # 1. ADD THESE TWO LINES RIGHT HERE AT THE TOP
-    is_ai = st.session_state.form_data.get("is_ai_estimated", False)
-    ai_tag = " (AI Estimated)" if is_ai else " (Manual/Default)"
-
-    market_yield = fetch_market_yield(property_name, beds, baths, cars)
-    property_yield = (annual_gross_income / purchase_price) * 100
-    median_price = fetch_median_price(property_name, beds, baths, cars)
-
-    class InvestmentReportPDF(FPDF):
-        def header(self):
-            logo_path = "AQI_Logo.png" 
-            if os.path.exists(logo_path): self.image(logo_path, 10, 8, 30)
-            self.set_font("helvetica", "B", 20)
-            self.set_text_color(0, 51, 102)
-            self.cell(40) 
-            self.cell(0, 15, "Proposed Investment Property Analysis", new_x="LMARGIN", new_y="NEXT", align="L")
-            self.ln(10)
-
-        def footer(self):
-            self.set_y(-15)
-            self.set_font("helvetica", "I", 8)
-            self.set_text_color(150, 150, 150)
-            self.cell(0, 5, "*Disclaimer: Suburb yield and serviceability are estimates for guidance only.", align="C", new_x="LMARGIN", new_y="NEXT")
-            self.cell(0, 5, f"Page {self.page_no()}", align="C")
-
-        # FIXED TYPO HERE
-        def section_header(self, title):
-            self.set_font("helvetica", "B", 13)
-            self.set_fill_color(230, 240, 255)
-            self.set_text_color(0, 0, 0)
-            self.cell(0, 10, f"  {title}", fill=True, new_x="LMARGIN", new_y="NEXT")
-            self.ln(2)
-
-        def row(self, label, value, label2="", value2=""):
-            self.set_font("helvetica", "", 10)
-            self.cell(50, 7, label, border=0)
-            self.set_font("helvetica", "B", 10)
-            self.cell(45, 7, str(value), border=0)
-            if label2:
-                self.set_font("helvetica", "", 10)
-                self.cell(50, 7, label2, border=0)
-                self.set_font("helvetica", "B", 10)
-                self.cell(0, 7, str(value2), border=0, new_x="LMARGIN", new_y="NEXT")
-            else: self.ln(7)
-
-    pdf = InvestmentReportPDF()
-    pdf.add_page()
-    
-    # --- HEADER ---
-    pdf.set_font("helvetica", "B", 16)
-    pdf.cell(0, 8, property_name, new_x="LMARGIN", new_y="NEXT")
-    pdf.set_font("helvetica", "", 11)
-    pdf.cell(0, 7, f"Configuration: {beds} Bed | {baths} Bath | {cars} Car", new_x="LMARGIN", new_y="NEXT")
-    if property_url and property_url.strip() != "" and property_url != "https://www.realestate.com.au/":
-        pdf.set_font("helvetica", "U", 9); pdf.set_text_color(0, 102, 204) 
-        pdf.cell(0, 6, "View Listing Online", link=property_url, new_x="LMARGIN", new_y="NEXT")
-        pdf.set_text_color(0, 0, 0) 
-    pdf.ln(3)
-
-    # --- 1. ACQUISITION & FINANCE ---
-    pdf.section_header(f"1. Acquisition & Finance (100% Debt Funded Structure){ai_tag}")
-    
-    pdf.row("Purchase Price:", f"${purchase_price:,.0f}", "Core Loan Amount:", f"${loan_amount:,.0f} ({lvr_pct*100:.0f}% LVR)")
-    
-    # --- NEW: AI Median Price & Variance Row ---
-    if median_price:
-        variance = purchase_price - median_price
-        
-        # Manually constructing the row to allow split text coloring for the variance
-        pdf.set_font("helvetica", "", 10)
-        pdf.cell(50, 7, "Est. Suburb Median:", border=0)
-        pdf.set_font("helvetica", "B", 10)
-        pdf.cell(45, 7, f"${median_price:,.0f}", border=0)
-        
-        pdf.set_font("helvetica", "", 10)
-        pdf.cell(50, 7, "Purchase vs Median:", border=0)
-        
-        # Color logic: Green = Below median (Good), Red = Above median (Premium)
-        if variance > 0:
-            pdf.set_text_color(200, 0, 0) # Red
-            var_text = f"+ ${variance:,.0f} (Above)"
-        elif variance < 0:
-            pdf.set_text_color(0, 128, 0) # Green
-            var_text = f"- ${abs(variance):,.0f} (Below)"
-        else:
-            pdf.set_text_color(0, 102, 204) # Blue
-            var_text = "At Exact Median"
-            
-        pdf.set_font("helvetica", "B", 10)
-        pdf.cell(0, 7, var_text, border=0, new_x="LMARGIN", new_y="NEXT")
-        pdf.set_text_color(0, 0, 0) # Reset to black for the next rows
-    else:
-        # Fallback if the AI API fails to return a price
-        pdf.set_text_color(150, 150, 150)
-        pdf.row("Est. Suburb Median:", "Data Unavailable", "Purchase vs Median:", "N/A")
-        pdf.set_text_color(0, 0, 0)
-    
-    # --- Back to Standard Rows ---
-    if use_equity:
-        pdf.row("Total Entry Costs:", f"${total_acquisition_costs:,.0f}", "Equity Release Loan:", f"${eq_amount:,.0f}")
-        pdf.set_text_color(0, 128, 0) # Green for zero cash
-        pdf.row("Total Capital Required:", f"${total_cost_base:,.0f}", "CASH FROM SAVINGS:", f"${actual_cash_outlay:,.0f}")
-        pdf.set_text_color(0, 0, 0)
-    else:
-        pdf.row("Total Entry Costs:", f"${total_acquisition_costs:,.0f}", "Total Cash Outlay:", f"${actual_cash_outlay:,.0f}")
-        
-    pdf.ln(3)
-
-    # --- 2. YIELD ANALYSIS ---
-    pdf.section_header("2. Yield Analysis & Market Comparison (AI Estimated)")
-    net_yield = ((annual_gross_income - total_operating_expenses) / purchase_price) * 100
-    pdf.row("Property Gross Yield:", f"{property_yield:.2f}%", "Property Net Yield:", f"{net_yield:.2f}%")
-    if market_yield:
-        variance = property_yield - market_yield
-        pdf.set_text_color(0, 128, 0) if variance >= 0 else pdf.set_text_color(200, 0, 0)
-        status = f"{'Outperforming' if variance >= 0 else 'Underperforming'} by {abs(variance):.2f}%"
-        pdf.row("Est. Suburb Average:", f"{market_yield:.2f}%", "Market Status:", status)
-    else:
-        pdf.set_text_color(128, 128, 128); pdf.row("Est. Suburb Average:", "Data Unavailable", "Market Status:", "N/A")
-    pdf.set_text_color(0, 0, 0); pdf.ln(3)
-
-    # --- 3. PROPERTY PERFORMANCE ---
-    pdf.section_header(f"3. Property Performance (Annual Pre-Tax){ai_tag}")
-    
-    if actual_cash_outlay > 0:
-        cash_on_cash = f"{(pre_tax_cf / actual_cash_outlay) * 100:.2f}%"
-    else:
-        cash_on_cash = "Infinite (100% Financed)"
-
-    pdf.row(f"Gross Rent ({vacancy_pct:.1f}% Vac):", f"${annual_gross_income:,.0f}", "Operating Expenses:", f"-${total_operating_expenses:,.0f}")
-    pdf.set_font("helvetica", "I", 8); pdf.set_text_color(120, 120, 120)
-    pdf.cell(95, 4, "", border=0); pdf.cell(0, 4, f"(Strata: ${strata_m*12:,.0f} | Mgt: ${mgt_fee_m*12:,.0f} | Rates/Water/Maint/Tax: ${(rates_m+water_m+insurance_m+maint_m+other_m)*12:,.0f})", border=0, new_x="LMARGIN", new_y="NEXT")
-    pdf.set_text_color(0, 0, 0); pdf.ln(1)
-    
-    pdf.row("Total Interest Deductible:", f"-${total_tax_deductible_interest:,.0f}", "Net Property Cash Flow:", f"${pre_tax_cf:,.2f}")
-    
-    pdf.set_font("helvetica", "I", 10); pdf.set_text_color(0, 102, 204)
-    pdf.cell(50, 7, "Cash-on-Cash Return:", border=0); pdf.set_font("helvetica", "B", 10); pdf.cell(45, 7, f"{cash_on_cash}", border=0)
-    pdf.set_font("helvetica", "I", 10); pdf.cell(50, 7, "Est. Additional Tax Refund:", border=0); pdf.set_font("helvetica", "B", 10)
-    pdf.cell(0, 7, f"${tax_variance:,.2f}", border=0, new_x="LMARGIN", new_y="NEXT")
-    pdf.set_text_color(0, 0, 0); pdf.ln(3)
-
-    # --- INJECT AI TAX STRATEGY HERE ---
-    pdf.section_header("Strategic Taxation Analysis (AI Generated)")
-    tax_strategy_text = fetch_tax_strategy_summary(property_name, gross_1, gross_2, ownership_split, net_taxable_income, pre_tax_cf, tax_variance)
-    
-    pdf.set_font("helvetica", "", 10)
-    if tax_strategy_text:
-        # FPDF handles multi_cell for paragraph wrapping. Cleaned to prevent unicode/smart-quote crashes.
-        clean_text = tax_strategy_text.encode('latin-1', 'replace').decode('latin-1')
-        pdf.multi_cell(0, 6, clean_text)
-    else:
-        pdf.multi_cell(0, 6, "AI Tax Strategy could not be generated at this time. Please check your API limits or connection.")
-    pdf.ln(5)
-
-    # --- 4. HOUSEHOLD SERVICEABILITY ---
-    pdf.section_header("4. Monthly Household Serviceability")
-    total_household_net_m = (salary_1_annual + salary_2_annual) / 12
-    shaded_rent_m = (monthly_rent * 0.80) 
-    core_mortgage_m = monthly_io if loan_type == "Interest Only" else monthly_pi
-    prop_expenses_m = total_operating_expenses / 12
-    
-    # 1. Real World Math
-    net_monthly_surplus = (total_household_net_m + shaded_rent_m) - (total_monthly_living + total_existing_debt_m + core_mortgage_m + eq_monthly_pi + prop_expenses_m)
-
-    # 2. Bank Stress Test Math (+3% on new loans, +30% repayment buffer on existing mortgage)
-    stress_core_pi = abs(npf.pmt((interest_rate+0.03)/12, loan_term*12, loan_amount))
-    stress_eq_pi = abs(npf.pmt((eq_rate+0.03)/12, 30*12, eq_amount)) if use_equity else 0
-    stressed_existing_mortgage = ext_mortgage * 1.30 
-    stressed_other_debt = total_existing_debt_m - ext_mortgage
-    total_stressed_existing = stressed_existing_mortgage + stressed_other_debt
-    
-    bank_assessed_surplus = (total_household_net_m + shaded_rent_m) - (total_monthly_living + total_stressed_existing + stress_core_pi + stress_eq_pi + prop_expenses_m)
-
-    # Print the distinct breakdown
-    pdf.set_font("helvetica", "B", 10); pdf.cell(0, 7, "Serviceability Breakdown (Monthly):", new_x="LMARGIN", new_y="NEXT"); pdf.set_font("helvetica", "", 10)
-    pdf.row("Take-Home Pay:", f"${total_household_net_m:,.2f}", "Living Expenses:", f"-${total_monthly_living:,.2f}")
-    pdf.row("Rental Income (80%):", f"${shaded_rent_m:,.2f}", "Prop. Operating Exp:", f"-${prop_expenses_m:,.2f}")
-    
-    # Splitting out the loans
-    pdf.row("Existing Debts (PPOR):", f"-${total_existing_debt_m:,.2f}", "New Equity Loan:", f"-${eq_monthly_pi:,.2f}" if use_equity else "$0.00")
-    pdf.row("New Core Loan:", f"-${core_mortgage_m:,.2f}", "", "")
-    
-    pdf.ln(2)
-    
-    # Print Real-World Surplus (Green/Red)
-    if net_monthly_surplus >= 0:
-        pdf.set_text_color(0, 128, 0); pdf.set_font("helvetica", "B", 11)
-        pdf.cell(0, 7, f"REAL-WORLD MONTHLY SURPLUS: ${net_monthly_surplus:,.2f}", align="R", new_x="LMARGIN", new_y="NEXT")
-    else:
-        pdf.set_text_color(200, 0, 0); pdf.set_font("helvetica", "B", 11)
-        pdf.cell(0, 7, f"REAL-WORLD MONTHLY DEFICIT: ${abs(net_monthly_surplus):,.2f}", align="R", new_x="LMARGIN", new_y="NEXT")
-        
-    # Print Bank Assessed Surplus (Blue/Red)
-    if bank_assessed_surplus >= 0:
-        pdf.set_text_color(0, 102, 204); pdf.set_font("helvetica", "B", 11)
-        pdf.cell(0, 7, f"BANK ASSESSED SURPLUS (Stressed): ${bank_assessed_surplus:,.2f}", align="R", new_x="LMARGIN", new_y="NEXT")
-    else:
-        pdf.set_text_color(200, 0, 0); pdf.set_font("helvetica", "B", 11)
-        pdf.cell(0, 7, f"BANK ASSESSED DEFICIT (Stressed): ${abs(bank_assessed_surplus):,.2f}", align="R", new_x="LMARGIN", new_y="NEXT")
-    
-    # DTI and Disclaimer
-    total_new_debt_amount = loan_amount + eq_amount
-    dti = total_new_debt_amount / (salary_1_annual + salary_2_annual) if (salary_1_annual + salary_2_annual) > 0 else 0
-
-    pdf.set_text_color(100, 100, 100); pdf.set_font("helvetica", "I", 9)
-    pdf.cell(0, 5, f"New Debt to Net Income (DTI): {dti:.1f}x  |  Bank assessment assumes +3% P&I and +30% on existing mortgages", align="R", new_x="LMARGIN", new_y="NEXT")
-    pdf.set_text_color(0, 0, 0); pdf.ln(3)
-
-    # --- 5. EXIT STRATEGY ---
-    pdf.section_header(f"5. Exit Strategy & CGT Projection (Year {holding_period})")
-    pdf.row("Est. Sale Price:", f"${future_values[-1]:,.0f}", "Gross Capital Gain:", f"${capital_gain:,.0f}")
-    pdf.row("Marginal Tax Rate:", f"{est_marginal_rate*100:.1f}%", "Est. CGT Payable:", f"${cgt_payable:,.0f}")
-    pdf.set_font("helvetica", "B", 10); pdf.row("NET PROFIT ON SALE:", f"${net_profit_on_sale:,.0f}")
-    pdf.ln(3)
-
-    # --- 6. CHARTS ---
-    pdf.add_page()
-    pdf.section_header("6. Projected Wealth Milestones")
-    pdf.set_font("helvetica", "B", 9); pdf.set_fill_color(240, 240, 240)
-    pdf.cell(30, 7, "Year", border=1, align="C", fill=True); pdf.cell(80, 7, "Estimated Value", border=1, align="C", fill=True); pdf.cell(80, 7, "Estimated Equity", border=1, align="C", fill=True, new_x="LMARGIN", new_y="NEXT")
-    pdf.set_font("helvetica", "", 9)
-    for yr in [1, 3, 5, 10]:
-        if yr <= holding_period:
-            val = purchase_price * (1 + growth_rate)**yr
-            eq = val - loan_amount - eq_amount # Subtracting BOTH loans for true equity
-            pdf.cell(30, 7, f"Year {yr}", border=1, align="C"); pdf.cell(80, 7, f"${val:,.0f}", border=1, align="C"); pdf.cell(80, 7, f"${eq:,.0f}", border=1, align="C", new_x="LMARGIN", new_y="NEXT")
-    
-    pdf.ln(8)
-    pdf.section_header("7. Equity & Value Projections")
-    fig, ax = plt.subplots(figsize=(8, 4.5)) 
-    ax.plot(df_chart.index, df_chart["Property Value"], label="Market Value", color="#003366", linewidth=2.5)
-    
-    # Calculate true equity accounting for both loans
-    true_equity = df_chart["Property Value"] - loan_amount - eq_amount
-    ax.plot(df_chart.index, true_equity, label="Equity Position", color="#2ca02c", linewidth=2.5)
-    ax.fill_between(df_chart.index, true_equity, color="#2ca02c", alpha=0.1)
-    
-    ax.set_title(f"Equity Projection ({growth_rate*100:.1f}% Annual Growth)", fontsize=12, fontweight='bold', pad=15)
-    ax.yaxis.set_major_formatter(ticker.FuncFormatter(lambda x, pos: f'${x:,.0f}'))
-    ax.grid(True, axis='y', linestyle="--", alpha=0.5)
-    ax.legend(frameon=False, loc="upper left")
-    plt.tight_layout(); img_buffer = io.BytesIO()
-    plt.savefig(img_buffer, format="png", bbox_inches="tight", dpi=200) 
-    pdf.image(img_buffer, x=15, w=180); plt.close()
-
-    return bytes(pdf.output())
-
-# Generate PDF safely outside of column wrappers
-pdf_bytes = generate_pdf(
-    salary_1_annual, 
-    salary_2_annual, 
-    total_monthly_living, 
-    total_existing_debt_m,
-    gross_income_1,                # Pushes Andrew's 132k value to the AI
-    gross_income_2,                # Pushes Angel-Rose's 135k value to the AI
-    net_property_taxable_income,   # Ensures the loss math matches the table
-    pre_tax_cashflow,              # Ensures the cash flow math matches the table
-    total_tax_variance             # Ensures the refund math matches the table
-)
+def generate_pdf(property_name, property_url, i, r, is_ai=False):
+    """Builds the summary report from engine inputs (i) and results (r)."""
+    # Fire both independent AI lookups at once; each has its own timeout and falls back to None.
+    # The combined estimates call carries the suburb yield and median price (free if Auto-Estimate already ran).
+    ai = fetch_concurrently({
+        "estimates": (fetch_comprehensive_estimates, (property_name, i.purchase_price, i.beds, i.baths, i.cars)),
+        "tax_strategy": (fetch_tax_strategy_summary, (property_name, r.gross_income_1, r.gross_income_2, i.ownership_split, r.net_property_taxable_income, r.pre_tax_cashflow, r.total_tax_variance, i.tax_year)),
+    })
+    from report import render_pdf  # fpdf and matplotlib load on the first Download, not at startup
+    return render_pdf(property_name, property_url, i, r, ai["estimates"], ai["tax_strategy"], is_ai)
+
+# Build the PDF lazily: only when Download is pressed, and at most once per unique scenario
+@st.cache_data(ttl=3600, max_entries=64, show_spinner=False)
+def build_pdf_report(report_key, _property_name, _property_url, _scenario, _is_ai):
+    """Cached PDF bytes keyed on report_key; the underscored args are covered by the key and not re-hashed."""
+    return generate_pdf(_property_name, _property_url, _scenario, evaluate(_scenario), _is_ai)
+
+is_ai_estimated = form.is_ai_estimated
+report_key = scenario.digest(property_name, property_url, is_ai_estimated)
 
 # Package all raw inputs securely to stop Revisit Math bugs
 # Package all raw inputs securely to stop Revisit Math bugs
@@ -1172,15 +1040,23 @@ save_data = {
     "s2_input": s2_input, "s2_freq": s2_freq, 
     "ownership_split": ownership_split,
     "growth_rate": growth_rate,
+    "rent_growth": rent_growth_val / 100,
+    "expense_inflation": expense_inflation_val / 100,
+    "discount_rate": discount_rate_val / 100,
     "holding_period": holding_period,
-    "living_expenses_json": st.session_state.form_data["living_expenses_json"],
     "ext_mortgage": ext_mortgage,
     "ext_car_loan": ext_car_loan,
     "ext_cc": ext_cc,
     "ext_other": ext_other,
     "use_eq": use_equity,
     "eq_amount": eq_amount,
-    "eq_rate": eq_rate * 100, 
+    "eq_rate": eq_rate_val,
+    "lvr": lvr_val,
+    "interest_rate": interest_rate_val,
+    "loan_term": loan_term,
+    "loan_type": loan_type,
+    "io_years": io_years,
+    "cgt_marginal_rate": est_marginal_rate_val,
     # ADD THE NEW ONES HERE:
     "stamp_duty": stamp_duty,
     "legal_fees": legal_fees,
@@ -1199,7 +1075,7 @@ save_data = {
     "other_m": other_m,
     "div_43": div_43,
     "div_40": div_40,
-    "is_ai_estimated": st.session_state.form_data.get("is_ai_estimated", False) # <-- SAVE TO CSV
+    "is_ai_estimated": is_ai_estimated # <-- SAVE TO CSV
 }
 
 col_save, col_dl = st.columns(2)
@@ -1213,7 +1089,7 @@ with col_save:
 with col_dl:
     st.download_button(
         label="⬇️ Download Full Summary PDF",
-        data=pdf_bytes,
+        data=partial(build_pdf_report, report_key, property_name, property_url, scenario, is_ai_estimated),
         file_name=f"{property_name.replace(' ', '_')}_Summary.pdf",
         mime="application/pdf",
         on_click=save_to_history,
@@ -0,0 +1,164 @@
+"""Batch PDF reports for saved history entries or screener results.
+
+    python batch_reports.py reports/ --history                 # every saved entry (or --history 3 7 12)
+    python batch_reports.py reports/ --listings listings.csv --ranked ranked.csv --top 25
+
+Reports are rendered on a process pool. Each worker switches matplotlib to the Agg
+backend and prepares the report template (downscaled logo) once when it starts, then
+renders every report sent to it and has fpdf write each finished PDF to its file. The
+AI sections are filled from the response cache only, so a batch never waits on the
+API. Prints pages per second and the time spent in each stage.
+"""
+import argparse
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import fields
+
+import matplotlib
+import pandas as pd
+
+import report
+from ai_cache import response_cache
+from engine import PropertyInputs, evaluate
+from history_store import HistoryStore
+
+# --- CONFIG ---
+CHUNK_ROWS = 5000
+INT_FIELDS = {f.name for f in fields(PropertyInputs) if f.type in ("int", int)}
+STAGES = ("ai", "evaluate", "layout", "chart", "output")
+
+
+def _init_worker():
+    matplotlib.use("Agg")
+    report.template()
+
+
+def _file_name(key, property_name):
+    safe = re.sub(r"[^A-Za-z0-9_.-]+", "_", str(property_name)).strip("_") or "Property"
+    return f"{key}_{safe}_Summary.pdf"
+
+
+def render_job(job, out_dir):
+    """Renders one (key, property name, listing URL, PropertyInputs, is_ai) job; returns (path, pages, stage totals)."""
+    key, property_name, property_url, i, is_ai = job
+    timer = report.StageTimer()
+    estimates = response_cache.lookup(
+        "estimates", {"address": property_name, "price": i.purchase_price, "beds": i.beds, "baths": i.baths, "cars": i.cars}
+    )
+    timer.lap("ai")
+    r = evaluate(i)
+    tax_strategy = response_cache.lookup("tax_strategy", {
+        "address": property_name, "gross_1": r.gross_income_1, "gross_2": r.gross_income_2, "split": i.ownership_split,
+        "net_tax_loss": r.net_property_taxable_income, "pre_tax_cashflow": r.pre_tax_cashflow,
+        "total_tax_variance": r.total_tax_variance, "fy": i.tax_year,
+    })
+    timer.lap("evaluate")
+    path = os.path.join(out_dir, _file_name(key, property_name))
+    report.render_pdf(property_name, property_url, i, r, estimates, tax_strategy, is_ai, timer, output=path)
+    return path, timer.pages, timer.totals
+
+
+def history_jobs(entry_ids=None, favorites_only=False, store=None):
+    """Jobs for saved history entries (all of them when entry_ids is empty)."""
+    store = store or HistoryStore()
+    if not entry_ids:
+        entry_ids = [row["id"] for row in store.page(0, store.count(favorites_only=favorites_only), favorites_only=favorites_only)]
+    for entry_id in entry_ids:
+        entry = store.get(entry_id)
+        if entry is None:
+            print(f"⚠️ History entry {entry_id} not found")
+            continue
+        yield (entry_id, entry["Property Name"], entry["Listing URL"],
+               PropertyInputs.from_save_data(entry), bool(entry.get("is_ai_estimated", False)))
+
+
+def listing_jobs(listings_path, ranked_path=None, top=None, chunk_rows=CHUNK_ROWS):
+    """Jobs for listing rows, streamed in chunks; with a screener output, only its top rows in rank order."""
+    wanted = None
+    if ranked_path:
+        ranked = pd.read_csv(ranked_path, usecols=["rank", "source_row"])
+        ranked = ranked.head(top) if top else ranked
+        wanted = dict(zip(ranked["source_row"], ranked["rank"]))
+    width = len(str(max(wanted.values(), default=0))) if wanted else 1
+
+    found = {}
+    for chunk in pd.read_csv(listings_path, chunksize=chunk_rows):
+        chunk.columns = [str(c).strip() for c in chunk.columns]
+        rows = chunk if wanted is None else chunk[chunk.index.isin(wanted.keys())]
+        for row_number, row in zip(rows.index, rows.to_dict("records")):
+            values = {k: v for k, v in row.items() if not pd.isna(v)}
+            values.update({k: int(values[k]) for k in INT_FIELDS if k in values})
+            name = values.get("Property Name") or values.get("address") or f"Listing {row_number}"
+            job = (row_number, name, values.get("Listing URL", ""), PropertyInputs.from_save_data(values), False)
+            if wanted is None:
+                yield job
+            else:
+                found[row_number] = job
+    # Ranked jobs come out in rank order, keyed by their zero-padded rank
+    if wanted is not None:
+        for row_number, rank in sorted(wanted.items(), key=lambda kv: kv[1]):
+            if row_number in found:
+                yield (f"{int(rank):0{width}d}",) + found[row_number][1:]
+
+
+def render_batch(jobs, out_dir, workers=None):
+    """Renders every job into out_dir and prints throughput and per-stage timings. Returns the written paths."""
+    os.makedirs(out_dir, exist_ok=True)
+    workers = max(1, workers or os.cpu_count() or 1)
+    started = time.perf_counter()
+    paths, pages, stages = [], 0, dict.fromkeys(STAGES, 0.0)
+
+    def collect(result):
+        nonlocal pages
+        path, n_pages, totals = result
+        paths.append(path)
+        pages += n_pages
+        for stage, seconds in totals.items():
+            stages[stage] = stages.get(stage, 0.0) + seconds
+
+    if workers == 1:
+        _init_worker()
+        for job in jobs:
+            collect(render_job(job, out_dir))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            pending = []
+            for job in jobs:
+                pending.append(pool.submit(render_job, job, out_dir))
+                if len(pending) >= 2 * workers:
+                    collect(pending.pop(0).result())
+            for future in pending:
+                collect(future.result())
+
+    elapsed = time.perf_counter() - started
+    print(f"{len(paths)} reports, {pages} pages in {elapsed:.2f}s ({pages / max(elapsed, 1e-9):.1f} pages/s, {workers} workers) -> {out_dir}")
+    busy = sum(stages.values()) or 1.0
+    for stage, seconds in stages.items():
+        print(f"  {stage:<9} {seconds:8.2f}s  {seconds / busy:6.1%}  ({seconds / max(len(paths), 1) * 1000:.1f} ms/report)")
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render summary PDFs for many properties at once.")
+    parser.add_argument("out_dir", help="Folder the PDFs are written to")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--history", nargs="*", type=int, metavar="ID", help="Saved history entry ids (none = all)")
+    source.add_argument("--listings", help="Listings CSV as read by screener.py")
+    parser.add_argument("--favorites", action="store_true", help="With --history and no ids: favourites only")
+    parser.add_argument("--ranked", help="screener.py output; report its top rows in rank order")
+    parser.add_argument("--top", type=int, default=None, help="With --ranked: how many rows to report")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all CPU cores)")
+    args = parser.parse_args(argv)
+
+    if args.listings:
+        jobs = listing_jobs(args.listings, args.ranked, args.top)
+    else:
+        jobs = history_jobs(args.history, args.favorites)
+    render_batch(jobs, args.out_dir, args.workers)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
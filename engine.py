@@ -0,0 +1,540 @@
+"""Headless property calculation engine.
+
+Every derived figure shown in app.py is computed here from a single
+PropertyInputs object, so a property can be evaluated without Streamlit.
+"""
+import hashlib
+import json
+from dataclasses import dataclass, fields, asdict
+
+import numpy as np
+
+from amortization import balance_after, year_totals
+from tax import DEFAULT_TAX_YEAR, gross_from_net, income_tax
+
+# --- CONSTANTS ---
+FREQ_MAP = {"Monthly": 12, "Fortnightly": 26, "Annually": 1}
+RENT_SHADING = 0.80          # Banks only count 80% of rental income
+STRESS_BUFFER = 0.03         # +3% assessment rate on new loans
+EXISTING_MORTGAGE_BUFFER = 1.30  # +30% repayment buffer on existing mortgages
+EQUITY_LOAN_TERM = 30        # Equity loans are assumed 30-year P&I
+CGT_DISCOUNT = 0.50
+
+# --- DEFAULT LIVING EXPENSES (Extracted from CSV) ---
+DEFAULT_LIVING_EXPENSES_DATA = [
+    {"Category": "Transport & Vehicle", "Item": "Vehicle registration", "Monthly Amount ($)": 125.0},
+    {"Category": "Transport & Vehicle", "Item": "Vehicle maintenance", "Monthly Amount ($)": 25.0},
+    {"Category": "Transport & Vehicle", "Item": "Vehicle insurance", "Monthly Amount ($)": 100.0},
+    {"Category": "Transport & Vehicle", "Item": "Petrol", "Monthly Amount ($)": 100.0},
+    {"Category": "Transport & Vehicle", "Item": "Public Transport", "Monthly Amount ($)": 21.67},
+    {"Category": "Property Expenses", "Item": "Council Rates", "Monthly Amount ($)": 169.67},
+    {"Category": "Property Expenses", "Item": "Home and contents insurances", "Monthly Amount ($)": 150.0},
+    {"Category": "Services and Utilities", "Item": "Electricity", "Monthly Amount ($)": 250.0},
+    {"Category": "Services and Utilities", "Item": "Gas", "Monthly Amount ($)": 83.33},
+    {"Category": "Services and Utilities", "Item": "Water", "Monthly Amount ($)": 183.33},
+    {"Category": "Services and Utilities", "Item": "Mobile telephone", "Monthly Amount ($)": 165.0},
+    {"Category": "Services and Utilities", "Item": "Internet", "Monthly Amount ($)": 120.0},
+    {"Category": "Food and Groceries", "Item": "Groceries", "Monthly Amount ($)": 866.67},
+    {"Category": "Food and Groceries", "Item": "Restaurants", "Monthly Amount ($)": 433.33},
+    {"Category": "Food and Groceries", "Item": "Takeaway food", "Monthly Amount ($)": 216.67},
+    {"Category": "Recreation and Entertainment", "Item": "Subscription services (Pay TV, Music)", "Monthly Amount ($)": 160.0},
+    {"Category": "Child Expenses", "Item": "Private school fees", "Monthly Amount ($)": 16.67},
+    {"Category": "Child Expenses", "Item": "Medical", "Monthly Amount ($)": 50.0},
+    {"Category": "Child Expenses", "Item": "Clothing and uniforms", "Monthly Amount ($)": 16.67},
+    {"Category": "Health and Wellbeing", "Item": "Sports and gym fees", "Monthly Amount ($)": 80.0},
+    {"Category": "Other Living Expenses", "Item": "Cigarettes and Alcohol", "Monthly Amount ($)": 50.0}
+]
+DEFAULT_MONTHLY_LIVING = sum(r["Monthly Amount ($)"] for r in DEFAULT_LIVING_EXPENSES_DATA)
+
+
+# --- TAX HELPERS ---
+def _tax_by_year(fn, values, years, medicare):
+    """Applies a tax.py function to an array, one call per distinct financial year."""
+    first = years[0] if len(years) else DEFAULT_TAX_YEAR
+    if (years == first).all():
+        return fn(values, first, medicare)
+    out = np.empty(len(values))
+    for fy in np.unique(years):
+        rows = years == fy
+        out[rows] = fn(values[rows], fy, medicare[rows])
+    return out
+
+
+def pmt(rate, nper, pv):
+    """Closed-form monthly repayment (positive), equivalent to abs(npf.pmt(rate, nper, pv))."""
+    if rate == 0:
+        return pv / nper if nper else 0.0
+    factor = (1 + rate) ** nper
+    return pv * rate * factor / (factor - 1)
+
+
+def pmt_array(rate, nper, pv):
+    """Vectorized pmt; zero-rate rows fall back to straight-line repayment."""
+    rate, nper, pv = np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in (rate, nper, pv)))
+    factor = (1 + rate) ** nper
+    with np.errstate(divide="ignore", invalid="ignore"):
+        amortizing = pv * rate * factor / (factor - 1)
+        straight = np.where(nper > 0, pv / nper, 0.0)
+    return np.where(rate == 0, straight, amortizing)
+
+
+def living_expenses_total(living_expenses_json):
+    """Sums the 'Monthly Amount ($)' column of a saved living expenses JSON blob."""
+    rows = json.loads(living_expenses_json) if living_expenses_json else []
+    return float(sum(float(r.get("Monthly Amount ($)") or 0.0) for r in rows))
+
+
+# --- INPUTS ---
+@dataclass
+class PropertyInputs:
+    """Raw scenario inputs. Field names follow save_data; rates follow its units."""
+    purchase_price: float = 650000.0
+    beds: int = 2
+    baths: int = 1
+    cars: int = 1
+    s1_input: float = 3811.78
+    s1_freq: str = "Fortnightly"
+    s2_input: float = 8429.83
+    s2_freq: str = "Monthly"
+    ownership_split: float = 0.5     # Fraction owned by Investor 1
+    growth_rate: float = 0.04        # Fraction per year
+    holding_period: int = 10
+    monthly_living: float = DEFAULT_MONTHLY_LIVING  # Total of the living expenses table
+    ext_mortgage: float = 2921.0
+    ext_car_loan: float = 0.0
+    ext_cc: float = 0.0
+    ext_other: float = 0.0
+    use_eq: bool = True
+    eq_amount: float = 170000.0
+    eq_rate: float = 6.20            # Percent
+    stamp_duty: float = 34100.0
+    legal_fees: float = 1500.0
+    building_pest: float = 600.0
+    loan_setup: float = 500.0
+    buyers_agent: float = 5000.0
+    other_entry: float = 1000.0
+    monthly_rent: float = 3683.33
+    vacancy_pct: float = 5.0         # Percent
+    mgt_fee_m: float = 276.25
+    strata_m: float = 500.0
+    insurance_m: float = 45.0
+    rates_m: float = 165.0
+    maint_m: float = 150.0
+    water_m: float = 80.0
+    other_m: float = 25.0
+    div_43: float = 9000.0
+    div_40: float = 8500.0
+    lvr: float = 80.0                # Percent
+    interest_rate: float = 5.49      # Percent
+    loan_term: int = 30
+    loan_type: str = "Interest Only"
+    io_years: int = 5                # Interest-only period before reverting to P&I
+    cgt_marginal_rate: float = 35.0  # Percent
+    rent_growth: float = 0.03        # Fraction per year, for the year-by-year projection
+    expense_inflation: float = 0.03  # Fraction per year
+    discount_rate: float = 0.07      # Fraction, for NPV
+    tax_year: str = DEFAULT_TAX_YEAR  # Key into tax.TAX_SCHEDULES
+    include_medicare: bool = False
+
+    @classmethod
+    def from_save_data(cls, data):
+        """Builds inputs from a save_data dict or history row, ignoring unknown keys."""
+        known = {f.name for f in fields(cls)}
+        values = {k: v for k, v in dict(data).items() if k in known}
+        if "monthly_living" not in values and data.get("living_expenses_json"):
+            values["monthly_living"] = living_expenses_total(data["living_expenses_json"])
+        return cls(**values)
+
+    def digest(self, *extra):
+        """Stable hash of every input (plus any extra context) for cache keys."""
+        payload = json.dumps([asdict(self), list(extra)], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+
+# --- RESULTS ---
+@dataclass
+class PropertyResults:
+    """Every derived figure for one property, named as in app.py."""
+    # Acquisition
+    total_acquisition_costs: float
+    total_cost_base: float
+    # Income & expenses
+    annual_gross_income: float
+    total_monthly_expenses: float
+    total_operating_expenses: float
+    net_operating_income: float
+    gross_yield: float
+    net_yield: float
+    # Loans
+    loan_amount: float
+    monthly_io: float
+    monthly_pi: float
+    post_io_pi: float                # P&I repayment once any interest-only period ends
+    core_annual_repayment: float
+    core_annual_interest: float
+    eq_amount: float
+    eq_monthly_pi: float
+    eq_annual_repayment: float
+    eq_annual_interest: float
+    total_annual_debt_repayment: float
+    total_tax_deductible_interest: float
+    actual_cash_outlay: float
+    # Cash flow
+    pre_tax_cashflow: float
+    cash_on_cash: object  # None when 100% financed
+    # Tax & gearing
+    total_depreciation: float
+    salary_1_annual: float
+    salary_2_annual: float
+    gross_income_1: float
+    gross_income_2: float
+    total_tax_deductions: float
+    net_property_taxable_income: float
+    tax_variance_1: float
+    tax_variance_2: float
+    total_tax_variance: float
+    post_tax_cashflow: float
+    # Serviceability
+    total_existing_debt_m: float
+    total_net_salary_m: float
+    assessment_shaded_rent_m: float
+    assessment_surplus_m: float
+    shaded_rent_m: float
+    new_mortgage_m: float
+    monthly_surplus: float
+    prop_expenses_m: float
+    net_monthly_surplus: float
+    stress_core_pi: float
+    stress_eq_pi: float
+    bank_assessed_surplus: float
+    dti: float
+    # CGT
+    sale_price: float
+    capital_gain: float
+    cgt_payable: float
+    net_profit_on_sale: float
+
+    def to_dict(self):
+        return asdict(self)
+
+
+# --- EVALUATION STAGES ---
+@dataclass(frozen=True)
+class Stage:
+    """One step of evaluate(): the PropertyInputs fields it reads, the stages it builds on and its function.
+
+    fn(i, r) reads upstream values from r and returns a dict of the values it derives;
+    graph.ScenarioGraph reruns a stage only when one of these fields or upstream stages changed.
+    """
+    name: str
+    inputs: tuple
+    after: tuple
+    fn: object
+
+
+def _acquisition(i, r):
+    total_acquisition_costs = i.stamp_duty + i.legal_fees + i.building_pest + i.loan_setup + i.buyers_agent + i.other_entry
+    return {"total_acquisition_costs": total_acquisition_costs, "total_cost_base": i.purchase_price + total_acquisition_costs}
+
+
+def _income(i, r):
+    annual_gross_income = (i.monthly_rent * 12) * (1 - (i.vacancy_pct / 100))
+    total_monthly_expenses = i.mgt_fee_m + i.strata_m + i.insurance_m + i.rates_m + i.maint_m + i.water_m + i.other_m
+    total_operating_expenses = total_monthly_expenses * 12
+    net_operating_income = annual_gross_income - total_operating_expenses
+    return {
+        "annual_gross_income": annual_gross_income, "total_monthly_expenses": total_monthly_expenses,
+        "total_operating_expenses": total_operating_expenses, "net_operating_income": net_operating_income,
+        "gross_yield": (annual_gross_income / i.purchase_price) * 100 if i.purchase_price else 0.0,
+        "net_yield": (net_operating_income / i.purchase_price) * 100 if i.purchase_price else 0.0,
+    }
+
+
+def _core_loan(i, r):
+    interest_rate = i.interest_rate / 100
+    loan_amount = i.purchase_price * (i.lvr / 100)
+    # IO loans revert to P&I over the remaining term; year-1 figures come from the amortization schedule
+    io_years = min(i.io_years, i.loan_term) if i.loan_type == "Interest Only" else 0
+    pi_months = max((i.loan_term - io_years) * 12, 1)
+    core_annual_interest, core_annual_repayment, _ = year_totals(loan_amount, interest_rate, i.loan_term, io_years, 1)
+    return {
+        "interest_rate": interest_rate, "loan_amount": loan_amount, "pi_months": pi_months,
+        "monthly_io": (loan_amount * interest_rate) / 12,
+        "monthly_pi": pmt(interest_rate / 12, i.loan_term * 12, loan_amount),
+        "post_io_pi": pmt(interest_rate / 12, pi_months, loan_amount),
+        "core_annual_interest": core_annual_interest, "core_annual_repayment": core_annual_repayment,
+        "new_mortgage_m": core_annual_repayment / 12,
+    }
+
+
+def _equity_loan(i, r):
+    if not i.use_eq:
+        return {"eq_amount": 0.0, "eq_rate": 0.0, "eq_monthly_pi": 0.0, "eq_annual_interest": 0.0, "eq_annual_repayment": 0.0}
+    eq_rate = i.eq_rate / 100
+    eq_annual_interest, eq_annual_repayment, _ = year_totals(i.eq_amount, eq_rate, EQUITY_LOAN_TERM, 0, 1)
+    return {
+        "eq_amount": i.eq_amount, "eq_rate": eq_rate,
+        "eq_monthly_pi": pmt(eq_rate / 12, EQUITY_LOAN_TERM * 12, i.eq_amount),
+        "eq_annual_interest": eq_annual_interest, "eq_annual_repayment": eq_annual_repayment,
+    }
+
+
+def _financing(i, r):
+    return {
+        "total_annual_debt_repayment": r["core_annual_repayment"] + r["eq_annual_repayment"],
+        "total_tax_deductible_interest": r["core_annual_interest"] + r["eq_annual_interest"],
+        "actual_cash_outlay": r["total_cost_base"] - r["loan_amount"] - r["eq_amount"],
+    }
+
+
+def _cashflow(i, r):
+    pre_tax_cashflow = r["net_operating_income"] - r["total_annual_debt_repayment"]
+    outlay = r["actual_cash_outlay"]
+    return {"pre_tax_cashflow": pre_tax_cashflow, "cash_on_cash": (pre_tax_cashflow / outlay) * 100 if outlay > 0 else None}
+
+
+def _salaries(i, r):
+    # Gross incomes reverse-calculated from take-home pay
+    salary_1_annual = float(i.s1_input * FREQ_MAP[i.s1_freq])
+    salary_2_annual = float(i.s2_input * FREQ_MAP[i.s2_freq])
+    return {
+        "salary_1_annual": salary_1_annual, "salary_2_annual": salary_2_annual,
+        "gross_income_1": gross_from_net(salary_1_annual, i.tax_year, i.include_medicare),
+        "gross_income_2": gross_from_net(salary_2_annual, i.tax_year, i.include_medicare),
+    }
+
+
+def _tax(i, r):
+    total_depreciation = i.div_43 + i.div_40
+    total_tax_deductions = r["total_operating_expenses"] + r["total_tax_deductible_interest"] + total_depreciation
+    net_property_taxable_income = r["annual_gross_income"] - total_tax_deductions
+    property_income_1 = net_property_taxable_income * i.ownership_split
+    property_income_2 = net_property_taxable_income * (1 - i.ownership_split)
+
+    fy, medicare = i.tax_year, i.include_medicare
+    gross_income_1, gross_income_2 = r["gross_income_1"], r["gross_income_2"]
+    tax_variance_1 = income_tax(gross_income_1, fy, medicare) - income_tax(max(0, gross_income_1 + property_income_1), fy, medicare)
+    tax_variance_2 = income_tax(gross_income_2, fy, medicare) - income_tax(max(0, gross_income_2 + property_income_2), fy, medicare)
+    return {
+        "total_depreciation": total_depreciation, "total_tax_deductions": total_tax_deductions,
+        "net_property_taxable_income": net_property_taxable_income,
+        "tax_variance_1": tax_variance_1, "tax_variance_2": tax_variance_2,
+        "total_tax_variance": tax_variance_1 + tax_variance_2,
+    }
+
+
+def _post_tax(i, r):
+    return {"post_tax_cashflow": r["pre_tax_cashflow"] + r["total_tax_variance"]}
+
+
+def _serviceability(i, r):
+    total_existing_debt_m = i.ext_mortgage + i.ext_car_loan + i.ext_cc + i.ext_other
+    total_net_salary_m = (r["salary_1_annual"] + r["salary_2_annual"]) / 12
+
+    # Bank assessment view: shaded net rent, new loan assessed at P&I
+    assessment_shaded_rent_m = (r["annual_gross_income"] / 12) * RENT_SHADING
+    assessment_surplus_m = (total_net_salary_m + assessment_shaded_rent_m) - (i.monthly_living + total_existing_debt_m + r["monthly_pi"])
+
+    # Household view: shaded advertised rent, new loan at the active repayment type
+    shaded_rent_m = i.monthly_rent * RENT_SHADING
+    new_mortgage_m = r["new_mortgage_m"]
+    monthly_surplus = (total_net_salary_m + shaded_rent_m) - (i.monthly_living + total_existing_debt_m + new_mortgage_m)
+
+    # Report view: real-world and stressed surpluses including property running costs
+    prop_expenses_m = r["total_operating_expenses"] / 12
+    net_monthly_surplus = (total_net_salary_m + shaded_rent_m) - (i.monthly_living + total_existing_debt_m + new_mortgage_m + r["eq_monthly_pi"] + prop_expenses_m)
+    stress_core_pi = pmt((r["interest_rate"] + STRESS_BUFFER) / 12, r["pi_months"], r["loan_amount"])
+    stress_eq_pi = pmt((r["eq_rate"] + STRESS_BUFFER) / 12, EQUITY_LOAN_TERM * 12, r["eq_amount"]) if i.use_eq else 0.0
+    total_stressed_existing = i.ext_mortgage * EXISTING_MORTGAGE_BUFFER + (total_existing_debt_m - i.ext_mortgage)
+    bank_assessed_surplus = (total_net_salary_m + shaded_rent_m) - (i.monthly_living + total_stressed_existing + stress_core_pi + stress_eq_pi + prop_expenses_m)
+    total_net_income = r["salary_1_annual"] + r["salary_2_annual"]
+    return {
+        "total_existing_debt_m": total_existing_debt_m, "total_net_salary_m": total_net_salary_m,
+        "assessment_shaded_rent_m": assessment_shaded_rent_m, "assessment_surplus_m": assessment_surplus_m,
+        "shaded_rent_m": shaded_rent_m, "monthly_surplus": monthly_surplus, "prop_expenses_m": prop_expenses_m,
+        "net_monthly_surplus": net_monthly_surplus, "stress_core_pi": stress_core_pi, "stress_eq_pi": stress_eq_pi,
+        "bank_assessed_surplus": bank_assessed_surplus,
+        "dti": (r["loan_amount"] + r["eq_amount"]) / total_net_income if total_net_income > 0 else 0.0,
+    }
+
+
+def _cgt(i, r):
+    # CGT on sale at the end of the holding period
+    sale_price = i.purchase_price * (1 + i.growth_rate) ** i.holding_period
+    capital_gain = sale_price - i.purchase_price
+    cgt_payable = capital_gain * CGT_DISCOUNT * (i.cgt_marginal_rate / 100)
+    return {"sale_price": sale_price, "capital_gain": capital_gain, "cgt_payable": cgt_payable, "net_profit_on_sale": capital_gain - cgt_payable}
+
+
+# In dependency order; every stage comes after the stages it reads from
+EVALUATION_STAGES = (
+    Stage("acquisition", ("purchase_price", "stamp_duty", "legal_fees", "building_pest", "loan_setup", "buyers_agent", "other_entry"), (), _acquisition),
+    Stage("income", ("purchase_price", "monthly_rent", "vacancy_pct", "mgt_fee_m", "strata_m", "insurance_m", "rates_m", "maint_m", "water_m", "other_m"), (), _income),
+    Stage("core_loan", ("purchase_price", "lvr", "interest_rate", "loan_term", "loan_type", "io_years"), (), _core_loan),
+    Stage("equity_loan", ("use_eq", "eq_amount", "eq_rate"), (), _equity_loan),
+    Stage("financing", (), ("acquisition", "core_loan", "equity_loan"), _financing),
+    Stage("cashflow", (), ("income", "financing"), _cashflow),
+    Stage("salaries", ("s1_input", "s1_freq", "s2_input", "s2_freq", "tax_year", "include_medicare"), (), _salaries),
+    Stage("tax", ("div_43", "div_40", "ownership_split", "tax_year", "include_medicare"), ("income", "financing", "salaries"), _tax),
+    Stage("post_tax", (), ("cashflow", "tax"), _post_tax),
+    Stage("serviceability", ("ext_mortgage", "ext_car_loan", "ext_cc", "ext_other", "monthly_living", "monthly_rent", "use_eq"), ("income", "core_loan", "equity_loan", "salaries"), _serviceability),
+    Stage("cgt", ("purchase_price", "growth_rate", "holding_period", "cgt_marginal_rate"), (), _cgt),
+)
+RESULT_FIELDS = tuple(f.name for f in fields(PropertyResults))
+
+
+def evaluate(i):
+    """Evaluates one PropertyInputs and returns its PropertyResults."""
+    r = {}
+    for stage in EVALUATION_STAGES:
+        r.update(stage.fn(i, r))
+    return PropertyResults(**{name: r[name] for name in RESULT_FIELDS})
+
+
+def value_projection(purchase_price, growth_rate, holding_period):
+    """Year-by-year projected property values for years 1..holding_period."""
+    return [purchase_price * (1 + growth_rate) ** y for y in range(1, holding_period + 1)]
+
+
+def loan_balances(i, holding_period=None):
+    """Year-end (core, equity) loan balances for years 1..holding_period from the amortization schedule."""
+    years = np.arange(1, (holding_period or i.holding_period) + 1)
+    io_years = i.io_years if i.loan_type == "Interest Only" else 0
+    core = balance_after(i.purchase_price * (i.lvr / 100), i.interest_rate / 100, i.loan_term, io_years, years * 12)
+    if not i.use_eq:
+        return core, np.zeros(len(years))
+    return core, balance_after(i.eq_amount, i.eq_rate / 100, EQUITY_LOAN_TERM, 0, years * 12)
+
+
+# --- BATCH EVALUATION ---
+def _columns(table, n=None):
+    """Reads every PropertyInputs field from a DataFrame or dict of arrays, filling defaults."""
+    if hasattr(table, "columns"):
+        source = {c: table[c].to_numpy() for c in table.columns}
+    else:
+        source = {k: np.asarray(v) for k, v in dict(table).items()}
+    if "monthly_living" not in source and "living_expenses_json" in source:
+        source["monthly_living"] = np.array([living_expenses_total(j) for j in source["living_expenses_json"]])
+    if n is None:
+        n = max((len(v) for v in source.values() if np.ndim(v)), default=1)
+
+    cols = {}
+    for f in fields(PropertyInputs):
+        value = source.get(f.name, f.default)
+        if f.type in ("str", str):
+            cols[f.name] = np.broadcast_to(np.asarray(value, dtype=object), (n,))
+        elif f.type in ("bool", bool):
+            cols[f.name] = np.broadcast_to(np.asarray(value, dtype=bool), (n,))
+        else:
+            cols[f.name] = np.broadcast_to(np.asarray(value, dtype=float), (n,))
+    return cols, n
+
+
+def evaluate_batch(table):
+    """Evaluates many properties at once from a DataFrame or dict of equal-length arrays.
+
+    Columns use PropertyInputs field names; missing columns take the scalar defaults.
+    Returns a dict of result arrays (a DataFrame if a DataFrame was passed), matching
+    evaluate() row for row. cash_on_cash is NaN where evaluate() returns None.
+    The formulas restate EVALUATION_STAGES over arrays, so a change to one stage needs the
+    same change here; tests/test_engine.py checks the two agree on randomized inputs.
+    """
+    c, n = _columns(table)
+
+    # 1. Acquisition
+    total_acquisition_costs = c["stamp_duty"] + c["legal_fees"] + c["building_pest"] + c["loan_setup"] + c["buyers_agent"] + c["other_entry"]
+    total_cost_base = c["purchase_price"] + total_acquisition_costs
+
+    # 2. Income & Expenses
+    annual_gross_income = (c["monthly_rent"] * 12) * (1 - (c["vacancy_pct"] / 100))
+    total_monthly_expenses = c["mgt_fee_m"] + c["strata_m"] + c["insurance_m"] + c["rates_m"] + c["maint_m"] + c["water_m"] + c["other_m"]
+    total_operating_expenses = total_monthly_expenses * 12
+    net_operating_income = annual_gross_income - total_operating_expenses
+    price = c["purchase_price"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gross_yield = np.where(price != 0, (annual_gross_income / price) * 100, 0.0)
+        net_yield = np.where(price != 0, (net_operating_income / price) * 100, 0.0)
+
+    # 3. Loans (core + equity release)
+    interest_rate = c["interest_rate"] / 100
+    loan_amount = price * (c["lvr"] / 100)
+    monthly_io = (loan_amount * interest_rate) / 12
+    monthly_pi = pmt_array(interest_rate / 12, c["loan_term"] * 12, loan_amount)
+    is_io = c["loan_type"] == "Interest Only"
+    io_years = np.where(is_io, np.minimum(c["io_years"], c["loan_term"]), 0.0)
+    pi_months = np.maximum((c["loan_term"] - io_years) * 12, 1)
+    post_io_pi = pmt_array(interest_rate / 12, pi_months, loan_amount)
+    core_annual_interest, core_annual_repayment, _ = year_totals(loan_amount, interest_rate, c["loan_term"], io_years, 1)
+    new_mortgage_m = core_annual_repayment / 12
+
+    use_eq = c["use_eq"]
+    eq_amount = np.where(use_eq, c["eq_amount"], 0.0)
+    eq_rate = np.where(use_eq, c["eq_rate"] / 100, 0.0)
+    eq_monthly_pi = np.where(use_eq, pmt_array(eq_rate / 12, EQUITY_LOAN_TERM * 12, eq_amount), 0.0)
+    eq_annual_interest, eq_annual_repayment, _ = year_totals(eq_amount, eq_rate, EQUITY_LOAN_TERM, 0, 1)
+
+    total_annual_debt_repayment = core_annual_repayment + eq_annual_repayment
+    total_tax_deductible_interest = core_annual_interest + eq_annual_interest
+    actual_cash_outlay = total_cost_base - loan_amount - eq_amount
+
+    # 4. Cash Flow
+    pre_tax_cashflow = net_operating_income - total_annual_debt_repayment
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cash_on_cash = np.where(actual_cash_outlay > 0, (pre_tax_cashflow / actual_cash_outlay) * 100, np.nan)
+
+    # 5. Tax & Gearing
+    total_depreciation = c["div_43"] + c["div_40"]
+    freq_1 = np.array([FREQ_MAP[f] for f in c["s1_freq"]], dtype=float)
+    freq_2 = np.array([FREQ_MAP[f] for f in c["s2_freq"]], dtype=float)
+    salary_1_annual = c["s1_input"] * freq_1
+    salary_2_annual = c["s2_input"] * freq_2
+    years, medicare = c["tax_year"], c["include_medicare"]
+    gross_income_1 = _tax_by_year(gross_from_net, salary_1_annual, years, medicare)
+    gross_income_2 = _tax_by_year(gross_from_net, salary_2_annual, years, medicare)
+
+    total_tax_deductions = total_operating_expenses + total_tax_deductible_interest + total_depreciation
+    net_property_taxable_income = annual_gross_income - total_tax_deductions
+    property_income_1 = net_property_taxable_income * c["ownership_split"]
+    property_income_2 = net_property_taxable_income * (1 - c["ownership_split"])
+
+    tax_variance_1 = (_tax_by_year(income_tax, gross_income_1, years, medicare)
+                      - _tax_by_year(income_tax, np.maximum(0, gross_income_1 + property_income_1), years, medicare))
+    tax_variance_2 = (_tax_by_year(income_tax, gross_income_2, years, medicare)
+                      - _tax_by_year(income_tax, np.maximum(0, gross_income_2 + property_income_2), years, medicare))
+    total_tax_variance = tax_variance_1 + tax_variance_2
+    post_tax_cashflow = pre_tax_cashflow + total_tax_variance
+
+    # 6. Serviceability
+    monthly_living = c["monthly_living"]
+    ext_mortgage = c["ext_mortgage"]
+    total_existing_debt_m = ext_mortgage + c["ext_car_loan"] + c["ext_cc"] + c["ext_other"]
+    total_net_salary_m = (salary_1_annual + salary_2_annual) / 12
+
+    assessment_shaded_rent_m = (annual_gross_income / 12) * RENT_SHADING
+    assessment_surplus_m = (total_net_salary_m + assessment_shaded_rent_m) - (monthly_living + total_existing_debt_m + monthly_pi)
+
+    shaded_rent_m = c["monthly_rent"] * RENT_SHADING
+    monthly_surplus = (total_net_salary_m + shaded_rent_m) - (monthly_living + total_existing_debt_m + new_mortgage_m)
+
+    prop_expenses_m = total_operating_expenses / 12
+    net_monthly_surplus = (total_net_salary_m + shaded_rent_m) - (monthly_living + total_existing_debt_m + new_mortgage_m + eq_monthly_pi + prop_expenses_m)
+    stress_core_pi = pmt_array((interest_rate + STRESS_BUFFER) / 12, pi_months, loan_amount)
+    stress_eq_pi = np.where(use_eq, pmt_array((eq_rate + STRESS_BUFFER) / 12, EQUITY_LOAN_TERM * 12, eq_amount), 0.0)
+    total_stressed_existing = ext_mortgage * EXISTING_MORTGAGE_BUFFER + (total_existing_debt_m - ext_mortgage)
+    bank_assessed_surplus = (total_net_salary_m + shaded_rent_m) - (monthly_living + total_stressed_existing + stress_core_pi + stress_eq_pi + prop_expenses_m)
+    total_net_income = salary_1_annual + salary_2_annual
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dti = np.where(total_net_income > 0, (loan_amount + eq_amount) / total_net_income, 0.0)
+
+    # 7. CGT
+    sale_price = price * (1 + c["growth_rate"]) ** c["holding_period"]
+    capital_gain = sale_price - price
+    cgt_payable = capital_gain * CGT_DISCOUNT * (c["cgt_marginal_rate"] / 100)
+    net_profit_on_sale = capital_gain - cgt_payable
+
+    scope = locals()
+    out = {f.name: np.broadcast_to(np.asarray(scope[f.name], dtype=float), (n,)) for f in fields(PropertyResults)}
+    if hasattr(table, "columns"):
+        import pandas as pd
+        return pd.DataFrame(out, index=table.index)
+    return out
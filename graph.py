@@ -0,0 +1,68 @@
+"""Memoized dependency graph over the derived figures of one scenario.
+
+Each node is an engine.Stage: the PropertyInputs fields it reads, the nodes it builds on
+and the function that derives its values. ScenarioGraph.run() walks the nodes in order and
+reruns a node only when one of its fields changed or a node upstream of it was rerun, so a
+widget change recomputes just the figures downstream of that input.
+"""
+from engine import EVALUATION_STAGES, RESULT_FIELDS, PropertyResults, Stage, loan_balances, value_projection
+from projection import project
+
+# --- CONFIG ---
+PROJECTION_INPUTS = (
+    "purchase_price", "stamp_duty", "legal_fees", "building_pest", "loan_setup", "buyers_agent", "other_entry",
+    "monthly_rent", "vacancy_pct", "rent_growth", "mgt_fee_m", "strata_m", "insurance_m", "rates_m", "maint_m",
+    "water_m", "other_m", "expense_inflation", "lvr", "interest_rate", "loan_term", "loan_type", "io_years",
+    "use_eq", "eq_amount", "eq_rate", "s1_input", "s1_freq", "s2_input", "s2_freq", "tax_year", "include_medicare",
+    "ownership_split", "div_43", "div_40", "growth_rate", "holding_period", "cgt_marginal_rate", "discount_rate",
+)
+
+# Figures the app draws besides PropertyResults: the equity chart series and the 10-year ledger
+APP_NODES = (
+    Stage("value_projection", ("purchase_price", "growth_rate", "holding_period"), (),
+          lambda i, r: {"future_values": value_projection(i.purchase_price, i.growth_rate, i.holding_period)}),
+    Stage("loan_balances", ("purchase_price", "lvr", "interest_rate", "loan_term", "loan_type", "io_years",
+                            "use_eq", "eq_amount", "eq_rate", "holding_period"), (),
+          lambda i, r: dict(zip(("core_balances", "eq_balances"), loan_balances(i)))),
+    Stage("projection", PROJECTION_INPUTS, (), lambda i, r: {"projection": project(i)}),
+)
+
+
+class ScenarioGraph:
+    """Per-node memo of the last values each node derived, with recomputed/reused counters.
+
+    A node is reused when its input fields hold the same values as last run and none of its
+    upstream nodes were recomputed in this run. last_run lists the node names by outcome for
+    the latest run; stats keeps the totals since the graph was built.
+    """
+
+    def __init__(self, nodes=EVALUATION_STAGES + APP_NODES):
+        self.nodes = tuple(nodes)
+        self.stats = {"runs": 0, "recomputed": 0, "reused": 0}
+        self.last_run = {"recomputed": [], "reused": []}
+        self._memo = {}  # node name -> (input values, derived values)
+
+    def run(self, i):
+        """Brings every node up to date for i and returns all derived values by name."""
+        values, recomputed, reused = {}, [], []
+        for node in self.nodes:
+            key = tuple(getattr(i, name) for name in node.inputs)
+            memo = self._memo.get(node.name)
+            if memo is not None and memo[0] == key and not any(up in recomputed for up in node.after):
+                reused.append(node.name)
+            else:
+                memo = (key, node.fn(i, values))
+                self._memo[node.name] = memo
+                recomputed.append(node.name)
+            values.update(memo[1])
+
+        self.last_run = {"recomputed": recomputed, "reused": reused}
+        self.stats["runs"] += 1
+        self.stats["recomputed"] += len(recomputed)
+        self.stats["reused"] += len(reused)
+        return values
+
+    @staticmethod
+    def results(values):
+        """The PropertyResults part of run()'s values."""
+        return PropertyResults(**{name: values[name] for name in RESULT_FIELDS})
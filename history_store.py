@@ -0,0 +1,152 @@
+"""Embedded SQLite store for the property search history.
+
+Replaces property_history.csv: saving is a single upsert on the unique
+(Property Name, Listing URL) index, favourite toggles are single-row updates and
+reads are indexed queries, instead of rewriting the whole CSV every time.
+"""
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+# --- CONFIG ---
+HISTORY_DB = os.environ.get("AQI_HISTORY_DB", "property_history.sqlite3")
+LEGACY_CSV = "property_history.csv"
+NO_LINK = "No Link Provided"
+
+# Columns kept out of the params blob because they are indexed or displayed directly
+CORE_COLUMNS = ("Date of PDF", "Property Name", "Listing URL", "Favorite")
+
+
+def _json_default(value):
+    # NumPy scalars from widgets/pandas serialize as their plain Python value
+    return value.item() if hasattr(value, "item") else str(value)
+
+
+class HistoryStore:
+    """Saved property scenarios keyed by (Property Name, Listing URL)."""
+
+    def __init__(self, path=HISTORY_DB):
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS history ("
+                "id INTEGER PRIMARY KEY, property_name TEXT NOT NULL, listing_url TEXT NOT NULL, "
+                "saved_at TEXT NOT NULL, favorite INTEGER NOT NULL DEFAULT 0, params TEXT NOT NULL, "
+                "UNIQUE(property_name, listing_url))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_history_order ON history(favorite DESC, saved_at DESC)")
+            self._local.conn = conn
+        return conn
+
+    def save(self, name, url, params, saved_at=None, favorite=None):
+        """Inserts or replaces the entry for (name, url). An existing favourite flag is kept unless given."""
+        if not url or str(url).strip() == "":
+            url = NO_LINK
+        saved_at = saved_at or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        params = {k: v for k, v in dict(params).items() if k not in CORE_COLUMNS}
+        self._conn().execute(
+            "INSERT INTO history(property_name, listing_url, saved_at, favorite, params) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(property_name, listing_url) DO UPDATE SET "
+            "saved_at = excluded.saved_at, params = excluded.params, "
+            "favorite = CASE WHEN ? IS NULL THEN history.favorite ELSE excluded.favorite END",
+            (name, url, saved_at, int(bool(favorite)), json.dumps(params, default=_json_default), favorite),
+        )
+
+    def set_favorite(self, entry_id, favorite):
+        self._conn().execute("UPDATE history SET favorite = ? WHERE id = ?", (int(bool(favorite)), entry_id))
+
+    def toggle_favorite(self, entry_id):
+        self._conn().execute("UPDATE history SET favorite = 1 - favorite WHERE id = ?", (entry_id,))
+
+    def entries(self):
+        """All entries, favourites first then newest, as flat dicts in the legacy CSV column layout."""
+        rows = self._conn().execute(
+            "SELECT * FROM history ORDER BY favorite DESC, saved_at DESC"
+        ).fetchall()
+        return [self._to_entry(r) for r in rows]
+
+    @staticmethod
+    def _filter(search=None, favorites_only=False):
+        clauses, args = [], []
+        if search:
+            clauses.append("(property_name LIKE ? ESCAPE '\\' OR listing_url LIKE ? ESCAPE '\\')")
+            pattern = "%" + search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            args += [pattern, pattern]
+        if favorites_only:
+            clauses.append("favorite = 1")
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", args
+
+    def page(self, offset=0, limit=25, search=None, favorites_only=False):
+        """One page of lightweight rows (no params blob), favourites first then newest."""
+        where, args = self._filter(search, favorites_only)
+        rows = self._conn().execute(
+            "SELECT id, property_name, listing_url, saved_at, favorite FROM history" + where +
+            " ORDER BY favorite DESC, saved_at DESC LIMIT ? OFFSET ?",
+            args + [limit, offset],
+        ).fetchall()
+        return [
+            {"id": r["id"], "Property Name": r["property_name"], "Listing URL": r["listing_url"],
+             "Date of PDF": r["saved_at"], "Favorite": bool(r["favorite"])}
+            for r in rows
+        ]
+
+    def get(self, entry_id):
+        row = self._conn().execute("SELECT * FROM history WHERE id = ?", (entry_id,)).fetchone()
+        return self._to_entry(row) if row else None
+
+    def count(self, search=None, favorites_only=False):
+        where, args = self._filter(search, favorites_only)
+        return self._conn().execute("SELECT COUNT(*) FROM history" + where, args).fetchone()[0]
+
+    def clear(self):
+        self._conn().execute("DELETE FROM history")
+
+    @staticmethod
+    def _to_entry(row):
+        entry = {
+            "id": row["id"],
+            "Date of PDF": row["saved_at"],
+            "Property Name": row["property_name"],
+            "Listing URL": row["listing_url"],
+            "Favorite": bool(row["favorite"]),
+        }
+        entry.update(json.loads(row["params"]))
+        return entry
+
+    def migrate_csv(self, csv_path=LEGACY_CSV):
+        """One-off import of a legacy history CSV; the file is renamed afterwards so it only runs once."""
+        if not os.path.exists(csv_path):
+            return 0
+        import pandas as pd
+        try:
+            legacy = pd.read_csv(csv_path)
+        except pd.errors.EmptyDataError:
+            legacy = pd.DataFrame()
+
+        conn = self._conn()
+        conn.execute("BEGIN")
+        try:
+            for record in legacy.to_dict("records"):
+                record = {k: v for k, v in record.items() if not pd.isna(v)}
+                self.save(
+                    record.get("Property Name", ""),
+                    record.get("Listing URL", NO_LINK),
+                    record,
+                    saved_at=record.get("Date of PDF"),
+                    favorite=bool(record.get("Favorite", False)),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        os.replace(csv_path, csv_path + ".migrated")
+        return len(legacy)
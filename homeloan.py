@@ -1,119 +1,466 @@
+"""Investment portfolio tracker workbook.
+
+    python homeloan.py [Investment_Portfolio_Tracker.xlsx] [--portfolio portfolio.json] [--history ID ...]
+
+Exports a Portfolio (the holdings file, plus any saved history entries) to a workbook
+with a formula-driven dashboard and one sheet each for loans, properties and cash flow.
+The workbook is written in openpyxl's write-only mode: rows stream to the file as they
+are appended and every styled cell points at a shared named style, so memory stays flat.
+20k properties (40k loans, 20k cash-flow rows) take about 14s here, nearly all of it in
+openpyxl's per-cell XML serialization: the same rows written as plain values with no styles
+already take about 8s, so this export will not reach a few seconds on openpyxl alone.
+
+read_workbook() goes the other way: it streams a tracker's values in read-only mode,
+resolves the SUM, reference and arithmetic formulas written here, and returns the
+Portfolio; scenario_form() turns one of its properties into the app's sidebar inputs.
+"""
+import argparse
+import ast
+import operator
 import os
-import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+import re
+import sys
+import time
+from dataclasses import dataclass
+
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font, NamedStyle, PatternFill
+from openpyxl.utils import column_index_from_string
+
+from portfolio import PORTFOLIO_PATH, Portfolio
+from session_model import ScenarioForm
+
+# --- CONFIG ---
+TRACKER_PATH = os.environ.get("AQI_TRACKER_PATH", "Investment_Portfolio_Tracker.xlsx")
+CURRENCY_FORMAT = '"$"#,##0.00'
+PERCENT_FORMAT = '0.00%'
+
+# Sheet headers and the Portfolio columns under them; read_workbook matches columns by these headers
+LOAN_COLUMNS = {
+    "Loan ID": "loan_id", "Purpose": "purpose", "Loan Amount": "amount", "Interest Rate": "interest_rate",
+    "Type": "loan_type", "Monthly Pmt": "monthly_pmt", "IO Expiry": "io_expiry", "Lender": "lender",
+    "IO Years": "io_years", "Term (Years)": "term_years", "Secured By": "secured_by",
+    "Interest Deductible Against": "deductible_against",
+}
+PROPERTY_COLUMNS = {
+    "Property": "name", "Purchase Price": "purchase_price", "Current Value": "current_value",
+    "Purchase Date": "purchase_date", "Stamp Duty": "stamp_duty", "Owner Occupied": "owner_occupied",
+    "Monthly Rent": "monthly_rent", "Monthly OpEx": "monthly_opex", "Depreciation": "depreciation",
+    "Ownership Split": "ownership_split",
+}
+CASH_FLOW_HEADERS = ["Property", "Monthly Rent", "Monthly OpEx", "Monthly Repayments", "Net Monthly Cash Flow", "Taxable Income (Annual)"]
+
+
+# --- STYLES ---
+def _named_styles():
+    """The workbook's shared styles; cells refer to these by name instead of carrying their own."""
+    header = NamedStyle(name="Tracker Header", font=Font(bold=True, color="FFFFFF", size=11),
+                        fill=PatternFill("solid", fgColor="2F75B5"),  # Blue
+                        alignment=Alignment(horizontal="center", vertical="center"))
+    title = NamedStyle(name="Tracker Title", font=Font(bold=True, size=14))
+    label = NamedStyle(name="Tracker Label", font=Font(bold=True))
+    currency = NamedStyle(name="Tracker Currency", number_format=CURRENCY_FORMAT)
+    percent = NamedStyle(name="Tracker Percent", number_format=PERCENT_FORMAT)
+    return header, title, label, currency, percent
+
+
+class _SheetWriter:
+    """Appends rows to a write-only sheet; styles maps column index to a named style.
+
+    A write-only sheet serializes each row as it is appended, so every styled column reuses
+    one WriteOnlyCell carrying its named style and only its value changes from row to row.
+    """
+
+    def __init__(self, wb, title, widths=None):
+        self.ws = wb.create_sheet(title)
+        self.rows = 0
+        self._cells = {}  # (column, style name) -> styled cell
+        for column, width in (widths or {}).items():
+            self.ws.column_dimensions[column].width = width
+
+    def _cell(self, column, style):
+        cell = self._cells.get((column, style))
+        if cell is None:
+            cell = self._cells[(column, style)] = WriteOnlyCell(self.ws)
+            cell.style = style
+        return cell
+
+    def append(self, values=(), styles=None):
+        values = list(values)
+        for column, style in (styles or {}).items():
+            if column < len(values) and values[column] is not None:
+                cell = self._cell(column, style)
+                cell.value = values[column]
+                values[column] = cell
+        self.ws.append(values)
+        self.rows += 1
+
+    def header(self, headers):
+        self.append(headers, dict.fromkeys(range(len(headers)), "Tracker Header"))
+
+
+# --- EXPORT ---
+def export_workbook(portfolio, output=TRACKER_PATH, household=None):
+    """Writes the tracker workbook for a Portfolio to output (a path or a binary file object)."""
+    wb = Workbook(write_only=True)
+    for style in _named_styles():
+        wb.add_named_style(style)
+
+    n_props, n_loans = len(portfolio.properties), len(portfolio.loans)
+    prop_last_row, loan_last_row = n_props + 1, n_loans + 1
+    # Cash flow has a row per property, plus one for loans linked to none (see Portfolio.summarize)
+    flow = portfolio.summarize(household).per_property
+    flow_last_row = len(flow) + 1
+    flow_total_row = flow_last_row + 2
+    currency, percent, label = "Tracker Currency", "Tracker Percent", "Tracker Label"
+
+    # --- SHEET 1: DASHBOARD ---
+    ws1 = _SheetWriter(wb, "Portfolio Dashboard", {"B": 24, "E": 24, "C": 16, "F": 16})
+    ws1.append()
+    ws1.append([None, "PORTFOLIO SUMMARY"], {1: "Tracker Title"})
+    ws1.append()
+    dashboard = [
+        ("Total Property Value", f"=SUM('Property Details'!C2:C{prop_last_row})", currency,
+         "Monthly Rental Income", f"='Cash Flow'!B{flow_total_row}"),
+        ("Total Debt Position", f"=SUM('Loan Manager'!C2:C{loan_last_row})", currency,
+         "Monthly Mortgage Cost", f"='Cash Flow'!D{flow_total_row}"),
+        ("Net Equity", "=C4-C5", currency, "Monthly OpEx (Est.)", f"='Cash Flow'!C{flow_total_row}"),
+        ("Overall LVR", "=C5/C4", percent, "Net Monthly Cashflow", "=F4-(F5+F6)"),
+    ]
+    for left_label, left_value, left_style, right_label, right_value in dashboard:
+        ws1.append([None, left_label, left_value, None, right_label, right_value], {2: left_style, 5: currency})
+
+    # --- SHEET 2: LOAN MANAGER ---
+    ws2 = _SheetWriter(wb, "Loan Manager", {"A": 22, "B": 26, "H": 18, "K": 22, "L": 22})
+    ws2.header(list(LOAN_COLUMNS))
+    # Linked properties are written by name so the sheet reads (and re-imports) without row numbers
+    names = portfolio.properties["name"].tolist()
+    def property_name(index):
+        return names[index] if 0 <= index < n_props else ""
+    loans = portfolio.loans.assign(
+        monthly_pmt=portfolio.monthly_repayments().round(2),
+        secured_by=portfolio.loans["secured_by"].map(property_name),
+        deductible_against=portfolio.loans["deductible_against"].map(property_name),
+    )
+    loan_styles = {2: currency, 3: percent, 5: currency}
+    for row in loans[list(LOAN_COLUMNS.values())].itertuples(index=False):
+        ws2.append(row, loan_styles)
+    ws2.append()
+    ws2.append([None, "TOTALS", f"=SUM(C2:C{loan_last_row})", None, None, f"=SUM(F2:F{loan_last_row})"],
+               {1: label, 2: currency, 5: currency})
+
+    # --- SHEET 3: PROPERTY DETAILS ---
+    ws3 = _SheetWriter(wb, "Property Details", {"A": 26})
+    ws3.header(list(PROPERTY_COLUMNS))
+    property_styles = {1: currency, 2: currency, 4: currency, 6: currency, 7: currency, 8: currency, 9: percent}
+    for row in portfolio.properties[list(PROPERTY_COLUMNS.values())].itertuples(index=False):
+        ws3.append(row, property_styles)
+
+    # --- SHEET 4: CASH FLOW ---
+    ws4 = _SheetWriter(wb, "Cash Flow", {"A": 26})
+    ws4.header(CASH_FLOW_HEADERS)
+    flow_styles = dict.fromkeys(range(1, 6), currency)
+    for row in flow[["Property", "Monthly Rent", "Monthly OpEx", "Monthly Repayments", "Net Monthly Cash Flow", "Taxable Income"]].itertuples(index=False):
+        ws4.append(row, flow_styles)
+    ws4.append()
+    ws4.append(["TOTALS"] + [f"=SUM({c}2:{c}{flow_last_row})" for c in "BCDEF"], {0: label, **flow_styles})
+
+    wb.save(output)
+    return n_props, n_loans
+
+
+# --- IMPORT ---
+_CELL = r"(?:'([^']+)'!|([A-Za-z0-9_.]+)!)?\$?([A-Z]{1,3})\$?(\d+)"
+_SUM = re.compile(rf"SUM\({_CELL}:\$?([A-Z]{{1,3}})\$?(\d+)\)", re.I)
+_REF = re.compile(_CELL)
+_ARITHMETIC = re.compile(r"[0-9.eE+\-*/() ]+")
+_OPERATORS = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv}
+_IO_TYPE = re.compile(r"IO \((\d+)\s*yr\)", re.I)
+_DASHBOARD = "Portfolio Dashboard"
+_MAX_COLUMN, _MAX_ROW = 16384, 1048576  # Excel's sheet limits
+
+
+@dataclass
+class TrackerImport:
+    portfolio: Portfolio
+    totals: dict                     # Dashboard label -> resolved value
+
+
+def _number(value):
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else 0.0
+
 
-# --- CONFIGURATION ---
-# Target Directory requested
-output_dir = "/home/andrew/.ssh/Trading/_MelbInvestments/output"
-file_name = "Investment_Portfolio_Tracker.xlsx"
-full_path = os.path.join(output_dir, file_name)
+def _arithmetic(node):
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+        return node.value
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        value = _arithmetic(node.operand)
+        return -value if isinstance(node.op, ast.USub) else value
+    if isinstance(node, ast.BinOp) and type(node.op) in _OPERATORS:
+        return _OPERATORS[type(node.op)](_arithmetic(node.left), _arithmetic(node.right))
+    raise ValueError("Unsupported formula")
 
-# Ensure directory exists
-if not os.path.exists(output_dir):
+
+class _Cells:
+    """Formula cells and the rows of plain values they reference, read from a read-only workbook.
+
+    scan() streams a sheet, keeping every formula but only the rows (up to the last column) that
+    wanted ranges cover. load() follows the formulas to the ranges they reach, scans referenced
+    sheets not read yet, and rereads only the ranges wanted after their sheet streamed past (a
+    TOTALS row summing the rows above it). get() resolves a formula on first read; anything
+    beyond SUM, references and + - * / is None.
+    """
+
+    def __init__(self, wb):
+        self.wb = wb
+        self.formulas = {}       # (sheet, column, row) -> formula text without "="
+        self.rows = {}           # sheet -> {row number: leading values of a wanted row}
+        self._wanted = {}        # sheet -> [(first_col, last_col, first_row, last_row)]
+        self._scanned = set()
+        self._pending = {}       # sheet -> ranges wanted after the sheet was scanned
+        self._resolved = {}
+
+    def want(self, sheet, first_col, last_col, first_row, last_row):
+        rects = self._wanted.setdefault(sheet, [])
+        if any(c1 <= first_col and last_col <= c2 and r1 <= first_row and last_row <= r2 for c1, c2, r1, r2 in rects):
+            return
+        rect = (first_col, last_col, first_row, last_row)
+        rects.append(rect)
+        if sheet in self._scanned:
+            self._pending.setdefault(sheet, []).append(rect)
+
+    def _keep(self, sheet, row_number, row, rects):
+        width = max((r[1] for r in rects if r[2] <= row_number <= r[3]), default=0)
+        if width:
+            kept = self.rows.setdefault(sheet, {})
+            values = tuple(row[:width])
+            if len(values) > len(kept.get(row_number, ())):
+                kept[row_number] = values
+
+    def scan(self, sheet):
+        """Yields (row number, row values) for a sheet while keeping its formulas and wanted rows."""
+        if sheet not in self.wb.sheetnames:
+            return
+        self._scanned.add(sheet)
+        rects = self._wanted.get(sheet, [])
+        for row_number, row in enumerate(self.wb[sheet].iter_rows(values_only=True), start=1):
+            for column, value in enumerate(row, start=1):
+                if isinstance(value, str) and value.startswith("="):
+                    self.formulas[(sheet, column, row_number)] = value[1:].strip()
+            self._keep(sheet, row_number, row, rects)
+            yield row_number, row
+
+    def reach(self, keys):
+        """Wants every range the formulas at keys reference, following formulas inside those ranges."""
+        stack, seen = list(keys), set()
+        while stack:
+            key = stack.pop()
+            if key in seen or key not in self.formulas:
+                continue
+            seen.add(key)
+            for sheet, first_col, last_col, first_row, last_row in _references(key[0], self.formulas[key]):
+                self.want(sheet, first_col, last_col, first_row, last_row)
+                stack.extend(k for k in self.formulas if k[0] == sheet and first_col <= k[1] <= last_col and first_row <= k[2] <= last_row)
+
+    def load(self, keys):
+        """Reads whatever the formulas at keys need that the scans so far did not keep."""
+        while True:
+            self.reach(keys)
+            unscanned = [s for s in self._wanted if s not in self._scanned and s in self.wb.sheetnames]
+            if not unscanned:
+                break
+            for sheet in unscanned:
+                # A referenced total usually sums the column above it: keep that as the sheet streams past
+                for first_col, last_col, _, last_row in list(self._wanted[sheet]):
+                    self.want(sheet, first_col, last_col, 1, last_row)
+                for _ in self.scan(sheet):
+                    pass
+        for sheet, rects in self._pending.items():
+            first_row, last_row = min(r[2] for r in rects), max(r[3] for r in rects)
+            rows = self.wb[sheet].iter_rows(min_row=first_row, max_row=last_row, values_only=True)
+            for row_number, row in enumerate(rows, start=first_row):
+                self._keep(sheet, row_number, row, rects)
+        self._pending = {}
+
+    def get(self, sheet, column, row):
+        key = (sheet, column, row)
+        if key not in self.formulas:
+            values = self.rows.get(sheet, {}).get(row, ())
+            return values[column - 1] if column <= len(values) else None
+        if key not in self._resolved:
+            self._resolved[key] = None  # A circular reference resolves to None instead of recursing
+            self._resolved[key] = self._formula(sheet, self.formulas[key])
+        return self._resolved[key]
+
+    def _formula(self, sheet, text):
+        ref = _REF.fullmatch(text)
+        if ref:
+            return self.get(ref[1] or ref[2] or sheet, column_index_from_string(ref[3]), int(ref[4]))
+
+        def range_sum(m):
+            target = m[1] or m[2] or sheet
+            first_col, last_col = sorted((column_index_from_string(m[3]), column_index_from_string(m[5])))
+            first_row, last_row = sorted((int(m[4]), int(m[6])))
+            return repr(sum(_number(self.get(target, c, r)) for r in range(first_row, last_row + 1) for c in range(first_col, last_col + 1)))
+
+        def reference(m):
+            return repr(_number(self.get(m[1] or m[2] or sheet, column_index_from_string(m[3]), int(m[4]))))
+
+        expression = _REF.sub(reference, _SUM.sub(range_sum, text))
+        if not _ARITHMETIC.fullmatch(expression):
+            return None
+        try:
+            return float(_arithmetic(ast.parse(expression, mode="eval").body))
+        except (SyntaxError, ValueError, ZeroDivisionError):
+            return None
+
+    def columns(self, sheet, columns, key):
+        """The rows under the sheet's header row as {Portfolio column: [values]}, streamed; rows with a blank
+        key or TOTALS are skipped and blank cells are None.
+
+        Also returns the (column, position, cell) of every formula value, to fill in with get() after load().
+        """
+        rows = self.scan(sheet)
+        _, header = next(rows, (None, ()))
+        index = {columns[str(h).strip()]: n for n, h in enumerate(header) if h is not None and str(h).strip() in columns}
+        if key not in index:
+            return {}, []
+        table, formulas = {field: [] for field in index}, []
+        for row_number, row in rows:
+            name = row[index[key]] if index[key] < len(row) else None
+            if name is None or str(name).strip() in ("", "TOTALS"):
+                continue
+            for field, n in index.items():
+                value = row[n] if n < len(row) else None
+                if isinstance(value, str) and value.startswith("="):
+                    formulas.append((field, len(table[field]), (sheet, n + 1, row_number)))
+                table[field].append(value)
+        return table, formulas
+
+
+def _references(sheet, text):
+    """(sheet, first_col, last_col, first_row, last_row) for every SUM range and cell a formula refers to."""
+    for m in _SUM.finditer(text):
+        first_col, last_col = sorted((column_index_from_string(m[3]), column_index_from_string(m[5])))
+        first_row, last_row = sorted((int(m[4]), int(m[6])))
+        yield m[1] or m[2] or sheet, first_col, last_col, first_row, last_row
+    for m in _REF.finditer(_SUM.sub("", text)):
+        column, row = column_index_from_string(m[3]), int(m[4])
+        yield m[1] or m[2] or sheet, column, column, row, row
+
+
+def read_workbook(source):
+    """Reads a tracker workbook (path or binary file object) written here or by the original homeloan.py."""
+    wb = load_workbook(source, read_only=True, data_only=False, keep_links=False)
+    try:
+        cells = _Cells(wb)
+        # The dashboard is a few rows, kept whole; the ranges it sums are kept as their sheets stream past
+        cells.want(_DASHBOARD, 1, _MAX_COLUMN, 1, _MAX_ROW)
+        dashboard = list(cells.scan(_DASHBOARD))
+        dashboard_formulas = list(cells.formulas)
+        cells.reach(dashboard_formulas)
+        properties, property_formulas = cells.columns("Property Details", PROPERTY_COLUMNS, "name")
+        # Monthly Pmt is derived again from amount, rate and type
+        loan_columns = {header: field for header, field in LOAN_COLUMNS.items() if field != "monthly_pmt"}
+        loans, loan_formulas = cells.columns("Loan Manager", loan_columns, "loan_id")
+        cells.load(dashboard_formulas + [cell for _, _, cell in property_formulas + loan_formulas])
+    finally:
+        wb.close()
+    for table, formulas in ((properties, property_formulas), (loans, loan_formulas)):
+        for field, position, cell in formulas:
+            table[field][position] = cells.get(*cell)
+    totals = {}
+    for row_number, row in dashboard:
+        for n, label in enumerate(row[:-1]):
+            if isinstance(label, str) and not label.startswith("=") and row[n + 1] is not None:
+                totals[label] = cells.get(_DASHBOARD, n + 2, row_number)
+    del cells  # The kept rows are not needed once every formula is resolved
+
+    positions = {}
+    for n, name in enumerate(properties.get("name", ())):
+        positions.setdefault(str(name), n)
+    for link in ("secured_by", "deductible_against"):
+        if link in loans:
+            loans[link] = [-1 if value is None else positions.get(str(value), -1) for value in loans[link]]
+    if "loan_type" in loans:
+        io_types = [_IO_TYPE.search(str(value)) for value in loans["loan_type"]]
+        loans["io_years"] = [int(m[1]) if value is None and m else value
+                             for value, m in zip(loans.get("io_years", [None] * len(io_types)), io_types)]
+    return TrackerImport(Portfolio(properties, loans), totals)
+
+
+def scenario_form(portfolio, index, form=None):
+    """The sidebar inputs for one portfolio property: price, stamp duty, rent and split, plus its core and equity loans.
+
+    Other inputs (itemised running costs, depreciation split, incomes) are kept from form.
+    """
+    form = ScenarioForm.from_bytes(form.to_bytes()) if form is not None else ScenarioForm()
+    p = portfolio.properties.iloc[index]
+    loans = portfolio.loans
+    values = {
+        "prop_name": p["name"], "price": p["purchase_price"], "stamp_duty": p["stamp_duty"],
+        "split": int(p["ownership_split"] * 100), "is_ai_estimated": False,
+    }
+    if p["monthly_rent"] > 0 and form.vacancy_pct < 100:
+        values["monthly_rent"] = round(p["monthly_rent"] / (1 - form.vacancy_pct / 100), 2)  # The portfolio holds rent after vacancy
+
+    # The core loan: secured by and deductible against the property; an owner-occupied home's loan is
+    # deductible against nothing, and an equity release it secures belongs to the property it funded
+    secured, deductible = loans["secured_by"] == index, loans["deductible_against"]
+    core = next((c for c in (loans[secured & (deductible == index)], loans[secured & deductible.isin([index, -1])], loans[secured]) if len(c)), None)
+    if core is None:
+        values["lvr"] = 0
+    else:
+        loan = core.iloc[0]
+        io_years = int(loan["io_years"])
+        values.update(
+            lvr=round(loan["amount"] / p["purchase_price"] * 100) if p["purchase_price"] else form.lvr,
+            interest_rate=round(loan["interest_rate"] * 100, 4), loan_term=loan["term_years"],
+            loan_type="Interest Only" if io_years > 0 else "Principal & Interest",
+            io_years=io_years if io_years > 0 else form.io_years,
+        )
+    equity = loans[(loans["deductible_against"] == index) & (loans["secured_by"] != index)]
+    values["use_eq"] = bool(len(equity))
+    if len(equity):
+        values.update(eq_amount=equity["amount"].sum(), eq_rate=round(equity.iloc[0]["interest_rate"] * 100, 4))
+    form.update(**values)
+    return form
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the investment portfolio tracker workbook.")
+    parser.add_argument("output", nargs="?", default=TRACKER_PATH, help="Workbook path (.xlsx)")
+    parser.add_argument("--portfolio", default=PORTFOLIO_PATH, help="Holdings file (portfolio.json)")
+    parser.add_argument("--history", nargs="*", type=int, metavar="ID", help="Also add these saved history entries")
+    args = parser.parse_args(argv)
+
+    portfolio = Portfolio.load(args.portfolio)
+    if args.history:
+        from engine import PropertyInputs
+        from history_store import HistoryStore
+        store = HistoryStore()
+        entries = [e for e in (store.get(entry_id) for entry_id in args.history) if e is not None]
+        portfolio = Portfolio.from_scenarios(
+            [PropertyInputs.from_save_data(e) for e in entries], [e["Property Name"] for e in entries], base=portfolio
+        )
+
+    output_dir = os.path.dirname(os.path.abspath(args.output))
     try:
         os.makedirs(output_dir, exist_ok=True)
-        print(f"Created directory: {output_dir}")
     except PermissionError:
-        print(f"Error: Permission denied creating {output_dir}. Check your .ssh folder permissions.")
-        exit()
+        print(f"Error: Permission denied creating {output_dir}.")
+        return 1
 
-# --- CREATE WORKBOOK ---
-wb = openpyxl.Workbook()
+    started = time.perf_counter()
+    try:
+        n_props, n_loans = export_workbook(portfolio, args.output)
+    except Exception as e:
+        print(f"Error saving file: {e}")
+        return 1
+    print(f"Success! {n_props} properties and {n_loans} loans saved to: {args.output} ({time.perf_counter() - started:.2f}s)")
+    return 0
 
-# --- STYLES ---
-header_font = Font(bold=True, color="FFFFFF", size=11)
-header_fill = PatternFill("solid", fgColor="2F75B5")  # Blue
-currency_format = '"$"#,##0.00'
-percent_format = '0.00%'
-center_align = Alignment(horizontal='center', vertical='center')
-
-def style_range(ws, cell_range, fill=None, font=None, alignment=None):
-    rows = ws[cell_range]
-    for row in rows:
-        for cell in row:
-            if fill: cell.fill = fill
-            if font: cell.font = font
-            if alignment: cell.alignment = alignment
-
-# --- SHEET 1: DASHBOARD ---
-ws1 = wb.active
-ws1.title = "Portfolio Dashboard"
-ws1['B2'] = "PORTFOLIO SUMMARY"
-ws1['B2'].font = Font(bold=True, size=14)
-
-# Dashboard Formulas
-labels = {
-    'B4': "Total Property Value", 'C4': "=SUM('Property Details'!C4:C5)",
-    'B5': "Total Debt Position",  'C5': "=SUM('Loan Manager'!C4:C6)",
-    'B6': "Net Equity",           'C6': "=C4-C5",
-    'B7': "Overall LVR",          'C7': "=C5/C4",
-    'E4': "Monthly Rental Income",'F4': "='Cash Flow'!C4",
-    'E5': "Monthly Mortgage Cost",'F5': "=SUM('Loan Manager'!F4:F6)",
-    'E6': "Monthly OpEx (Est.)",  'F6': "='Cash Flow'!C14",
-    'E7': "Net Monthly Cashflow", 'F7': "=F4-(F5+F6)"
-}
-for cell, val in labels.items():
-    ws1[cell] = val
-
-for c in ['C4','C5','C6','F4','F5','F6','F7']: ws1[c].number_format = currency_format
-ws1['C7'].number_format = percent_format
-
-# --- SHEET 2: LOAN MANAGER ---
-ws2 = wb.create_sheet("Loan Manager")
-ws2.append(["Loan ID", "Purpose", "Loan Amount", "Interest Rate", "Type", "Monthly Pmt", "IO Expiry", "Lender"])
-
-loans = [
-    ["Loan 1.1", "Home Refinance (OO)", 445826, 0.0525, "P&I", 2461.87, "N/A", "Mortgage Choice"],
-    ["Loan 1.2", "Inv Deposit (Cash Out)", 170000, 0.0549, "P&I", 964.17, "N/A", "Mortgage Choice"],
-    ["Loan 2.1", "Investment Purchase", 520000, 0.0564, "IO (5yr)", 2444.00, "Jan-2031", "Mortgage Choice"]
-]
-for row in loans: ws2.append(row)
-
-# Totals
-ws2['B6'] = "TOTALS"; ws2['B6'].font = Font(bold=True)
-ws2['C6'] = "=SUM(C2:C5)"; ws2['C6'].number_format = currency_format
-ws2['F6'] = "=SUM(F2:F5)"; ws2['F6'].number_format = currency_format
-
-style_range(ws2, "A1:H1", fill=header_fill, font=header_font, alignment=center_align)
-for row in range(2, 6):
-    ws2[f'C{row}'].number_format = currency_format
-    ws2[f'D{row}'].number_format = percent_format
-    ws2[f'F{row}'].number_format = currency_format
-
-# --- SHEET 3: PROPERTY DETAILS ---
-ws3 = wb.create_sheet("Property Details")
-ws3.append(["Property", "Purchase Price", "Current Value", "Purchase Date", "Stamp Duty"])
-props = [
-    ["Home (Owner Occ)", 1200000, 1200000, "Existing", 0],
-    ["Investment 1", 650000, 650000, "Jan-2026", 34070]
-]
-for row in props: ws3.append(row)
-
-style_range(ws3, "A1:E1", fill=header_fill, font=header_font)
-for col in ['B', 'C', 'E']:
-    for r in range(2,4): ws3[f'{col}{r}'].number_format = currency_format
-
-# --- SHEET 4: CASH FLOW ---
-ws4 = wb.create_sheet("Cash Flow")
-ws4.column_dimensions['B'].width = 25
-ws4['B2'] = "INCOME"; ws4['B2'].font = Font(bold=True)
-ws4['B3'] = "Weekly Rent (Est.)"; ws4['C3'] = 650
-ws4['B4'] = "Monthly Rent"; ws4['C4'] = "=(C3*52)/12"
-
-ws4['B6'] = "EXPENSES (Monthly)"; ws4['B6'].font = Font(bold=True)
-expenses = [
-    ("Council Rates", 200), ("Water Rates", 100), ("Body Corp", 0),
-    ("Mgmt Fees (8%)", "=C4*0.08"), ("Insurance", 150), ("Maintenance", 100)
-]
-r = 7
-for name, val in expenses:
-    ws4[f'B{r}'] = name; ws4[f'C{r}'] = val
-    r += 1
-ws4[f'B{r}'] = "TOTAL OPEX"; ws4[f'C{r}'] = f"=SUM(C7:C{r-1})"
-
-# --- SAVE FILE ---
-try:
-    wb.save(full_path)
-    print(f"Success! File saved to: {full_path}")
-except Exception as e:
-    print(f"Error saving file: {e}")
\ No newline at end of file
+
+if __name__ == "__main__":
+    sys.exit(main())
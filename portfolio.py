@@ -0,0 +1,240 @@
+"""Household portfolio of any number of properties and loans.
+
+Holdings are stored column-wise (one array per attribute) so totals, per-property
+debt and interest, serviceability and combined negative gearing are a few
+vectorized reductions however many holdings there are. The same holdings file
+(portfolio.json) drives homeloan.py's tracker workbook and the app's Portfolio tab.
+"""
+import json
+import os
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from amortization import year_totals
+from engine import (
+    EQUITY_LOAN_TERM, FREQ_MAP, RENT_SHADING, STRESS_BUFFER, pmt_array,
+)
+from tax import DEFAULT_TAX_YEAR, gross_from_net, income_tax
+
+# --- CONFIG ---
+PORTFOLIO_PATH = os.environ.get("AQI_PORTFOLIO_PATH", "portfolio.json")
+
+# Column defaults; rates are fractions, indexes refer to rows of the properties table (-1 = none)
+PROPERTY_COLUMNS = {
+    "name": "", "purchase_price": 0.0, "current_value": 0.0, "purchase_date": "", "stamp_duty": 0.0,
+    "owner_occupied": False, "monthly_rent": 0.0, "monthly_opex": 0.0, "depreciation": 0.0,
+    "ownership_split": 0.5,
+}
+LOAN_COLUMNS = {
+    "loan_id": "", "purpose": "", "amount": 0.0, "interest_rate": 0.0, "loan_type": "P&I",
+    "io_years": 0, "term_years": 30, "io_expiry": "N/A", "lender": "",
+    "secured_by": -1, "deductible_against": -1,
+}
+
+
+@dataclass
+class Household:
+    """Take-home incomes and commitments the portfolio is serviced from."""
+    s1_net_annual: float = 0.0
+    s2_net_annual: float = 0.0
+    monthly_living: float = 0.0
+    other_debts_m: float = 0.0       # Commitments outside the portfolio (car loans, cards)
+    tax_year: str = DEFAULT_TAX_YEAR
+    include_medicare: bool = False
+
+
+@dataclass
+class PortfolioSummary:
+    total_value: float
+    total_debt: float
+    net_equity: float
+    lvr: float                       # Fraction
+    monthly_rent: float
+    monthly_repayments: float
+    monthly_opex: float
+    net_monthly_cashflow: float
+    annual_deductible_interest: float
+    net_taxable_property_income: float
+    tax_refund: float                # Combined negative-gearing effect for both investors
+    post_tax_monthly_cashflow: float
+    assessment_surplus_m: float      # Shaded rent, stressed P&I repayments
+    per_property: pd.DataFrame
+
+
+def _table(records, columns):
+    # records: row dicts, or a dict of equal-length column lists (missing values None)
+    frame = pd.DataFrame(records if isinstance(records, dict) else list(records), columns=list(columns))
+    for name, default in columns.items():
+        frame[name] = frame[name].fillna(default).astype(type(default))
+    return frame
+
+
+class Portfolio:
+    """Column-wise properties and loans tables."""
+
+    def __init__(self, properties=(), loans=()):
+        self.properties = _table(properties, PROPERTY_COLUMNS)
+        self.loans = _table(loans, LOAN_COLUMNS)
+        unvalued = self.properties["current_value"] <= 0
+        self.properties.loc[unvalued, "current_value"] = self.properties.loc[unvalued, "purchase_price"]
+
+    @classmethod
+    def load(cls, path=PORTFOLIO_PATH):
+        """Reads a holdings file ({"properties": [...], "loans": [...]}); a missing file is an empty portfolio."""
+        if not os.path.exists(path):
+            return cls()
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data.get("properties", []), data.get("loans", []))
+
+    def save(self, path=PORTFOLIO_PATH):
+        data = {"properties": self.properties.to_dict("records"), "loans": self.loans.to_dict("records")}
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2, default=lambda v: v.item())
+
+    @classmethod
+    def from_scenarios(cls, scenarios, names=None, base=None):
+        """Adds each PropertyInputs as an investment property with its core and equity loans."""
+        base = base or cls()
+        properties = base.properties.to_dict("records")
+        loans = base.loans.to_dict("records")
+        for n, i in enumerate(scenarios):
+            idx = len(properties)
+            name = names[n] if names else f"Property {n + 1}"
+            properties.append({
+                "name": name, "purchase_price": i.purchase_price, "current_value": i.purchase_price,
+                "stamp_duty": i.stamp_duty, "monthly_rent": i.monthly_rent * (1 - i.vacancy_pct / 100),
+                "monthly_opex": i.mgt_fee_m + i.strata_m + i.insurance_m + i.rates_m + i.maint_m + i.water_m + i.other_m,
+                "depreciation": i.div_43 + i.div_40, "ownership_split": i.ownership_split,
+            })
+            is_io = i.loan_type == "Interest Only"
+            loans.append({
+                "loan_id": f"{name} (Core)", "purpose": "Investment Purchase",
+                "amount": i.purchase_price * (i.lvr / 100), "interest_rate": i.interest_rate / 100,
+                "loan_type": f"IO ({i.io_years}yr)" if is_io else "P&I", "io_years": i.io_years if is_io else 0,
+                "term_years": i.loan_term, "secured_by": idx, "deductible_against": idx,
+            })
+            if i.use_eq and i.eq_amount:
+                # Equity release is secured elsewhere but its interest is deductible against this property
+                loans.append({
+                    "loan_id": f"{name} (Equity)", "purpose": "Inv Deposit (Cash Out)", "amount": i.eq_amount,
+                    "interest_rate": i.eq_rate / 100, "term_years": EQUITY_LOAN_TERM, "deductible_against": idx,
+                })
+        return cls(properties, loans)
+
+    def io_current(self, as_of=None):
+        """Whether each loan is still in its interest-only period on as_of (default today).
+
+        The period ends at io_expiry ("Jan-2031") when given, otherwise io_years after the purchase date of
+        the property the loan is for; a loan with neither date is taken to be newly drawn.
+        """
+        L = self.loans
+        as_of = pd.Timestamp(as_of) if as_of is not None else pd.Timestamp.today()
+        purchased = pd.to_datetime(self.properties["purchase_date"], format="%b-%Y", errors="coerce")
+        start = purchased.reindex(self.allocation()).reset_index(drop=True)
+        month = start.dt.year * 12 + start.dt.month - 1 + (L["io_years"] * 12).round()  # Months since year 0
+        from_purchase = pd.to_datetime(pd.DataFrame({"year": month // 12, "month": month % 12 + 1, "day": 1}), errors="coerce")
+        expiry = pd.to_datetime(L["io_expiry"], format="%b-%Y", errors="coerce").fillna(from_purchase)
+        io = L["io_years"].to_numpy(dtype=float) > 0
+        return io & (expiry.isna() | (expiry > as_of)).to_numpy()
+
+    def allocation(self):
+        """Property row each loan's debt and repayments count against: the security, else the property
+        its interest is deductible against (an equity release secured outside the portfolio); -1 if neither."""
+        n = len(self.properties)
+        secured, deductible = self.loans["secured_by"].to_numpy(), self.loans["deductible_against"].to_numpy()
+        index = np.where((secured >= 0) & (secured < n), secured, deductible)
+        return np.where((index >= 0) & (index < n), index, -1)
+
+    def monthly_repayments(self, as_of=None):
+        """Current-period monthly repayment per loan on as_of (default today): interest only until the
+        IO period ends (io_current), then P&I over the term left after it."""
+        L = self.loans
+        amount, rate = L["amount"].to_numpy(dtype=float), L["interest_rate"].to_numpy(dtype=float)
+        term, io = L["term_years"].to_numpy(dtype=float), L["io_years"].to_numpy(dtype=float)
+        pi_months = np.maximum((term - io) * 12, 1)
+        return np.where(self.io_current(as_of), amount * rate / 12, pmt_array(rate / 12, pi_months, amount))
+
+    def summarize(self, household=None, as_of=None):
+        """Aggregates value, debt, cash flow, serviceability and negative gearing across every holding.
+
+        Loans linked to no property are totalled in an "Unallocated loans" row of per_property, so its
+        columns always add up to the portfolio totals.
+        """
+        h = household or Household()
+        P, L = self.properties, self.loans
+        n = len(P)
+        amount, rate = L["amount"].to_numpy(dtype=float), L["interest_rate"].to_numpy(dtype=float)
+        term, io = L["term_years"].to_numpy(dtype=float), L["io_years"].to_numpy(dtype=float)
+
+        interest_y1 = year_totals(amount, rate, term, io, 1)[0]
+        repay_m = self.monthly_repayments(as_of)
+        stress_m = pmt_array((rate + STRESS_BUFFER) / 12, np.maximum((term - io) * 12, 1), amount)
+
+        def by_property(index, weights):
+            linked = (index >= 0) & (index < n)
+            return np.bincount(index[linked], weights=weights[linked], minlength=n)
+
+        allocation = self.allocation()
+        unallocated = allocation < 0
+        debt = by_property(allocation, amount)
+        interest = by_property(L["deductible_against"].to_numpy(), interest_y1)
+        repayments = by_property(allocation, repay_m)
+
+        # Owner-occupied running costs are living expenses, not property deductions
+        invest = ~P["owner_occupied"].to_numpy(dtype=bool)
+        value = P["current_value"].to_numpy(dtype=float)
+        rent_m = P["monthly_rent"].to_numpy(dtype=float) * invest
+        opex_m = P["monthly_opex"].to_numpy(dtype=float) * invest
+        taxable = (rent_m - opex_m) * 12 - interest - P["depreciation"].to_numpy(dtype=float) * invest
+        split = P["ownership_split"].to_numpy(dtype=float)
+
+        fy, medicare = h.tax_year, h.include_medicare
+        tax_refund = 0.0
+        for net_salary, share in ((h.s1_net_annual, split), (h.s2_net_annual, 1 - split)):
+            gross = gross_from_net(float(net_salary), fy, medicare)
+            tax_refund += income_tax(gross, fy, medicare) - income_tax(max(0.0, gross + float(taxable @ share)), fy, medicare)
+
+        total_value, total_debt = float(value.sum()), float(amount.sum())
+        net_monthly_cashflow = float(rent_m.sum() - opex_m.sum() - repay_m.sum())
+        income_m = (h.s1_net_annual + h.s2_net_annual) / 12 + rent_m.sum() * RENT_SHADING
+        assessment_surplus_m = income_m - (h.monthly_living + h.other_debts_m + stress_m.sum() + opex_m.sum())
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            property_lvr = np.where(value > 0, debt / value, 0.0)
+        per_property = pd.DataFrame({
+            "Property": P["name"], "Value": value, "Debt": debt, "LVR": property_lvr,
+            "Monthly Rent": rent_m, "Monthly Repayments": repayments, "Monthly OpEx": opex_m,
+            "Net Monthly Cash Flow": rent_m - opex_m - repayments, "Taxable Income": taxable,
+        })
+        if unallocated.any():
+            other_debt, other_repay = float(amount[unallocated].sum()), float(repay_m[unallocated].sum())
+            per_property.loc[n] = {
+                "Property": "Unallocated loans", "Value": 0.0, "Debt": other_debt, "LVR": 0.0, "Monthly Rent": 0.0,
+                "Monthly Repayments": other_repay, "Monthly OpEx": 0.0, "Net Monthly Cash Flow": -other_repay,
+                "Taxable Income": 0.0,
+            }
+        return PortfolioSummary(
+            total_value=total_value, total_debt=total_debt, net_equity=total_value - total_debt,
+            lvr=total_debt / total_value if total_value else 0.0,
+            monthly_rent=float(rent_m.sum()), monthly_repayments=float(repay_m.sum()), monthly_opex=float(opex_m.sum()),
+            net_monthly_cashflow=net_monthly_cashflow,
+            annual_deductible_interest=float(interest.sum()), net_taxable_property_income=float(taxable.sum()),
+            tax_refund=float(tax_refund), post_tax_monthly_cashflow=net_monthly_cashflow + float(tax_refund) / 12,
+            assessment_surplus_m=float(assessment_surplus_m), per_property=per_property,
+        )
+
+
+def household_from_scenario(i, include_mortgage=True):
+    """Household incomes and commitments as entered for a PropertyInputs scenario.
+
+    Leave out the existing mortgage when the home loan is already a holding in the portfolio.
+    """
+    other_debts_m = i.ext_car_loan + i.ext_cc + i.ext_other + (i.ext_mortgage if include_mortgage else 0.0)
+    return Household(
+        s1_net_annual=float(i.s1_input * FREQ_MAP[i.s1_freq]), s2_net_annual=float(i.s2_input * FREQ_MAP[i.s2_freq]),
+        monthly_living=i.monthly_living, other_debts_m=other_debts_m,
+        tax_year=i.tax_year, include_medicare=i.include_medicare,
+    )
@@ -0,0 +1,89 @@
+"""Year-by-year cash flow ledger over the holding period, with IRR and NPV.
+
+Every column is computed for all years at once: rent and expenses compound from
+their year-1 values, loan interest and repayments come from the amortization
+schedule, each year's tax refund goes through tax.py, and the final year adds the
+sale net of CGT and the outstanding loan balances.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import numpy_financial as npf
+import pandas as pd
+
+from amortization import year_totals
+from engine import CGT_DISCOUNT, EQUITY_LOAN_TERM, FREQ_MAP
+from tax import gross_from_net, income_tax
+
+
+@dataclass
+class ProjectionResult:
+    """Annual ledger (one row per year) plus the investment return on the cash outlay."""
+    ledger: pd.DataFrame
+    cash_flows: np.ndarray   # Year 0 outlay followed by each year's net cash flow incl. sale
+    irr: float               # Fraction; NaN when there is no cash outlay to return on
+    npv: float
+
+
+def project(i):
+    """Builds the annual ledger for a PropertyInputs over i.holding_period years."""
+    years = np.arange(1, i.holding_period + 1)
+    elapsed = years - 1
+
+    # Income & expenses compound from their year-1 values
+    rent = i.monthly_rent * 12 * (1 - i.vacancy_pct / 100) * (1 + i.rent_growth) ** elapsed
+    opex_m = i.mgt_fee_m + i.strata_m + i.insurance_m + i.rates_m + i.maint_m + i.water_m + i.other_m
+    expenses = opex_m * 12 * (1 + i.expense_inflation) ** elapsed
+
+    # Loans
+    loan_amount = i.purchase_price * (i.lvr / 100)
+    io_years = min(i.io_years, i.loan_term) if i.loan_type == "Interest Only" else 0
+    core_interest, core_repay, core_balance = year_totals(loan_amount, i.interest_rate / 100, i.loan_term, io_years, years)
+    eq_amount = i.eq_amount if i.use_eq else 0.0
+    eq_interest, eq_repay, eq_balance = year_totals(eq_amount, i.eq_rate / 100, EQUITY_LOAN_TERM, 0, years)
+    interest = core_interest + eq_interest
+    repayments = core_repay + eq_repay
+
+    # Tax refund on the property's taxable loss (or bill on its profit), split by ownership
+    depreciation = np.full(len(years), float(i.div_43 + i.div_40))
+    taxable = rent - (expenses + interest + depreciation)
+    fy, medicare = i.tax_year, i.include_medicare
+    tax_refund = np.zeros(len(years))
+    for net_salary, share in ((i.s1_input * FREQ_MAP[i.s1_freq], i.ownership_split),
+                              (i.s2_input * FREQ_MAP[i.s2_freq], 1 - i.ownership_split)):
+        gross = gross_from_net(float(net_salary), fy, medicare)
+        tax_refund += income_tax(gross, fy, medicare) - income_tax(np.maximum(0, gross + taxable * share), fy, medicare)
+
+    pre_tax = rent - expenses - repayments
+    post_tax = pre_tax + tax_refund
+
+    # Sale at the end of the final year
+    value = i.purchase_price * (1 + i.growth_rate) ** years
+    capital_gain = value[-1] - i.purchase_price
+    cgt_payable = capital_gain * CGT_DISCOUNT * (i.cgt_marginal_rate / 100)
+    sale_proceeds = np.zeros(len(years))
+    sale_proceeds[-1] = value[-1] - cgt_payable - core_balance[-1] - eq_balance[-1]
+
+    outlay = (i.purchase_price + i.stamp_duty + i.legal_fees + i.building_pest + i.loan_setup
+              + i.buyers_agent + i.other_entry) - loan_amount - eq_amount
+    cash_flows = np.concatenate(([-outlay], post_tax + sale_proceeds))
+    irr = float(npf.irr(cash_flows)) if outlay > 0 else float("nan")
+    npv = float(npf.npv(i.discount_rate, cash_flows))
+
+    ledger = pd.DataFrame({
+        "Rent": rent,
+        "Expenses": -expenses,
+        "Interest": -interest,
+        "Principal": -(repayments - interest),
+        "Depreciation": depreciation,
+        "Taxable Income": taxable,
+        "Tax Refund": tax_refund,
+        "Pre-Tax Cash Flow": pre_tax,
+        "Post-Tax Cash Flow": post_tax,
+        "Sale Proceeds": sale_proceeds,
+        "Cumulative Cash Flow": np.cumsum(post_tax + sale_proceeds),
+        "Property Value": value,
+        "Loan Balance": core_balance + eq_balance,
+        "Equity": value - core_balance - eq_balance,
+    }, index=pd.Index(years, name="Year"))
+    return ProjectionResult(ledger=ledger, cash_flows=cash_flows, irr=irr, npv=npv)
@@ -0,0 +1,398 @@
+"""PDF summary report for one property, built without Streamlit.
+
+app.py renders it for the Download button after fetching the AI lookups;
+batch_reports.py renders many at once on a process pool. The AI results are passed
+in, so this module never touches the network.
+"""
+import hashlib
+import io
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import matplotlib.ticker as ticker
+import numpy as np
+from fpdf import FPDF
+from fpdf.image_parsing import get_img_info
+from matplotlib.figure import Figure
+from PIL import Image
+
+from engine import loan_balances, value_projection
+
+# --- CONFIG ---
+LOGO_PATH = "AQI_Logo.png"
+LOGO_WIDTH_MM = 30
+LOGO_DPI = 300               # Print resolution the logo is downscaled to for its slot in the header
+CHART_FORMAT = os.environ.get("AQI_REPORT_CHART_FORMAT", "png")  # "png" a raster at CHART_DPI, "svg" vector paths
+CHART_DPI = 150
+CHART_CACHE_SIZE = 64
+
+_template = None
+_template_lock = threading.Lock()
+_charts = OrderedDict()
+_chart_figure = None
+_chart_lock = threading.Lock()
+
+
+class ReportTemplate:
+    """Static assets shared by every report in a process.
+
+    The logo is downscaled to its printed size and re-encoded once, so each report
+    embeds a small image instead of decoding and compressing the full-size source PNG.
+    """
+
+    def __init__(self, logo_path=LOGO_PATH, logo_width_mm=LOGO_WIDTH_MM, dpi=LOGO_DPI):
+        self.logo_width_mm = logo_width_mm
+        self.logo = self._prepare_logo(logo_path, round(logo_width_mm / 25.4 * dpi))
+
+    @staticmethod
+    def _prepare_logo(path, width_px):
+        if not os.path.exists(path):
+            return b""
+        with Image.open(path) as image:
+            image.load()
+            if image.width > width_px:
+                image = image.resize((width_px, round(image.height * width_px / image.width)), Image.LANCZOS)
+            # A fully opaque alpha channel only adds a soft mask to every PDF
+            if image.mode == "RGBA" and image.getchannel("A").getextrema()[0] == 255:
+                image = image.convert("RGB")
+            buffer = io.BytesIO()
+            image.save(buffer, format="PNG", optimize=True)
+        return buffer.getvalue()
+
+
+def template():
+    """Returns the process-wide ReportTemplate, building it on first use."""
+    global _template
+    with _template_lock:
+        if _template is None:
+            _template = ReportTemplate()
+        return _template
+
+
+@dataclass(frozen=True)
+class Chart:
+    """A rendered chart: its image bytes and, for a PNG, the image as fpdf parsed it."""
+    key: str
+    data: bytes
+    info: object = None
+
+
+def equity_chart(years, values, equity, growth_rate, fmt=None):
+    """Section 7 chart as a Chart, cached by a hash of the plotted series.
+
+    Renders reuse one Figure per process (cleared between charts) instead of building a new one.
+    A PNG is parsed for fpdf once, here, so a cached chart embeds without decoding it again;
+    fpdf re-parses and redraws an SVG on every pdf.image call.
+    """
+    global _chart_figure
+    fmt = fmt or CHART_FORMAT
+    series = np.ascontiguousarray([years, values, equity], dtype=float)
+    key = hashlib.sha256(series.tobytes() + f"{growth_rate!r}|{fmt}".encode()).hexdigest()
+    with _chart_lock:
+        if key in _charts:
+            _charts.move_to_end(key)
+            return _charts[key]
+
+        if _chart_figure is None:
+            _chart_figure = Figure(figsize=(8, 4.5))
+            _chart_figure.add_subplot()
+        fig = _chart_figure
+        ax = fig.axes[0]
+        ax.clear()
+        ax.plot(years, values, label="Market Value", color="#003366", linewidth=2.5)
+        ax.plot(years, equity, label="Equity Position", color="#2ca02c", linewidth=2.5)
+        ax.fill_between(years, equity, color="#2ca02c", alpha=0.1)
+
+        ax.set_title(f"Equity Projection ({growth_rate*100:.1f}% Annual Growth)", fontsize=12, fontweight='bold', pad=15)
+        ax.yaxis.set_major_formatter(ticker.FuncFormatter(lambda x, pos: f'${x:,.0f}'))
+        ax.grid(True, axis='y', linestyle="--", alpha=0.5)
+        ax.legend(frameon=False, loc="upper left")
+        fig.tight_layout(); img_buffer = io.BytesIO()
+        fig.savefig(img_buffer, format=fmt, bbox_inches="tight", dpi=CHART_DPI)
+
+        image = img_buffer.getvalue()
+        if fmt == "svg":
+            image = re.sub(rb"<metadata>.*?</metadata>", b"", image, flags=re.S)  # fpdf has no use for it
+            _charts[key] = Chart(key, image)
+        else:
+            info = get_img_info(key, io.BytesIO(image))
+            _charts[key] = Chart(key, image, info if info.get("iccp") is None else None)
+        while len(_charts) > CHART_CACHE_SIZE:
+            _charts.popitem(last=False)
+        return _charts[key]
+
+
+class StageTimer:
+    """Wall time per report stage, summed over every report it is passed to."""
+
+    def __init__(self):
+        self.totals = {}
+        self.pages = 0
+        self._last = time.perf_counter()
+
+    def start(self):
+        self._last = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        self.totals[stage] = self.totals.get(stage, 0.0) + now - self._last
+        self._last = now
+
+
+class InvestmentReportPDF(FPDF):
+    def __init__(self, report_template=None):
+        super().__init__()
+        self.template = report_template or template()
+
+    def header(self):
+        if self.template.logo: self.image(io.BytesIO(self.template.logo), 10, 8, self.template.logo_width_mm)
+        self.set_font("helvetica", "B", 20)
+        self.set_text_color(0, 51, 102)
+        self.cell(40) 
+        self.cell(0, 15, "Proposed Investment Property Analysis", new_x="LMARGIN", new_y="NEXT", align="L")
+        self.ln(10)
+
+    def footer(self):
+        self.set_y(-15)
+        self.set_font("helvetica", "I", 8)
+        self.set_text_color(150, 150, 150)
+        self.cell(0, 5, "*Disclaimer: Suburb yield and serviceability are estimates for guidance only.", align="C", new_x="LMARGIN", new_y="NEXT")
+        self.cell(0, 5, f"Page {self.page_no()}", align="C")
+
+    # FIXED TYPO HERE
+    def section_header(self, title):
+        self.set_font("helvetica", "B", 13)
+        self.set_fill_color(230, 240, 255)
+        self.set_text_color(0, 0, 0)
+        self.cell(0, 10, f"  {title}", fill=True, new_x="LMARGIN", new_y="NEXT")
+        self.ln(2)
+
+    def row(self, label, value, label2="", value2=""):
+        self.set_font("helvetica", "", 10)
+        self.cell(50, 7, label, border=0)
+        self.set_font("helvetica", "B", 10)
+        self.cell(45, 7, str(value), border=0)
+        if label2:
+            self.set_font("helvetica", "", 10)
+            self.cell(50, 7, label2, border=0)
+            self.set_font("helvetica", "B", 10)
+            self.cell(0, 7, str(value2), border=0, new_x="LMARGIN", new_y="NEXT")
+        else: self.ln(7)
+
+    def chart(self, chart, x=None, w=0):
+        """Places a Chart; a parsed PNG goes into this document's image cache under its key."""
+        if chart.info is None:
+            return self.image(io.BytesIO(chart.data), x=x, w=w)
+        images = self.image_cache.images
+        if chart.key not in images:
+            info = type(chart.info)(chart.info)  # the cached Chart is shared by every report
+            info.update(i=len(images) + 1, usages=0, iccp_i=None)
+            images[chart.key] = info
+        return self.image(chart.key, x=x, w=w)
+
+
+def render_pdf(property_name, property_url, i, r, estimates=None, tax_strategy=None, is_ai=False, timer=None, output=None):
+    """Builds the summary report from engine inputs (i), results (r) and any AI lookups that succeeded.
+
+    Returns the PDF bytes, or writes them to output (a path or binary file object) and returns None. fpdf
+    still builds the whole document in memory first; output= only skips the extra bytes() copy.
+    """
+    timer = timer or StageTimer()
+    timer.start()
+    ai_tag = " (AI Estimated)" if is_ai else " (Manual/Default)"
+    estimates = estimates if isinstance(estimates, dict) else {}
+    market_yield = estimates.get("market_yield")
+    property_yield = r.gross_yield
+    median_price = estimates.get("median_price")
+
+    pdf = InvestmentReportPDF()
+    pdf.add_page()
+    
+    # --- HEADER ---
+    pdf.set_font("helvetica", "B", 16)
+    pdf.cell(0, 8, property_name, new_x="LMARGIN", new_y="NEXT")
+    pdf.set_font("helvetica", "", 11)
+    pdf.cell(0, 7, f"Configuration: {i.beds} Bed | {i.baths} Bath | {i.cars} Car", new_x="LMARGIN", new_y="NEXT")
+    if property_url and property_url.strip() != "" and property_url != "https://www.realestate.com.au/":
+        pdf.set_font("helvetica", "U", 9); pdf.set_text_color(0, 102, 204) 
+        pdf.cell(0, 6, "View Listing Online", link=property_url, new_x="LMARGIN", new_y="NEXT")
+        pdf.set_text_color(0, 0, 0) 
+    pdf.ln(3)
+
+    # --- 1. ACQUISITION & FINANCE ---
+    pdf.section_header(f"1. Acquisition & Finance (100% Debt Funded Structure){ai_tag}")
+    
+    pdf.row("Purchase Price:", f"${i.purchase_price:,.0f}", "Core Loan Amount:", f"${r.loan_amount:,.0f} ({i.lvr:.0f}% LVR)")
+    
+    # --- NEW: AI Median Price & Variance Row ---
+    if median_price:
+        variance = i.purchase_price - median_price
+        
+        # Manually constructing the row to allow split text coloring for the variance
+        pdf.set_font("helvetica", "", 10)
+        pdf.cell(50, 7, "Est. Suburb Median:", border=0)
+        pdf.set_font("helvetica", "B", 10)
+        pdf.cell(45, 7, f"${median_price:,.0f}", border=0)
+        
+        pdf.set_font("helvetica", "", 10)
+        pdf.cell(50, 7, "Purchase vs Median:", border=0)
+        
+        # Color logic: Green = Below median (Good), Red = Above median (Premium)
+        if variance > 0:
+            pdf.set_text_color(200, 0, 0) # Red
+            var_text = f"+ ${variance:,.0f} (Above)"
+        elif variance < 0:
+            pdf.set_text_color(0, 128, 0) # Green
+            var_text = f"- ${abs(variance):,.0f} (Below)"
+        else:
+            pdf.set_text_color(0, 102, 204) # Blue
+            var_text = "At Exact Median"
+            
+        pdf.set_font("helvetica", "B", 10)
+        pdf.cell(0, 7, var_text, border=0, new_x="LMARGIN", new_y="NEXT")
+        pdf.set_text_color(0, 0, 0) # Reset to black for the next rows
+    else:
+        # Fallback if the AI API fails to return a price
+        pdf.set_text_color(150, 150, 150)
+        pdf.row("Est. Suburb Median:", "Data Unavailable", "Purchase vs Median:", "N/A")
+        pdf.set_text_color(0, 0, 0)
+    
+    # --- Back to Standard Rows ---
+    if i.use_eq:
+        pdf.row("Total Entry Costs:", f"${r.total_acquisition_costs:,.0f}", "Equity Release Loan:", f"${r.eq_amount:,.0f}")
+        pdf.set_text_color(0, 128, 0) # Green for zero cash
+        pdf.row("Total Capital Required:", f"${r.total_cost_base:,.0f}", "CASH FROM SAVINGS:", f"${r.actual_cash_outlay:,.0f}")
+        pdf.set_text_color(0, 0, 0)
+    else:
+        pdf.row("Total Entry Costs:", f"${r.total_acquisition_costs:,.0f}", "Total Cash Outlay:", f"${r.actual_cash_outlay:,.0f}")
+        
+    pdf.ln(3)
+
+    # --- 2. YIELD ANALYSIS ---
+    pdf.section_header("2. Yield Analysis & Market Comparison (AI Estimated)")
+    pdf.row("Property Gross Yield:", f"{property_yield:.2f}%", "Property Net Yield:", f"{r.net_yield:.2f}%")
+    if market_yield:
+        variance = property_yield - market_yield
+        pdf.set_text_color(0, 128, 0) if variance >= 0 else pdf.set_text_color(200, 0, 0)
+        status = f"{'Outperforming' if variance >= 0 else 'Underperforming'} by {abs(variance):.2f}%"
+        pdf.row("Est. Suburb Average:", f"{market_yield:.2f}%", "Market Status:", status)
+    else:
+        pdf.set_text_color(128, 128, 128); pdf.row("Est. Suburb Average:", "Data Unavailable", "Market Status:", "N/A")
+    pdf.set_text_color(0, 0, 0); pdf.ln(3)
+
+    # --- 3. PROPERTY PERFORMANCE ---
+    pdf.section_header(f"3. Property Performance (Annual Pre-Tax){ai_tag}")
+    
+    if r.cash_on_cash is not None:
+        cash_on_cash = f"{r.cash_on_cash:.2f}%"
+    else:
+        cash_on_cash = "Infinite (100% Financed)"
+
+    pdf.row(f"Gross Rent ({i.vacancy_pct:.1f}% Vac):", f"${r.annual_gross_income:,.0f}", "Operating Expenses:", f"-${r.total_operating_expenses:,.0f}")
+    pdf.set_font("helvetica", "I", 8); pdf.set_text_color(120, 120, 120)
+    pdf.cell(95, 4, "", border=0); pdf.cell(0, 4, f"(Strata: ${i.strata_m*12:,.0f} | Mgt: ${i.mgt_fee_m*12:,.0f} | Rates/Water/Maint/Tax: ${(i.rates_m+i.water_m+i.insurance_m+i.maint_m+i.other_m)*12:,.0f})", border=0, new_x="LMARGIN", new_y="NEXT")
+    pdf.set_text_color(0, 0, 0); pdf.ln(1)
+    
+    pdf.row("Total Interest Deductible:", f"-${r.total_tax_deductible_interest:,.0f}", "Net Property Cash Flow:", f"${r.pre_tax_cashflow:,.2f}")
+    
+    pdf.set_font("helvetica", "I", 10); pdf.set_text_color(0, 102, 204)
+    pdf.cell(50, 7, "Cash-on-Cash Return:", border=0); pdf.set_font("helvetica", "B", 10); pdf.cell(45, 7, f"{cash_on_cash}", border=0)
+    pdf.set_font("helvetica", "I", 10); pdf.cell(50, 7, "Est. Additional Tax Refund:", border=0); pdf.set_font("helvetica", "B", 10)
+    pdf.cell(0, 7, f"${r.total_tax_variance:,.2f}", border=0, new_x="LMARGIN", new_y="NEXT")
+    pdf.set_text_color(0, 0, 0); pdf.ln(3)
+
+    # --- INJECT AI TAX STRATEGY HERE ---
+    pdf.section_header("Strategic Taxation Analysis (AI Generated)")
+    tax_strategy_text = tax_strategy
+    
+    pdf.set_font("helvetica", "", 10)
+    if tax_strategy_text:
+        # FPDF handles multi_cell for paragraph wrapping. Cleaned to prevent unicode/smart-quote crashes.
+        clean_text = tax_strategy_text.encode('latin-1', 'replace').decode('latin-1')
+        pdf.multi_cell(0, 6, clean_text)
+    else:
+        pdf.multi_cell(0, 6, "AI Tax Strategy could not be generated at this time. Please check your API limits or connection.")
+    pdf.ln(5)
+
+    # --- 4. HOUSEHOLD SERVICEABILITY ---
+    pdf.section_header("4. Monthly Household Serviceability")
+    # Real-world math plus the bank stress test (+3% on new loans, +30% repayment buffer on existing mortgage)
+    total_household_net_m = r.total_net_salary_m
+    shaded_rent_m = r.shaded_rent_m
+    core_mortgage_m = r.new_mortgage_m
+    prop_expenses_m = r.prop_expenses_m
+    total_monthly_living = i.monthly_living
+    total_existing_debt_m = r.total_existing_debt_m
+    net_monthly_surplus = r.net_monthly_surplus
+    bank_assessed_surplus = r.bank_assessed_surplus
+
+    # Print the distinct breakdown
+    pdf.set_font("helvetica", "B", 10); pdf.cell(0, 7, "Serviceability Breakdown (Monthly):", new_x="LMARGIN", new_y="NEXT"); pdf.set_font("helvetica", "", 10)
+    pdf.row("Take-Home Pay:", f"${total_household_net_m:,.2f}", "Living Expenses:", f"-${total_monthly_living:,.2f}")
+    pdf.row("Rental Income (80%):", f"${shaded_rent_m:,.2f}", "Prop. Operating Exp:", f"-${prop_expenses_m:,.2f}")
+    
+    # Splitting out the loans
+    pdf.row("Existing Debts (PPOR):", f"-${total_existing_debt_m:,.2f}", "New Equity Loan:", f"-${r.eq_monthly_pi:,.2f}" if i.use_eq else "$0.00")
+    pdf.row("New Core Loan:", f"-${core_mortgage_m:,.2f}", "", "")
+    
+    pdf.ln(2)
+    
+    # Print Real-World Surplus (Green/Red)
+    if net_monthly_surplus >= 0:
+        pdf.set_text_color(0, 128, 0); pdf.set_font("helvetica", "B", 11)
+        pdf.cell(0, 7, f"REAL-WORLD MONTHLY SURPLUS: ${net_monthly_surplus:,.2f}", align="R", new_x="LMARGIN", new_y="NEXT")
+    else:
+        pdf.set_text_color(200, 0, 0); pdf.set_font("helvetica", "B", 11)
+        pdf.cell(0, 7, f"REAL-WORLD MONTHLY DEFICIT: ${abs(net_monthly_surplus):,.2f}", align="R", new_x="LMARGIN", new_y="NEXT")
+        
+    # Print Bank Assessed Surplus (Blue/Red)
+    if bank_assessed_surplus >= 0:
+        pdf.set_text_color(0, 102, 204); pdf.set_font("helvetica", "B", 11)
+        pdf.cell(0, 7, f"BANK ASSESSED SURPLUS (Stressed): ${bank_assessed_surplus:,.2f}", align="R", new_x="LMARGIN", new_y="NEXT")
+    else:
+        pdf.set_text_color(200, 0, 0); pdf.set_font("helvetica", "B", 11)
+        pdf.cell(0, 7, f"BANK ASSESSED DEFICIT (Stressed): ${abs(bank_assessed_surplus):,.2f}", align="R", new_x="LMARGIN", new_y="NEXT")
+    
+    # DTI and Disclaimer
+    pdf.set_text_color(100, 100, 100); pdf.set_font("helvetica", "I", 9)
+    pdf.cell(0, 5, f"New Debt to Net Income (DTI): {r.dti:.1f}x  |  Bank assessment assumes +3% P&I and +30% on existing mortgages", align="R", new_x="LMARGIN", new_y="NEXT")
+    pdf.set_text_color(0, 0, 0); pdf.ln(3)
+
+    # --- 5. EXIT STRATEGY ---
+    pdf.section_header(f"5. Exit Strategy & CGT Projection (Year {i.holding_period})")
+    pdf.row("Est. Sale Price:", f"${r.sale_price:,.0f}", "Gross Capital Gain:", f"${r.capital_gain:,.0f}")
+    pdf.row("Marginal Tax Rate:", f"{i.cgt_marginal_rate:.1f}%", "Est. CGT Payable:", f"${r.cgt_payable:,.0f}")
+    pdf.set_font("helvetica", "B", 10); pdf.row("NET PROFIT ON SALE:", f"${r.net_profit_on_sale:,.0f}")
+    pdf.ln(3)
+
+    # --- 6. CHARTS ---
+    pdf.add_page()
+    pdf.section_header("6. Projected Wealth Milestones")
+    pdf.set_font("helvetica", "B", 9); pdf.set_fill_color(240, 240, 240)
+    pdf.cell(30, 7, "Year", border=1, align="C", fill=True); pdf.cell(80, 7, "Estimated Value", border=1, align="C", fill=True); pdf.cell(80, 7, "Estimated Equity", border=1, align="C", fill=True, new_x="LMARGIN", new_y="NEXT")
+    pdf.set_font("helvetica", "", 9)
+    core_balances, eq_balances = loan_balances(i)
+    for yr in [1, 3, 5, 10]:
+        if yr <= i.holding_period:
+            val = i.purchase_price * (1 + i.growth_rate)**yr
+            eq = val - core_balances[yr - 1] - eq_balances[yr - 1] # Subtracting BOTH loans for true equity
+            pdf.cell(30, 7, f"Year {yr}", border=1, align="C"); pdf.cell(80, 7, f"${val:,.0f}", border=1, align="C"); pdf.cell(80, 7, f"${eq:,.0f}", border=1, align="C", new_x="LMARGIN", new_y="NEXT")
+    
+    pdf.ln(8)
+    pdf.section_header("7. Equity & Value Projections")
+    years = np.arange(1, i.holding_period + 1)
+    values = np.array(value_projection(i.purchase_price, i.growth_rate, i.holding_period))
+    timer.lap("layout")
+    # Calculate true equity accounting for both loans
+    true_equity = values - core_balances - eq_balances
+    pdf.chart(equity_chart(years, values, true_equity, i.growth_rate), x=15, w=180)
+    timer.lap("chart")
+
+    report = bytes(pdf.output()) if output is None else pdf.output(output)
+    timer.pages += pdf.pages_count
+    timer.lap("output")
+    return report
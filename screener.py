@@ -0,0 +1,151 @@
+"""Headless batch screener for listing CSVs.
+
+    python screener.py listings.csv ranked.csv [--rank-by post_tax_cashflow] [--workers 4] [--ai-cache]
+
+Each listing row is a property scenario: columns use PropertyInputs field names
+(purchase_price, monthly_rent, lvr, ...) and anything missing or blank takes the
+same defaults as app.py. The file is read in chunks, each chunk goes through
+engine.evaluate_batch on a worker process, and only the screening columns are kept
+for the final ranked CSV or Parquet file (chosen by the output file's extension).
+
+With --ai-cache, rows with an address are filled from Gemini estimates already in
+ai_cache.sqlite3; nothing is ever requested from the API here.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import fields
+
+import pandas as pd
+
+from ai_cache import response_cache
+from engine import PropertyInputs, evaluate_batch
+
+# --- CONFIG ---
+CHUNK_ROWS = 5000
+ID_COLUMNS = ("Property Name", "address", "Listing URL")
+RESULT_COLUMNS = (
+    "gross_yield", "net_yield", "pre_tax_cashflow", "post_tax_cashflow",
+    "monthly_surplus", "bank_assessed_surplus", "dti", "net_profit_on_sale",
+)
+AI_COLUMNS = ("market_yield", "median_price", "ai_estimated")
+
+# Estimate fields that map straight onto PropertyInputs (same units as app.py's form)
+ESTIMATED_INPUTS = (
+    "stamp_duty", "legal_fees", "building_pest", "monthly_rent", "vacancy_pct",
+    "mgt_fee_m", "strata_m", "insurance_m", "rates_m", "maint_m", "water_m", "other_m", "div_43", "div_40",
+)
+INPUT_DEFAULTS = {f.name: f.default for f in fields(PropertyInputs)}
+
+
+def cached_estimates(address, price, beds, baths, cars):
+    """The estimates fetch_comprehensive_estimates stored for this listing, or None (never calls the API)."""
+    arguments = {"address": address, "price": price, "beds": beds, "baths": baths, "cars": cars}
+    try:
+        return response_cache.lookup("estimates", arguments)
+    except Exception as e:
+        print(f"⚠️ AI Cache Error: {e}")
+        return None
+
+
+def enrich_from_cache(chunk):
+    """Fills blank inputs from cached AI estimates; values given in the file always win."""
+    def column(name):
+        return chunk[name] if name in chunk.columns else pd.Series(INPUT_DEFAULTS.get(name, ""), index=chunk.index)
+
+    found = []
+    for address, price, beds, baths, cars in zip(
+        column("address"), column("purchase_price").fillna(INPUT_DEFAULTS["purchase_price"]),
+        column("beds").fillna(INPUT_DEFAULTS["beds"]), column("baths").fillna(INPUT_DEFAULTS["baths"]),
+        column("cars").fillna(INPUT_DEFAULTS["cars"]),
+    ):
+        estimates = None
+        if isinstance(address, str) and address.strip():
+            estimates = cached_estimates(address, float(price), int(beds), int(baths), int(cars))
+        found.append(estimates if isinstance(estimates, dict) else {})
+
+    for name in ESTIMATED_INPUTS + ("growth_rate",):
+        key = "expected_annual_growth" if name == "growth_rate" else name
+        values = pd.Series([e.get(key) for e in found], index=chunk.index, dtype=float)
+        if name == "growth_rate":
+            values = values / 100  # Estimates give growth as a percent, PropertyInputs as a fraction
+        chunk[name] = chunk[name].fillna(values) if name in chunk.columns else values
+    chunk["market_yield"] = [e.get("market_yield") for e in found]
+    chunk["median_price"] = [e.get("median_price") for e in found]
+    chunk["ai_estimated"] = [bool(e) for e in found]
+    return chunk
+
+
+def screen_chunk(chunk, use_ai_cache=False):
+    """Evaluates one chunk of listings and returns its screening columns."""
+    chunk.columns = [str(c).strip() for c in chunk.columns]
+    if use_ai_cache:
+        chunk = enrich_from_cache(chunk)
+    for name, default in INPUT_DEFAULTS.items():
+        if name in chunk.columns:
+            chunk[name] = chunk[name].fillna(default)
+
+    results = evaluate_batch(chunk)
+    out = chunk[[c for c in ID_COLUMNS if c in chunk.columns]].copy()
+    out.insert(0, "source_row", chunk.index)  # Row number in the listings file (read_csv keeps it across chunks)
+    out["purchase_price"] = chunk["purchase_price"] if "purchase_price" in chunk.columns else INPUT_DEFAULTS["purchase_price"]
+    for name in RESULT_COLUMNS:
+        out[name] = results[name]
+    out["serviceable"] = results["bank_assessed_surplus"] > 0
+    if use_ai_cache:
+        for name in AI_COLUMNS:
+            out[name] = chunk[name]
+    return out
+
+
+def _screened_chunks(reader, workers, use_ai_cache):
+    """Yields screened chunks in input order, keeping at most 2 * workers chunks in flight."""
+    if workers == 1:
+        for chunk in reader:
+            yield screen_chunk(chunk, use_ai_cache)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = []
+        for chunk in reader:
+            pending.append(pool.submit(screen_chunk, chunk, use_ai_cache))
+            if len(pending) >= 2 * workers:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+
+def screen(source, destination, rank_by="post_tax_cashflow", workers=None, chunk_rows=CHUNK_ROWS, use_ai_cache=False):
+    """Screens every listing in source and writes them ranked by rank_by (highest first). Returns the ranked frame."""
+    workers = max(1, workers or os.cpu_count() or 1)
+    started = time.perf_counter()
+    reader = pd.read_csv(source, chunksize=chunk_rows)
+    parts = list(_screened_chunks(reader, workers, use_ai_cache))
+    ranked = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=list(RESULT_COLUMNS))
+    ranked = ranked.sort_values(rank_by, ascending=False, kind="stable", ignore_index=True)
+    ranked.insert(0, "rank", range(1, len(ranked) + 1))
+
+    if str(destination).lower().endswith(".parquet"):
+        ranked.to_parquet(destination, index=False)
+    else:
+        ranked.to_csv(destination, index=False)
+    elapsed = time.perf_counter() - started
+    print(f"Screened {len(ranked)} listings in {elapsed:.2f}s ({len(ranked) / max(elapsed, 1e-9):,.0f} rows/s, {workers} workers) -> {destination}")
+    return ranked
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rank listing CSVs by yield, cash flow and serviceability.")
+    parser.add_argument("source", help="Listings CSV (columns named as PropertyInputs fields)")
+    parser.add_argument("destination", help="Ranked output: .csv or .parquet")
+    parser.add_argument("--rank-by", default="post_tax_cashflow", choices=RESULT_COLUMNS)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all CPU cores)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--ai-cache", action="store_true", help="Fill blank inputs from cached AI estimates")
+    args = parser.parse_args(argv)
+    screen(args.source, args.destination, args.rank_by, args.workers, args.chunk_rows, args.ai_cache)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
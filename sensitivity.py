@@ -0,0 +1,107 @@
+"""Sensitivity analysis over a grid of PropertyInputs values.
+
+A grid of interest rate, growth, LVR and vacancy values is evaluated in one
+evaluate_batch pass. Evaluated cells are remembered per base scenario, so
+widening, narrowing or shifting the grid only evaluates the cells not seen before.
+"""
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, replace
+
+import numpy as np
+
+from engine import evaluate_batch
+
+# --- CONFIG ---
+# Inputs that can be varied; units follow PropertyInputs (growth_rate is a fraction, the rest percents)
+SENSITIVITY_FIELDS = ("interest_rate", "growth_rate", "lvr", "vacancy_pct")
+METRICS = ("post_tax_cashflow", "monthly_surplus", "net_profit_on_sale")
+MAX_SCENARIOS = 8
+MAX_CELLS = 2_000_000  # Per scenario; a store that would outgrow this restarts from the current grid
+CELL_DECIMALS = 9  # Grid values are rounded so 5.1 from one linspace matches 5.1 from another
+
+
+class SensitivityCache:
+    """Evaluated grid cells keyed by base scenario, least recently used scenarios dropped first.
+
+    Each scenario keeps a dense array over the union of every axis value requested so far,
+    with NaN marking cells not yet evaluated; a new grid is a fancy-index gather from it.
+    """
+
+    def __init__(self, max_scenarios=MAX_SCENARIOS, max_cells=MAX_CELLS):
+        self.max_scenarios = max_scenarios
+        self.max_cells = max_cells
+        self.stats = {"cells_evaluated": 0, "cells_reused": 0}
+        self._scenarios = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _store(self, base, names):
+        # The key ignores the varied fields' base values, so moving the grid keeps the same store
+        key = replace(base, **{n: 0 for n in names}).digest(names)
+        store = self._scenarios.pop(key, None)
+        if store is None:
+            store = {"values": [np.empty(0) for _ in names], "data": np.empty((len(METRICS),) + (0,) * len(names))}
+        self._scenarios[key] = store
+        while len(self._scenarios) > self.max_scenarios:
+            self._scenarios.popitem(last=False)
+        return store
+
+    def _extend(self, store, values):
+        """Grows the store's axes to include values, keeping the cells already evaluated."""
+        union = [np.union1d(old, new) for old, new in zip(store["values"], values)]
+        if all(len(u) == len(old) for u, old in zip(union, store["values"])):
+            return
+        if np.prod([len(u) for u in union]) > self.max_cells:
+            union = [np.unique(v) for v in values]
+            old_data = None
+        else:
+            old_data = store["data"]
+        data = np.full((len(METRICS),) + tuple(len(u) for u in union), np.nan)
+        if old_data is not None and old_data.size:
+            old_index = [np.searchsorted(u, old) for u, old in zip(union, store["values"])]
+            data[(slice(None),) + np.ix_(*old_index)] = old_data
+        store["values"], store["data"] = union, data
+
+    def grid(self, base, axes):
+        """Evaluates every combination of axes values around base.
+
+        axes maps each varied field to a 1D sequence. Returns {metric: array} where each
+        array has one dimension per axis, in the order the axes were given.
+        """
+        names = list(axes)
+        values = [np.round(np.asarray(axes[n], dtype=float), CELL_DECIMALS) for n in names]
+        with self._lock:
+            store = self._store(base, names)
+            self._extend(store, values)
+            index = [np.searchsorted(u, v) for u, v in zip(store["values"], values)]
+            block = store["data"][(slice(None),) + np.ix_(*index)]
+
+            missing = np.nonzero(np.isnan(block[0]))
+            if missing[0].size:
+                table = asdict(base)
+                table.update({n: v[m] for n, v, m in zip(names, values, missing)})
+                out = evaluate_batch(table)
+                block[(slice(None),) + missing] = [out[m] for m in METRICS]
+                store["data"][(slice(None),) + tuple(ix[m] for ix, m in zip(index, missing))] = block[(slice(None),) + missing]
+            self.stats["cells_evaluated"] += missing[0].size
+            self.stats["cells_reused"] += block[0].size - missing[0].size
+
+        return dict(zip(METRICS, block))
+
+
+def tornado(base, ranges, metric="post_tax_cashflow"):
+    """Swing in metric when each field moves alone from its low to its high value.
+
+    ranges maps a field to (low, high). Returns rows sorted by swing, largest first:
+    (field, value at low, value at high, base value).
+    """
+    names = list(ranges)
+    table = {k: [v] * (2 * len(names) + 1) for k, v in asdict(base).items()}
+    for j, name in enumerate(names):
+        low, high = ranges[name]
+        table[name][2 * j] = low
+        table[name][2 * j + 1] = high
+    out = evaluate_batch(table)[metric]
+    base_value = float(out[-1])
+    rows = [(name, float(out[2 * j]), float(out[2 * j + 1]), base_value) for j, name in enumerate(names)]
+    return sorted(rows, key=lambda r: abs(r[2] - r[1]), reverse=True)
@@ -0,0 +1,247 @@
+"""Typed per-session form model for app.py.
+
+ScenarioForm holds the values the input widgets start from, in the form's display units
+(percents, not fractions), with the living expenses table as compact columns instead of a
+JSON string. Both classes use __slots__ and pickle through a versioned binary encoding,
+so a session kept in memory or serialized by Streamlit stays small.
+"""
+import json
+import struct
+from array import array
+
+import numpy as np
+import pandas as pd
+
+from engine import DEFAULT_LIVING_EXPENSES_DATA
+
+# --- CONFIG ---
+MAGIC = b"AQIF"
+VERSION = 1
+EXPENSE_COLUMNS = ("Category", "Item", "Monthly Amount ($)")
+
+# (attribute, type, default, history column, scale from history units to form units)
+FIELDS = (
+    ("prop_name", str, "2 Example Street MELBOURNE", "Property Name", None),
+    ("prop_url", str, "https://www.realestate.com.au/", "Listing URL", None),
+    ("price", float, 650000.0, "purchase_price", None),
+    ("beds", int, 2, "beds", None),
+    ("baths", int, 1, "baths", None),
+    ("cars", int, 1, "cars", None),
+    ("s1_input", float, 3811.78, "s1_input", None),
+    ("s1_freq", str, "Fortnightly", "s1_freq", None),
+    ("s2_input", float, 8429.83, "s2_input", None),
+    ("s2_freq", str, "Monthly", "s2_freq", None),
+    ("split", int, 50, "ownership_split", 100),
+    ("growth", float, 4.0, "growth_rate", 100),
+    ("hold", int, 10, "holding_period", None),
+    ("rent_growth", float, 3.0, "rent_growth", 100),
+    ("expense_inflation", float, 3.0, "expense_inflation", 100),
+    ("discount_rate", float, 7.0, "discount_rate", 100),
+    ("ext_mortgage", float, 2921.0, "ext_mortgage", None),
+    ("ext_car_loan", float, 0.0, "ext_car_loan", None),
+    ("ext_cc", float, 0.0, "ext_cc", None),
+    ("ext_other", float, 0.0, "ext_other", None),
+    ("use_eq", bool, True, "use_eq", None),
+    ("eq_amount", float, 170000.0, "eq_amount", None),
+    ("eq_rate", float, 6.20, "eq_rate", None),
+    ("stamp_duty", float, 34100.0, "stamp_duty", None),
+    ("legal_fees", float, 1500.0, "legal_fees", None),
+    ("building_pest", float, 600.0, "building_pest", None),
+    ("loan_setup", float, 500.0, "loan_setup", None),
+    ("buyers_agent", float, 5000.0, "buyers_agent", None),
+    ("other_entry", float, 1000.0, "other_entry", None),
+    ("monthly_rent", float, 3683.33, "monthly_rent", None),
+    ("vacancy_pct", float, 5.0, "vacancy_pct", None),
+    ("mgt_fee_m", float, 276.25, "mgt_fee_m", None),
+    ("strata_m", float, 500.0, "strata_m", None),
+    ("insurance_m", float, 45.0, "insurance_m", None),
+    ("rates_m", float, 165.0, "rates_m", None),
+    ("maint_m", float, 150.0, "maint_m", None),
+    ("water_m", float, 80.0, "water_m", None),
+    ("other_m", float, 25.0, "other_m", None),
+    ("div_43", float, 9000.0, "div_43", None),
+    ("div_40", float, 8500.0, "div_40", None),
+    ("lvr", int, 80, "lvr", None),
+    ("interest_rate", float, 5.49, "interest_rate", None),
+    ("loan_term", int, 30, "loan_term", None),
+    ("loan_type", str, "Interest Only", "loan_type", None),
+    ("io_years", int, 5, "io_years", None),
+    ("cgt_marginal_rate", float, 35.0, "cgt_marginal_rate", None),
+    # Not restored from history: a revisited scenario starts as manually entered
+    ("is_ai_estimated", bool, False, None, None),
+)
+# Fields "Auto-Estimate Fields" fills from fetch_comprehensive_estimates (same names in the response)
+AI_ESTIMATED_FIELDS = (
+    "stamp_duty", "legal_fees", "building_pest", "monthly_rent", "vacancy_pct", "mgt_fee_m",
+    "strata_m", "insurance_m", "rates_m", "maint_m", "water_m", "div_43", "div_40",
+)
+_NUMBER_CODES = {float: "d", int: "q", bool: "?"}
+
+
+# --- BINARY HELPERS ---
+def _pack_text(out, value):
+    # Length -1 marks None (blank cells in the expenses table)
+    if value is None:
+        out += struct.pack("<i", -1)
+        return
+    data = str(value).encode("utf-8")
+    out += struct.pack("<i", len(data)) + data
+
+
+def _unpack_text(buf, offset):
+    (size,) = struct.unpack_from("<i", buf, offset)
+    offset += 4
+    if size < 0:
+        return None, offset
+    return bytes(buf[offset:offset + size]).decode("utf-8"), offset + size
+
+
+# --- LIVING EXPENSES ---
+class LivingExpenses:
+    """The living expenses table as columns: category and item labels plus a float array of monthly amounts."""
+
+    __slots__ = ("categories", "items", "amounts")
+
+    def __init__(self, categories, items, amounts):
+        self.categories = tuple(categories)
+        self.items = tuple(items)
+        self.amounts = array("d", amounts)
+
+    @classmethod
+    def from_records(cls, records):
+        records = list(records)
+        amounts = [r.get(EXPENSE_COLUMNS[2]) for r in records]
+        return cls(
+            [r.get(EXPENSE_COLUMNS[0]) for r in records], [r.get(EXPENSE_COLUMNS[1]) for r in records],
+            [float("nan") if a is None else float(a) for a in amounts],
+        )
+
+    @classmethod
+    def from_json(cls, text):
+        """Reads the JSON records saved in history (living_expenses_json)."""
+        return cls.from_records(json.loads(text) if text else [])
+
+    @classmethod
+    def from_frame(cls, frame):
+        """Reads the DataFrame returned by st.data_editor."""
+        def column(name):
+            return frame[name].tolist() if name in frame.columns else [None] * len(frame)
+        amounts = frame[EXPENSE_COLUMNS[2]].astype(float) if EXPENSE_COLUMNS[2] in frame.columns else [float("nan")] * len(frame)
+        labels = [[None if v != v else v for v in column(name)] for name in EXPENSE_COLUMNS[:2]]  # NaN -> None
+        return cls(labels[0], labels[1], amounts)
+
+    def frame(self):
+        """The table as a DataFrame for st.data_editor."""
+        return pd.DataFrame({
+            EXPENSE_COLUMNS[0]: list(self.categories), EXPENSE_COLUMNS[1]: list(self.items),
+            EXPENSE_COLUMNS[2]: np.frombuffer(self.amounts, dtype=float),
+        })
+
+    def to_json(self):
+        """JSON records in the format history entries and engine.living_expenses_total read."""
+        return json.dumps([
+            {EXPENSE_COLUMNS[0]: c, EXPENSE_COLUMNS[1]: i, EXPENSE_COLUMNS[2]: None if a != a else a}
+            for c, i, a in zip(self.categories, self.items, self.amounts)
+        ])
+
+    def total(self):
+        """Monthly total; blank amounts count as zero."""
+        return float(np.nansum(np.frombuffer(self.amounts, dtype=float)))
+
+    def __len__(self):
+        return len(self.amounts)
+
+    def __eq__(self, other):
+        return isinstance(other, LivingExpenses) and (self.categories, self.items, self.amounts.tobytes()) == (
+            other.categories, other.items, other.amounts.tobytes())
+
+    def pack(self, out):
+        out += struct.pack("<I", len(self.amounts))
+        out += self.amounts.tobytes()
+        for value in self.categories + self.items:
+            _pack_text(out, value)
+
+    @classmethod
+    def unpack(cls, buf, offset):
+        (n,) = struct.unpack_from("<I", buf, offset)
+        offset += 4
+        amounts = array("d")
+        amounts.frombytes(bytes(buf[offset:offset + 8 * n]))
+        offset += 8 * n
+        labels = []
+        for _ in range(2 * n):
+            value, offset = _unpack_text(buf, offset)
+            labels.append(value)
+        return cls(labels[:n], labels[n:], amounts), offset
+
+
+DEFAULT_EXPENSES = LivingExpenses.from_records(DEFAULT_LIVING_EXPENSES_DATA)
+
+
+# --- SCENARIO FORM ---
+class ScenarioForm:
+    """Starting values for every input widget of one session; FIELDS holds the defaults."""
+
+    __slots__ = tuple(f[0] for f in FIELDS) + ("expenses",)
+
+    def __init__(self, **values):
+        for name, kind, default, _, _ in FIELDS:
+            setattr(self, name, kind(values.get(name, default)))
+        expenses = values.get("expenses")
+        self.expenses = expenses if expenses is not None else LivingExpenses(DEFAULT_EXPENSES.categories, DEFAULT_EXPENSES.items, DEFAULT_EXPENSES.amounts)
+
+    @classmethod
+    def from_history(cls, row):
+        """A form loaded from a saved history entry; fields older entries lack take the defaults."""
+        values = {}
+        for name, kind, default, column, scale in FIELDS:
+            value = row.get(column) if column else None
+            if value is not None:
+                values[name] = kind(value * scale) if scale else value
+        if row.get("living_expenses_json"):
+            values["expenses"] = LivingExpenses.from_json(row["living_expenses_json"])
+        return cls(**values)
+
+    def update(self, **values):
+        """Sets several fields at once, converting each to its declared type."""
+        kinds = {name: kind for name, kind, _, _, _ in FIELDS}
+        for name, value in values.items():
+            setattr(self, name, kinds[name](value) if name in kinds else value)
+
+    def __eq__(self, other):
+        return isinstance(other, ScenarioForm) and all(getattr(self, n) == getattr(other, n) for n in self.__slots__)
+
+    def __repr__(self):
+        return f"ScenarioForm(prop_name={self.prop_name!r}, price={self.price!r}, {len(self.expenses)} expenses)"
+
+    # --- SERIALIZATION ---
+    def to_bytes(self):
+        """Versioned binary encoding: header, the FIELDS values in order, then the expenses table."""
+        out = bytearray(struct.pack("<4sBH", MAGIC, VERSION, len(FIELDS)))
+        for name, kind, _, _, _ in FIELDS:
+            if kind is str:
+                _pack_text(out, getattr(self, name))
+            else:
+                out += struct.pack("<" + _NUMBER_CODES[kind], getattr(self, name))
+        self.expenses.pack(out)
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Decodes to_bytes() output. Fields added after the data was written take their defaults."""
+        buf = memoryview(data)
+        magic, version, count = struct.unpack_from("<4sBH", buf, 0)
+        if magic != MAGIC or version > VERSION:
+            raise ValueError(f"Unsupported scenario form data (version {version})")
+        offset, values = struct.calcsize("<4sBH"), {}
+        for name, kind, _, _, _ in FIELDS[:count]:
+            if kind is str:
+                values[name], offset = _unpack_text(buf, offset)
+            else:
+                (values[name],) = struct.unpack_from("<" + _NUMBER_CODES[kind], buf, offset)
+                offset += struct.calcsize(_NUMBER_CODES[kind])
+        values["expenses"], offset = LivingExpenses.unpack(buf, offset)
+        return cls(**values)
+
+    def __reduce__(self):
+        return (ScenarioForm.from_bytes, (self.to_bytes(),))
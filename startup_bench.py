@@ -0,0 +1,105 @@
+"""Cold-start benchmark for app.py.
+
+    python startup_bench.py [--runs 3] [--budget 6.0] [--top 12]
+
+Each run starts a fresh interpreter with -X importtime, executes the first render of
+app.py through Streamlit's AppTest harness and reports:
+  * time to first render (interpreter start to the end of the first script run),
+  * the heaviest top-level imports, from the importtime log,
+  * any module from LAZY_MODULES that was loaded anyway.
+Exits non-zero when the median time exceeds --budget or a lazy module was loaded, so
+it can guard against startup regressions.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# --- CONFIG ---
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+DEFAULT_BUDGET_SECONDS = 6.0
+# Only the AI, PDF, charting and Excel export paths need these; the first render must not import them
+LAZY_MODULES = ("google.generativeai", "fpdf", "matplotlib", "report", "PIL.Image", "openpyxl")
+
+_CHILD = """
+import json, logging, sys, time
+logging.disable(logging.WARNING)
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({app!r}, default_timeout=120).run()
+print(json.dumps({{
+    "render_done": time.time(),
+    "exceptions": [str(e.value) for e in at.exception],
+    "loaded": [m for m in {lazy!r} if m in sys.modules],
+}}))
+"""
+
+
+def _top_level_imports(log):
+    """{module: cumulative seconds} for imports made directly by the child script (importtime nesting level 1)."""
+    times = {}
+    for line in log.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if not cumulative.strip().isdigit() or name.startswith("   "):
+            continue
+        times[name.strip()] = times.get(name.strip(), 0.0) + int(cumulative) / 1e6
+    return times
+
+
+def run_once(app_path=APP_PATH):
+    """One cold start: (seconds to first render, {top-level import: seconds}, child report)."""
+    code = _CHILD.format(app=app_path, lazy=LAZY_MODULES)
+    started = time.time()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, cwd=os.path.dirname(app_path),
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"First render failed:\n{proc.stderr[-2000:]}")
+    report = json.loads(proc.stdout.strip().splitlines()[-1])
+    return report["render_done"] - started, _top_level_imports(proc.stderr), report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure app.py time to first render and import cost.")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET_SECONDS, help="Fail above this median (seconds)")
+    parser.add_argument("--top", type=int, default=12, help="How many imports to list")
+    args = parser.parse_args(argv)
+
+    renders, imports, loaded, exceptions = [], {}, set(), []
+    for _ in range(args.runs):
+        seconds, times, report = run_once()
+        renders.append(seconds)
+        for name, t in times.items():
+            imports.setdefault(name, []).append(t)
+        loaded.update(report["loaded"])
+        exceptions += report["exceptions"]
+
+    median = statistics.median(renders)
+    print(f"Time to first render: median {median:.2f}s over {args.runs} runs "
+          f"(min {min(renders):.2f}s, max {max(renders):.2f}s, budget {args.budget:.2f}s)")
+    print("Heaviest top-level imports (median):")
+    ranked = sorted(((statistics.median(t), name) for name, t in imports.items()), reverse=True)
+    for seconds, name in ranked[:args.top]:
+        print(f"  {name:<44} {seconds * 1000:8.1f} ms")
+
+    failed = False
+    if exceptions:
+        print(f"⚠️ First render raised: {exceptions[0]}")
+        failed = True
+    if loaded:
+        print(f"⚠️ Loaded on first render but should be lazy: {', '.join(sorted(loaded))}")
+        failed = True
+    if median > args.budget:
+        print(f"⚠️ Time to first render {median:.2f}s is over the {args.budget:.2f}s budget")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""Table-driven Australian resident income tax.
+
+Bracket schedules are plain data keyed by financial year, so the engine, the batch
+screener and the AI tax summary all read the same thresholds. Every function takes a
+scalar or a NumPy array of incomes; arrays are evaluated with np.interp on each
+year's precomputed tax curve or with searchsorted lookups.
+"""
+import bisect
+
+import numpy as np
+
+# --- SCHEDULES ---
+# (threshold, marginal rate) pairs: income above each threshold is taxed at its rate
+TAX_SCHEDULES = {
+    "2023-24": ((0, 0.0), (18200, 0.19), (45000, 0.325), (120000, 0.37), (180000, 0.45)),
+    "2024-25": ((0, 0.0), (18200, 0.16), (45000, 0.30), (135000, 0.37), (190000, 0.45)),  # Stage 3 cuts
+    "2025-26": ((0, 0.0), (18200, 0.16), (45000, 0.30), (135000, 0.37), (190000, 0.45)),
+}
+# Medicare levy rate and the single low-income threshold below which no levy is paid
+MEDICARE_LEVY = {
+    "2023-24": (0.02, 26000),
+    "2024-25": (0.02, 27222),
+    "2025-26": (0.02, 27222),
+}
+MEDICARE_SHADE_IN = 0.10  # Levy phases in at 10c per dollar above the threshold
+TOP_KNOT = 1e12           # Last knot of the tax curves; array incomes above it are taxed as if at it
+DEFAULT_TAX_YEAR = "2024-25"
+
+
+class _Schedule:
+    """Precomputed thresholds, rates and cumulative tax at each threshold for one year."""
+
+    def __init__(self, fy):
+        if fy not in TAX_SCHEDULES:
+            raise ValueError(f"No tax schedule for financial year {fy!r}; known years: {sorted(TAX_SCHEDULES)}")
+        brackets = TAX_SCHEDULES[fy]
+        self.thresholds = np.array([t for t, _ in brackets], dtype=float)
+        self.rates = np.array([r for _, r in brackets], dtype=float)
+        self.base = np.concatenate(([0.0], np.cumsum(np.diff(self.thresholds) * self.rates[:-1])))
+        self.medicare_rate, self.medicare_threshold = MEDICARE_LEVY[fy]
+        # Python lists for the scalar fast path (bisect beats NumPy dispatch on single values)
+        self.t_list, self.r_list, self.b_list = self.thresholds.tolist(), self.rates.tolist(), self.base.tolist()
+        # Tax and take-home pay are piecewise linear in gross: store the knots, the tax at each (for
+        # np.interp on arrays) and the take-home pay and slopes for the inverse
+        shade_end = self.medicare_threshold * MEDICARE_SHADE_IN / (MEDICARE_SHADE_IN - self.medicare_rate)
+        self.curve, self.inverse = {}, {}
+        for medicare in (False, True):
+            extra = [self.medicare_threshold, shade_end] if medicare else []
+            knots = np.unique(np.concatenate((self.thresholds, extra)))
+            marginal = self.rates[np.searchsorted(self.thresholds, knots, side="right") - 1]
+            if medicare:
+                marginal = marginal + np.select(
+                    [knots < self.medicare_threshold, knots < shade_end], [0.0, MEDICARE_SHADE_IN], self.medicare_rate
+                )
+            tax = self._tax(knots, medicare)
+            self.curve[medicare] = (np.append(knots, TOP_KNOT), np.append(tax, self._tax(TOP_KNOT, medicare)))
+            net = knots - tax
+            slopes = 1 - marginal
+            self.inverse[medicare] = (knots, net, slopes, knots.tolist(), net.tolist(), slopes.tolist())
+
+    def _tax(self, income, medicare):
+        idx = np.searchsorted(self.thresholds, income, side="right") - 1
+        idx = np.clip(idx, 0, len(self.thresholds) - 1)
+        tax = self.base[idx] + (income - self.thresholds[idx]) * self.rates[idx]
+        if medicare:
+            tax = tax + self._levy(income)
+        return tax
+
+    def _levy(self, income):
+        shaded = np.maximum(0.0, (income - self.medicare_threshold) * MEDICARE_SHADE_IN)
+        return np.minimum(income * self.medicare_rate, shaded)
+
+
+_schedules = {}
+_SCALARS = (int, float, np.number, np.bool_)
+
+
+def schedule(fy=DEFAULT_TAX_YEAR):
+    s = _schedules.get(fy)
+    if s is None:
+        s = _schedules[fy] = _Schedule(fy)
+    return s
+
+
+# --- PUBLIC API ---
+def income_tax(gross_income, fy=DEFAULT_TAX_YEAR, medicare=False):
+    """Income tax on a gross income (scalar or array), optionally including the Medicare levy."""
+    s = schedule(fy)
+    if isinstance(gross_income, _SCALARS) and isinstance(medicare, _SCALARS):
+        g = float(gross_income)
+        if g <= 0:
+            return 0.0
+        i = bisect.bisect_right(s.t_list, g) - 1
+        tax = s.b_list[i] + (g - s.t_list[i]) * s.r_list[i]
+        if medicare and g > s.medicare_threshold:
+            tax += min(g * s.medicare_rate, (g - s.medicare_threshold) * MEDICARE_SHADE_IN)
+        return tax
+    g = np.maximum(np.asarray(gross_income, dtype=float), 0.0)
+    if isinstance(medicare, _SCALARS):
+        return np.interp(g, *s.curve[bool(medicare)])
+    return s._tax(g, False) + s._levy(g) * np.asarray(medicare, dtype=float)
+
+
+def medicare_levy(gross_income, fy=DEFAULT_TAX_YEAR):
+    """Medicare levy with the low-income shade-in."""
+    levy = schedule(fy)._levy(np.maximum(np.asarray(gross_income, dtype=float), 0.0))
+    return float(levy) if np.ndim(levy) == 0 else levy
+
+
+def marginal_rate(gross_income, fy=DEFAULT_TAX_YEAR):
+    """Marginal rate on the next dollar earned; income exactly on a threshold stays in the lower bracket."""
+    s = schedule(fy)
+    idx = np.clip(np.searchsorted(s.thresholds, gross_income, side="left") - 1, 0, len(s.rates) - 1)
+    rate = s.rates[idx]
+    return float(rate) if np.ndim(rate) == 0 else rate
+
+
+def gross_from_net(net_income, fy=DEFAULT_TAX_YEAR, medicare=False):
+    """Inverts income_tax: the gross income whose take-home pay is net_income (scalar or array).
+
+    Take-home pay is piecewise linear and increasing in gross, so the inverse is a lookup of
+    the enclosing segment followed by a linear solve; beyond the top bracket it extrapolates.
+    """
+    s = schedule(fy)
+    if not isinstance(medicare, _SCALARS):
+        medicare = np.asarray(medicare, dtype=bool)
+        return np.where(medicare, gross_from_net(net_income, fy, True), gross_from_net(net_income, fy, False))
+    knots, net, slopes, k_list, n_list, s_list = s.inverse[bool(medicare)]
+    if isinstance(net_income, _SCALARS):
+        n = float(net_income)
+        if n <= 0:
+            return n
+        i = bisect.bisect_right(n_list, n) - 1
+        return k_list[i] + (n - n_list[i]) / s_list[i]
+    n = np.asarray(net_income, dtype=float)
+    i = np.clip(np.searchsorted(net, n, side="right") - 1, 0, len(knots) - 1)
+    return np.where(n <= 0, n, knots[i] + (n - net[i]) / slopes[i])
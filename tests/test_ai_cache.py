@@ -0,0 +1,69 @@
+"""Disk cache: TTLs, throttled last-access writes, buffered stats and LRU eviction."""
+import sqlite3
+import time
+
+import pytest
+
+import ai_cache
+from ai_cache import ResponseCache, cached
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(str(tmp_path / "cache.sqlite3"), max_entries=3)
+
+
+def _rows(cache):
+    return sqlite3.connect(cache.path).execute("SELECT key, last_access FROM responses ORDER BY key").fetchall()
+
+
+def test_hit_touches_last_access_only_when_stale(cache):
+    cache.set("estimates", "a", {"rent": 1})
+    first = dict(_rows(cache))["a"]
+    assert cache.get("estimates", "a") == {"rent": 1}
+    assert dict(_rows(cache))["a"] == first  # Fresh: the hit is a pure read
+
+    stale = time.time() - ai_cache.TOUCH_INTERVAL - 1
+    cache._conn().execute("UPDATE responses SET last_access = ? WHERE key = 'a'", (stale,))
+    cache.get("estimates", "a")
+    assert dict(_rows(cache))["a"] > stale
+
+
+def test_expired_entry_is_a_miss(cache):
+    cache.set("tax_strategy", "a", "text")
+    cache._conn().execute("UPDATE responses SET created = created - ?", (ai_cache.DEFAULT_TTLS["tax_strategy"] + 1,))
+    assert cache.get("tax_strategy", "a", "missing") == "missing"
+
+
+def test_stats_are_buffered_until_flushed(cache):
+    cache.set("estimates", "a", 1)
+    cache.get("estimates", "a"); cache.get("estimates", "a"); cache.get("estimates", "b")
+    stored = sqlite3.connect(cache.path).execute("SELECT COUNT(*) FROM stats").fetchone()[0]
+    assert stored == 0
+    assert cache.stats() == {"estimates:hit": 2, "estimates:miss": 1}
+    cache.get("estimates", "b")
+    assert cache.stats()["estimates:miss"] == 2
+
+
+def test_eviction_runs_every_few_inserts(cache, monkeypatch):
+    monkeypatch.setattr(ai_cache, "EVICTION_CHECK_EVERY", 4)
+    for n in range(5):
+        cache.set("estimates", f"k{n}", n)
+        cache._conn().execute("UPDATE responses SET last_access = ? WHERE key = ?", (n, f"k{n}"))
+    # Checked on the first insert and again on the fifth, which trims back to the 3 most recent
+    assert [key for key, _ in _rows(cache)] == ["k2", "k3", "k4"]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cached_decorator_stores_only_results(cache):
+    calls = []
+
+    @cached("market_yield", cache=cache)
+    def fetch(address, price):
+        calls.append(address)
+        return None if address == "none" else 4.2
+
+    assert fetch("1 Test St", 600000) == 4.2
+    assert fetch("1 test st.", 610000) == 4.2  # Same normalized address and $25k price band
+    assert fetch("none", 600000) is None and fetch("none", 600000) is None
+    assert calls == ["1 Test St", "none", "none"]
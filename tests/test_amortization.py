@@ -0,0 +1,54 @@
+"""Monthly amortization, including the switch from interest-only to P&I at IO expiry."""
+import numpy as np
+import pytest
+
+from amortization import balance_after, schedule, year_totals
+from engine import PropertyInputs, loan_balances, pmt
+
+
+def test_principal_and_interest_amortizes_to_zero():
+    s = schedule(500000, 0.06, 30)
+    assert s.balance.shape == (360,)
+    np.testing.assert_allclose(s.payment, pmt(0.005, 360, 500000))
+    assert s.principal.sum() == pytest.approx(500000)
+    assert s.balance[-1] == pytest.approx(0, abs=1e-6)
+
+
+def test_interest_only_period_then_reverts_to_pi():
+    s = schedule(500000, 0.06, 30, io_years=5)
+    io, pi = slice(0, 60), slice(60, None)
+    np.testing.assert_allclose(s.balance[io], 500000)
+    np.testing.assert_allclose(s.payment[io], 500000 * 0.005)
+    # From expiry the loan is repaid over the 25 years left, so the repayment jumps
+    np.testing.assert_allclose(s.payment[pi], pmt(0.005, 300, 500000))
+    assert s.payment[60] > s.payment[59]
+    assert s.balance[-1] == pytest.approx(0, abs=1e-6)
+
+
+def test_interest_only_to_term_end_is_a_balloon():
+    assert balance_after(300000, 0.05, 5, 5, 59) == pytest.approx(300000)
+    assert balance_after(300000, 0.05, 5, 5, 60) == 0.0
+
+
+def test_zero_rate_is_straight_line():
+    np.testing.assert_allclose(balance_after(120000, 0.0, 10, 0, [0, 12, 60, 120]), [120000, 108000, 60000, 0])
+
+
+@pytest.mark.parametrize("io_years", [0, 3, 5])
+@pytest.mark.parametrize("year", [1, 3, 5, 6, 30])
+def test_year_totals_match_the_schedule(io_years, year):
+    s = schedule(450000, 0.0549, 30, io_years)
+    expected = (s.annual("interest")[year - 1], s.annual("payment")[year - 1], s.annual("balance")[year - 1])
+    np.testing.assert_allclose(year_totals(450000, 0.0549, 30, io_years, year), expected, rtol=1e-9)
+    vector = year_totals(np.array([450000.0]), np.array([0.0549]), 30, io_years, year)
+    np.testing.assert_allclose([v[0] for v in vector], expected, rtol=1e-9)
+
+
+def test_loan_balances_follow_io_expiry():
+    i = PropertyInputs(loan_type="Interest Only", io_years=5, use_eq=False)
+    core, equity = loan_balances(i)
+    loan = i.purchase_price * i.lvr / 100
+    np.testing.assert_allclose(core[:5], loan)
+    assert core[5] < loan and not equity.any()
+    pi_core, _ = loan_balances(PropertyInputs(loan_type="Principal & Interest", use_eq=False))
+    assert pi_core[0] < loan
@@ -0,0 +1,53 @@
+"""evaluate_batch against evaluate, row by row, on randomized inputs."""
+from dataclasses import fields
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine import PropertyInputs, PropertyResults, evaluate, evaluate_batch
+from tax import TAX_SCHEDULES
+
+FREQUENCIES = ["Monthly", "Fortnightly", "Annually"]
+
+
+def _random_inputs(seed, n):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "purchase_price": rng.choice([0.0, 350000.0, 650000.0, 2.4e6], n),
+        "s1_input": rng.uniform(0, 20000, n), "s1_freq": rng.choice(FREQUENCIES, n),
+        "s2_input": rng.uniform(0, 200000, n), "s2_freq": rng.choice(FREQUENCIES, n),
+        "ownership_split": rng.uniform(0, 1, n), "growth_rate": rng.uniform(-0.02, 0.12, n),
+        "holding_period": rng.integers(1, 31, n), "monthly_living": rng.uniform(1000, 9000, n),
+        "ext_mortgage": rng.uniform(0, 4000, n), "ext_cc": rng.uniform(0, 500, n),
+        "use_eq": rng.random(n) < 0.5, "eq_amount": rng.uniform(0, 3e5, n), "eq_rate": rng.choice([0.0, 6.2, 7.5], n),
+        "stamp_duty": rng.uniform(0, 120000, n), "monthly_rent": rng.uniform(0, 10000, n),
+        "vacancy_pct": rng.uniform(0, 10, n), "div_43": rng.uniform(0, 15000, n), "div_40": rng.uniform(0, 9000, n),
+        "lvr": rng.integers(0, 106, n).astype(float), "interest_rate": rng.choice([0.0, 5.49, 6.1, 8.0], n),
+        "loan_term": rng.integers(1, 31, n), "loan_type": rng.choice(["Interest Only", "Principal & Interest"], n),
+        "io_years": rng.integers(0, 35, n), "cgt_marginal_rate": rng.uniform(0, 47, n),
+        "tax_year": rng.choice(sorted(TAX_SCHEDULES), n), "include_medicare": rng.random(n) < 0.5,
+    })
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_batch_matches_scalar(seed):
+    table = _random_inputs(seed, 300)
+    batch = evaluate_batch(table)
+    rows = [evaluate(PropertyInputs.from_save_data(r)) for r in table.to_dict("records")]
+    for f in fields(PropertyResults):
+        scalar = np.array([np.nan if getattr(r, f.name) is None else getattr(r, f.name) for r in rows], dtype=float)
+        np.testing.assert_allclose(batch[f.name].to_numpy(), scalar, rtol=1e-9, atol=1e-6, err_msg=f.name)
+
+
+def test_batch_fills_defaults():
+    out = evaluate_batch({"purchase_price": [650000.0, 800000.0]})
+    assert out["post_tax_cashflow"][0] == pytest.approx(evaluate(PropertyInputs()).post_tax_cashflow, abs=1e-9)
+    assert set(out) == {f.name for f in fields(PropertyResults)}
+
+
+def test_cash_on_cash_nan_where_scalar_none():
+    table = {"lvr": [105.0, 80.0], "use_eq": [True, False]}
+    batch = evaluate_batch(table)
+    assert evaluate(PropertyInputs(lvr=105.0)).cash_on_cash is None
+    assert np.isnan(batch["cash_on_cash"][0]) and not np.isnan(batch["cash_on_cash"][1])
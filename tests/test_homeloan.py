@@ -0,0 +1,77 @@
+"""Tracker workbook export -> import -> sidebar form round trip."""
+import pandas as pd
+import pytest
+
+from homeloan import export_workbook, read_workbook, scenario_form
+from portfolio import Portfolio
+
+# The app's "Active Repayment Type" selectbox options (app.py, Loan Details tab)
+LOAN_TYPE_OPTIONS = ["Interest Only", "Principal & Interest"]
+
+
+@pytest.fixture
+def portfolio():
+    return Portfolio(
+        properties=[
+            {"name": "Home (Owner Occ)", "purchase_price": 1200000, "purchase_date": "Existing", "owner_occupied": True},
+            {"name": "Investment 1", "purchase_price": 650000, "purchase_date": "Jan-2026", "stamp_duty": 34070,
+             "monthly_rent": 2816.67, "monthly_opex": 775.33, "depreciation": 17500, "ownership_split": 0.5},
+            {"name": "Investment 2", "purchase_price": 500000, "monthly_rent": 2200.0, "ownership_split": 1.0},
+        ],
+        loans=[
+            {"loan_id": "Loan 1.1", "amount": 445826, "interest_rate": 0.0525, "loan_type": "P&I", "secured_by": 0},
+            {"loan_id": "Loan 1.2", "amount": 170000, "interest_rate": 0.0549, "loan_type": "P&I",
+             "secured_by": 0, "deductible_against": 1},
+            {"loan_id": "Loan 2.1", "amount": 520000, "interest_rate": 0.0564, "loan_type": "IO (5yr)", "io_years": 5,
+             "io_expiry": "Jan-2031", "secured_by": 1, "deductible_against": 1},
+            {"loan_id": "Loan 3.1", "amount": 400000, "interest_rate": 0.06, "loan_type": "P&I", "term_years": 25,
+             "secured_by": 2, "deductible_against": 2},
+        ],
+    )
+
+
+@pytest.fixture
+def imported(portfolio, tmp_path):
+    path = tmp_path / "tracker.xlsx"
+    export_workbook(portfolio, path)
+    return read_workbook(path)
+
+
+def test_round_trip_keeps_holdings(portfolio, imported):
+    pd.testing.assert_frame_equal(imported.portfolio.properties, portfolio.properties, check_dtype=False)
+    pd.testing.assert_frame_equal(imported.portfolio.loans, portfolio.loans, check_dtype=False)
+
+
+def test_dashboard_totals_match_summary(portfolio, imported):
+    summary = portfolio.summarize()
+    assert imported.totals["Total Property Value"] == pytest.approx(summary.total_value)
+    assert imported.totals["Total Debt Position"] == pytest.approx(summary.total_debt)
+    assert imported.totals["Monthly Mortgage Cost"] == pytest.approx(summary.monthly_repayments)
+    assert imported.totals["Net Monthly Cashflow"] == pytest.approx(summary.net_monthly_cashflow)
+
+
+def test_interest_only_property_loads_into_form(imported):
+    form = scenario_form(imported.portfolio, 1)
+    assert form.loan_type in LOAN_TYPE_OPTIONS
+    assert (form.loan_type, form.io_years, form.lvr, form.interest_rate) == ("Interest Only", 5, 80, 5.64)
+    assert form.use_eq and form.eq_amount == 170000 and form.eq_rate == 5.49
+
+
+def test_principal_and_interest_property_loads_into_form(imported):
+    form = scenario_form(imported.portfolio, 2)
+    assert form.loan_type in LOAN_TYPE_OPTIONS
+    assert (form.loan_type, form.lvr, form.loan_term, form.interest_rate) == ("Principal & Interest", 80, 25, 6.0)
+    assert not form.use_eq
+
+
+def test_owner_occupied_home_uses_its_secured_loan(imported):
+    # Its loan is deductible against nothing; the equity release it secures belongs to Investment 1
+    form = scenario_form(imported.portfolio, 0)
+    assert (form.loan_type, form.lvr, form.interest_rate) == ("Principal & Interest", 37, 5.25)
+    assert not form.use_eq
+
+
+def test_unlinked_property_has_no_loan(imported):
+    portfolio = imported.portfolio
+    portfolio.loans = portfolio.loans[portfolio.loans["secured_by"] != 2]
+    assert scenario_form(portfolio, 2).lvr == 0
@@ -0,0 +1,65 @@
+"""Portfolio allocation, IO expiry and the per-property summary."""
+import numpy as np
+import pytest
+
+from engine import PropertyInputs, evaluate
+from portfolio import Household, Portfolio, household_from_scenario
+
+
+@pytest.fixture
+def portfolio():
+    return Portfolio(
+        properties=[
+            {"name": "Home", "purchase_price": 1200000, "owner_occupied": True, "monthly_opex": 900},
+            {"name": "Unit", "purchase_price": 650000, "purchase_date": "Jan-2026", "monthly_rent": 2800,
+             "monthly_opex": 700, "depreciation": 12000, "ownership_split": 0.5},
+        ],
+        loans=[
+            {"loan_id": "Home loan", "amount": 400000, "interest_rate": 0.06, "secured_by": 0},
+            {"loan_id": "Equity", "amount": 130000, "interest_rate": 0.06, "secured_by": 0, "deductible_against": 1},
+            {"loan_id": "Unit loan", "amount": 520000, "interest_rate": 0.06, "loan_type": "IO (5yr)", "io_years": 5,
+             "secured_by": 1, "deductible_against": 1},
+            {"loan_id": "Line of credit", "amount": 20000, "interest_rate": 0.08, "term_years": 5},
+            {"loan_id": "Offsite equity", "amount": 50000, "interest_rate": 0.06, "deductible_against": 1},
+        ],
+    )
+
+
+def test_allocation_prefers_security_then_deductibility(portfolio):
+    np.testing.assert_array_equal(portfolio.allocation(), [0, 0, 1, -1, 1])
+
+
+def test_io_period_ends_at_expiry(portfolio):
+    assert portfolio.io_current("2030-12-01").tolist() == [False, False, True, False, False]
+    assert not portfolio.io_current("2031-01-01")[2]  # Jan-2026 purchase + 5 years
+    before, after = portfolio.monthly_repayments("2030-12-01"), portfolio.monthly_repayments("2031-02-01")
+    assert before[2] == pytest.approx(520000 * 0.06 / 12)
+    assert after[2] > before[2]
+
+
+def test_summary_rows_add_up_to_totals(portfolio):
+    s = portfolio.summarize(Household(s1_net_annual=90000, s2_net_annual=70000), as_of="2027-01-01")
+    rows = s.per_property.set_index("Property")
+    assert list(rows.index) == ["Home", "Unit", "Unallocated loans"]
+    assert rows.loc["Home", "Debt"] == 530000 and rows.loc["Unit", "Debt"] == 570000
+    assert rows.loc["Unallocated loans", "Debt"] == 20000
+    assert rows["Debt"].sum() == pytest.approx(s.total_debt)
+    assert rows["Monthly Repayments"].sum() == pytest.approx(s.monthly_repayments)
+    assert rows["Net Monthly Cash Flow"].sum() == pytest.approx(s.net_monthly_cashflow)
+    # Owner-occupied running costs are living expenses, not portfolio outgoings
+    assert rows.loc["Home", "Monthly OpEx"] == 0 and s.monthly_opex == 700
+
+
+def test_no_unallocated_row_when_every_loan_is_linked(portfolio):
+    loans = portfolio.loans[portfolio.allocation() >= 0]
+    linked = Portfolio(portfolio.properties.to_dict("records"), loans.to_dict("records"))
+    assert "Unallocated loans" not in set(linked.summarize().per_property["Property"])
+
+
+def test_single_scenario_matches_engine():
+    i = PropertyInputs(vacancy_pct=0, loan_type="Principal & Interest")
+    s = Portfolio.from_scenarios([i]).summarize(household_from_scenario(i, include_mortgage=False))
+    r = evaluate(i)
+    assert s.total_debt == pytest.approx(r.loan_amount + r.eq_amount)
+    assert s.annual_deductible_interest == pytest.approx(r.total_tax_deductible_interest)
+    assert s.tax_refund == pytest.approx(r.total_tax_variance)
@@ -0,0 +1,64 @@
+"""Screener ranking on a small listings CSV."""
+import pandas as pd
+import pytest
+
+import screener
+from ai_cache import ResponseCache
+from engine import PropertyInputs, evaluate
+
+LISTINGS = """Property Name,address,purchase_price,monthly_rent,lvr,loan_type
+Low rent,1 Low St,650000,2200,80,Interest Only
+High rent,2 High St,650000,4200,80,Interest Only
+Cheap,3 Cheap St,420000,2600,,Principal & Interest
+Blank rent,4 Blank St,700000,,90,
+"""
+
+
+@pytest.fixture
+def listings(tmp_path):
+    path = tmp_path / "listings.csv"
+    path.write_text(LISTINGS)
+    return path
+
+
+def _expected(row):
+    values = {k: v for k, v in row.items() if k in PropertyInputs.__dataclass_fields__ and not pd.isna(v)}
+    return evaluate(PropertyInputs(**values))
+
+
+def test_ranks_by_post_tax_cash_flow(listings, tmp_path):
+    out = tmp_path / "ranked.csv"
+    ranked = screener.screen(listings, out, workers=1, chunk_rows=2)
+    source = pd.read_csv(listings)
+
+    assert ranked["rank"].tolist() == [1, 2, 3, 4]
+    assert ranked["post_tax_cashflow"].is_monotonic_decreasing
+    assert ranked["Property Name"].iloc[0] == "High rent"
+    for _, row in ranked.iterrows():
+        listing = source.loc[row["source_row"]]
+        assert row["Property Name"] == listing["Property Name"]
+        expected = _expected(listing)
+        assert row["post_tax_cashflow"] == pytest.approx(expected.post_tax_cashflow)
+        assert row["serviceable"] == (expected.bank_assessed_surplus > 0)
+    pd.testing.assert_frame_equal(pd.read_csv(out), ranked, check_dtype=False)
+
+
+def test_rank_by_other_column(listings, tmp_path):
+    ranked = screener.screen(listings, tmp_path / "ranked.csv", rank_by="gross_yield", workers=1)
+    assert ranked["gross_yield"].is_monotonic_decreasing
+    assert ranked["Property Name"].tolist() == ["High rent", "Cheap", "Blank rent", "Low rent"]
+
+
+def test_ai_cache_fills_blanks_only(listings, tmp_path, monkeypatch):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"))
+    monkeypatch.setattr(screener, "response_cache", cache)
+    specs = {"price": 700000.0, "beds": 2, "baths": 1, "cars": 1}
+    cache.prime("estimates", {"address": "4 Blank St", **specs}, {"monthly_rent": 3000, "market_yield": 4.5})
+    cache.prime("estimates", {"address": "1 Low St", **specs, "price": 650000.0}, {"monthly_rent": 9999})
+
+    ranked = screener.screen(listings, tmp_path / "ranked.csv", workers=1, use_ai_cache=True).set_index("Property Name")
+    assert ranked.loc["Blank rent", "ai_estimated"] and ranked.loc["Blank rent", "market_yield"] == 4.5
+    assert ranked.loc["Blank rent", "gross_yield"] == pytest.approx(3000 * 12 * 0.95 / 700000 * 100)
+    # A rent given in the file wins over the cached estimate
+    assert ranked.loc["Low rent", "gross_yield"] == pytest.approx(2200 * 12 * 0.95 / 650000 * 100)
+    assert not ranked.loc["Cheap", "ai_estimated"]
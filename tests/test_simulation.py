@@ -0,0 +1,35 @@
+"""Monte Carlo paths against the deterministic engine and the amortization schedule."""
+import numpy as np
+import pytest
+
+from amortization import repriced_years, year_totals
+from engine import PropertyInputs, evaluate
+from simulation import CHUNK_PATHS, SimulationSettings, simulate
+
+
+@pytest.mark.parametrize("term, io_years", [(30, 5), (30, 0), (3, 2), (2, 2)])
+def test_repriced_years_matches_yearly_repricing(term, io_years):
+    rates = np.maximum(0.005, 0.06 + 0.01 * np.random.default_rng(term).standard_normal((5, 4)))
+    interest, repayments, balances = repriced_years(400000.0, rates, term, io_years)
+    for path in range(rates.shape[1]):
+        balance = 400000.0
+        for y in range(rates.shape[0]):
+            expected = year_totals(balance, float(rates[y, path]), max(term - y, 0), max(io_years - y, 0), 1) if term > y else (0.0, 0.0, 0.0)
+            np.testing.assert_allclose((interest[y, path], repayments[y, path], balances[y, path]), expected, rtol=1e-9, atol=1e-6)
+            balance = expected[2]
+
+
+@pytest.mark.parametrize("overrides", [{}, {"loan_type": "Principal & Interest"}, {"use_eq": False, "io_years": 2}])
+def test_zero_volatility_matches_evaluate(overrides):
+    i = PropertyInputs(vacancy_pct=0, **overrides)
+    r = evaluate(i)
+    result = simulate(i, SimulationSettings(n_paths=20, years=i.holding_period, growth_vol=0, rate_vol=0))
+    assert result.cumulative_post_tax[50][0] == pytest.approx(r.post_tax_cashflow, abs=1e-6)
+    assert result.net_profit_on_sale[50] == pytest.approx(r.net_profit_on_sale, abs=1e-6)
+
+
+def test_seeded_runs_repeat_across_chunks():
+    i, s = PropertyInputs(), SimulationSettings(n_paths=CHUNK_PATHS + 500, years=5)
+    a, b = simulate(i, s), simulate(i, s)
+    assert a.n_paths == s.n_paths
+    np.testing.assert_array_equal(a.cumulative_post_tax[50], b.cumulative_post_tax[50])
@@ -0,0 +1,55 @@
+"""Bracket tax, the Medicare levy and the take-home-pay inverse."""
+import numpy as np
+import pytest
+
+from tax import TAX_SCHEDULES, gross_from_net, income_tax, marginal_rate, medicare_levy
+
+YEARS = sorted(TAX_SCHEDULES)
+
+
+@pytest.mark.parametrize("fy, gross, expected", [
+    ("2024-25", 18200, 0.0),
+    ("2024-25", 45000, 4288.0),
+    ("2024-25", 100000, 4288 + 55000 * 0.30),
+    ("2024-25", 250000, 4288 + 90000 * 0.30 + 55000 * 0.37 + 60000 * 0.45),
+    ("2023-24", 100000, 5092 + 55000 * 0.325),
+    ("2024-25", -5000, 0.0),
+])
+def test_bracket_tax(fy, gross, expected):
+    assert income_tax(gross, fy) == pytest.approx(expected)
+    assert income_tax(np.array([gross], dtype=float), fy)[0] == pytest.approx(expected)
+
+
+def test_medicare_levy_shades_in():
+    assert medicare_levy(27222) == 0.0
+    assert medicare_levy(30000) == pytest.approx((30000 - 27222) * 0.10)
+    assert medicare_levy(100000) == pytest.approx(2000.0)
+    assert income_tax(100000, medicare=True) == pytest.approx(income_tax(100000) + 2000.0)
+
+
+def test_marginal_rate_at_threshold_stays_in_lower_bracket():
+    assert marginal_rate(45000) == 0.16
+    assert marginal_rate(45001) == 0.30
+    assert marginal_rate(1e6) == 0.45
+
+
+@pytest.mark.parametrize("fy", YEARS)
+@pytest.mark.parametrize("medicare", [False, True])
+def test_gross_from_net_inverts_income_tax(fy, medicare):
+    gross = np.concatenate([np.random.default_rng(7).uniform(0, 600000, 2000), [18200, 27222, 45000, 135000, 190000, 2e6]])
+    net = gross - income_tax(gross, fy, medicare)
+    np.testing.assert_allclose(gross_from_net(net, fy, medicare), gross, rtol=1e-9, atol=1e-6)
+    for g, n in zip(gross[:50], net[:50]):
+        assert gross_from_net(float(n), fy, medicare) == pytest.approx(g, rel=1e-9)
+
+
+def test_array_medicare_flags_match_scalars():
+    gross = np.array([20000.0, 60000.0, 150000.0])
+    flags = np.array([True, False, True])
+    expected = [income_tax(float(g), medicare=bool(m)) for g, m in zip(gross, flags)]
+    np.testing.assert_allclose(income_tax(gross, medicare=flags), expected)
+
+
+def test_unknown_year_is_rejected():
+    with pytest.raises(ValueError, match="2030-31"):
+        income_tax(50000, "2030-31")